@@ -1,6 +1,9 @@
 from django.contrib.auth.models import User
 from django.db import models
 
+# Скільки останніх записів історії рейтингу показує детальна картка гравця
+RATING_HISTORY_SERIES_POINTS = 60
+
 
 class Player(models.Model):
     """Модель гравця з рейтингом"""
@@ -2,7 +2,12 @@ from django.contrib.auth.models import User
 
 from rest_framework import serializers
 
-from .models import Player, PlayerRatingHistory, PlayerStats
+from .models import (
+    RATING_HISTORY_SERIES_POINTS,
+    Player,
+    PlayerRatingHistory,
+    PlayerStats,
+)
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -77,8 +82,15 @@ class PlayerDetailSerializer(PlayerSerializer):
     """Детальний serializer для гравця"""
 
     user = UserSerializer(read_only=True)
-    rating_history = PlayerRatingHistorySerializer(many=True, read_only=True)
+    rating_history = serializers.SerializerMethodField()
     all_stats = PlayerStatsSerializer(source="stats", many=True, read_only=True)
 
     class Meta(PlayerSerializer.Meta):
         fields = PlayerSerializer.Meta.fields + ["user", "rating_history", "all_stats"]
+
+    def get_rating_history(self, obj):
+        """Останні RATING_HISTORY_SERIES_POINTS записів історії рейтингу"""
+        history = getattr(obj, "rating_series", None)
+        if history is None:
+            history = obj.rating_history.all()[:RATING_HISTORY_SERIES_POINTS]
+        return PlayerRatingHistorySerializer(history, many=True).data
@@ -1,76 +1,30 @@
-from decimal import Decimal
-
 from django.db.models import Avg, Sum
 
-from .models import Player, PlayerRatingHistory, PlayerStats
+from my_app.rating_engine import LegacyWeightsFormula, RatingEngine
+
+from .models import PlayerRatingHistory, PlayerStats
+
+rating_engine = RatingEngine(LegacyWeightsFormula(), PlayerStats, PlayerRatingHistory)
 
 
 class PlayerRatingService:
     """Сервіс для розрахунку рейтингу гравців"""
 
-    # Ваги для різних статистик
-    WEIGHTS = {
-        "goals": Decimal("3.0"),
-        "assists": Decimal("2.0"),
-        "yellow_cards": Decimal("-1.0"),
-        "red_cards": Decimal("-3.0"),
-    }
-
     @staticmethod
     def calculate_rating(player):
         """
         Розрахунок рейтингу на основі статистики
 
+        Рейтинги матчів перераховуються одним запитом, змінені зберігаються
+        одним bulk_update; результат кешується до появи нової статистики.
+
         Args:
             player: об'єкт Player
 
         Returns:
             Decimal: новий рейтинг гравця
         """
-        stats = PlayerStats.objects.filter(player=player)
-
-        if not stats.exists():
-            return Decimal("0.00")
-
-        total_rating = Decimal("0")
-
-        for stat in stats:
-            # Базовий рейтинг за матч
-            match_rating = Decimal("5.0")
-
-            # Додаємо бали за голи та асисти
-            match_rating += stat.goals * PlayerRatingService.WEIGHTS["goals"]
-            match_rating += stat.assists * PlayerRatingService.WEIGHTS["assists"]
-
-            # Віднімаємо за картки
-            match_rating += (
-                stat.yellow_cards * PlayerRatingService.WEIGHTS["yellow_cards"]
-            )
-            match_rating += stat.red_cards * PlayerRatingService.WEIGHTS["red_cards"]
-
-            # Нормалізація рейтингу (1-10)
-            match_rating = max(Decimal("1.0"), min(Decimal("10.0"), match_rating))
-
-            # Зберігаємо рейтинг матчу
-            if stat.rating != match_rating:
-                stat.rating = match_rating
-                stat.save(update_fields=["rating"])
-
-            total_rating += match_rating
-
-        # Середній рейтинг
-        new_rating = total_rating / len(stats)
-        new_rating = round(new_rating, 2)
-
-        # Оновлення рейтингу гравця
-        player.overall_rating = new_rating
-        player.matches_played = len(stats)
-        player.save(update_fields=["overall_rating", "matches_played"])
-
-        # Збереження в історію
-        PlayerRatingHistory.objects.create(player=player, rating=new_rating)
-
-        return new_rating
+        return rating_engine.calculate_rating(player)
 
     @staticmethod
     def get_player_statistics(player):
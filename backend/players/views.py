@@ -1,11 +1,16 @@
-from django.db.models import Q
+from django.db.models import Prefetch, Q
 
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 
-from .models import Player, PlayerStats
+from .models import (
+    RATING_HISTORY_SERIES_POINTS,
+    Player,
+    PlayerRatingHistory,
+    PlayerStats,
+)
 from .serializers import (
     PlayerDetailSerializer,
     PlayerRatingHistorySerializer,
@@ -19,7 +24,15 @@ class PlayerViewSet(viewsets.ModelViewSet):
     """ViewSet для управління гравцями"""
 
     queryset = Player.objects.select_related("user").prefetch_related(
-        "stats", "rating_history"
+        "stats",
+        # Лише останні записи історії: детальна картка показує обмежений ряд
+        Prefetch(
+            "rating_history",
+            queryset=PlayerRatingHistory.objects.order_by("-recorded_at", "-id")[
+                :RATING_HISTORY_SERIES_POINTS
+            ],
+            to_attr="rating_series",
+        ),
     )
     permission_classes = [IsAuthenticatedOrReadOnly]
 
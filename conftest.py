@@ -0,0 +1,11 @@
+from django.core.cache import caches
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Кеш відповідей API не повинен переживати відкат бази між тестами."""
+    yield
+    for cache in caches.all(initialized_only=True):
+        cache.clear()
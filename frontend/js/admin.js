@@ -428,7 +428,7 @@ async function loadTournaments() {
                             <circle cx="10" cy="6" r="2" stroke="currentColor" stroke-width="1.5"/>
                             <circle cx="8" cy="11" r="2" stroke="currentColor" stroke-width="1.5"/>
                         </svg>
-                        <span>${tournament.teams.length} / ${tournament.max_teams} команд</span>
+                        <span>${tournament.teams_count ?? tournament.teams.length} / ${tournament.max_teams} команд</span>
                     </div>
                 </div>
                 <div class="admin-tournament-actions">
@@ -152,8 +152,8 @@ class PlayersAPI {
     /**
      * Отримати таблицю лідерів
      */
-    static async getLeaderboard(position = null, limit = 50) {
-        const params = { limit };
+    static async getLeaderboard(position = null, pageSize = 50) {
+        const params = { page_size: pageSize };
         if (position) params.position = position;
         return await APIClient.get('/players/leaderboard/', params);
     }
@@ -84,10 +84,12 @@ async function loadHeroStats() {
     const apiBase = (typeof CONFIG !== 'undefined') ? CONFIG.API_BASE_URL : '/api';
     try {
         const [tourRes, teamsRes, playersRes, matchesRes] = await Promise.all([
-            fetch(`${apiBase}/tournaments/`),
-            fetch(`${apiBase}/teams/`),
-            fetch(`${apiBase}/players/`),
-            fetch(`${apiBase}/matches/`),
+            // Потрібні лише лічильники: сторінка з одного рядка, count для
+            // keyset-списків (гравці, матчі) вмикається явно
+            fetch(`${apiBase}/tournaments/?page_size=1`),
+            fetch(`${apiBase}/teams/?page_size=1`),
+            fetch(`${apiBase}/players/?page_size=1&count=true`),
+            fetch(`${apiBase}/matches/?page_size=1&count=true`),
         ]);
         const [tourData, teamsData, playersData, matchesData] = await Promise.all([
             tourRes.json(), teamsRes.json(), playersRes.json(), matchesRes.json()
@@ -92,16 +92,11 @@ function renderStandings() {
         return;
     }
 
-    // Sort by points, then goal difference
-    const sortedStandings = [...currentTournament.standings].sort((a, b) => {
-        if (b.points !== a.points) return b.points - a.points;
-        const diffA = a.goals_for - a.goals_against;
-        const diffB = b.goals_for - b.goals_against;
-        return diffB - diffA;
-    });
+    // Standings are ranked by the backend (points, goal difference, goals, head-to-head)
+    const sortedStandings = [...currentTournament.standings].sort((a, b) => a.rank - b.rank);
 
     tbody.innerHTML = sortedStandings.map((team, index) => {
-        const position = index + 1;
+        const position = team.rank || index + 1;
         let positionBadge = `<span class="position-badge">${position}</span>`;
 
         if (position === 1) {
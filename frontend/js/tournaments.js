@@ -58,7 +58,7 @@ function renderTournaments(tournaments) {
                 <p class="tournament-description">${tournament.description}</p>
                 <div class="tournament-footer">
                     <span class="teams-count">
-                        ${tournament.teams.length} / ${tournament.max_teams} команд
+                        ${tournament.teams_count ?? tournament.teams.length} / ${tournament.max_teams} команд
                     </span>
                     <button class="btn btn-primary btn-small" onclick="event.stopPropagation(); viewTournament(${tournament.id})">
                         Детальніше
@@ -175,6 +175,8 @@ function saveTournamentRequest(imageBase64) {
 }
 
 // ===== Pagination Data =====
+// Турнірів на сторінці (?page_size=, сервер обмежує до 100)
+const TOURNAMENTS_PAGE_SIZE = 9;
 let currentPage = 1;
 let totalPages = 1;
 
@@ -187,7 +189,7 @@ async function loadTournamentsPage(page = 1) {
     const formatFilter = document.getElementById('formatFilter')?.value || 'all';
     const searchQuery = document.getElementById('searchInput')?.value || '';
 
-    const params = { page: currentPage };
+    const params = { page: currentPage, page_size: TOURNAMENTS_PAGE_SIZE };
     if (statusFilter !== 'all') params.status = statusFilter;
     if (formatFilter !== 'all') params.format = formatFilter;
     if (searchQuery) params.search = searchQuery;
@@ -196,8 +198,7 @@ async function loadTournamentsPage(page = 1) {
         const response = await TournamentsAPI.getTournaments(params);
         if (response.results) {
             AppState.tournaments = response.results;
-            const pageSize = 3; // Matching DRF page size
-            totalPages = Math.ceil(response.count / pageSize);
+            totalPages = Math.ceil(response.count / TOURNAMENTS_PAGE_SIZE);
         } else {
             AppState.tournaments = response;
             totalPages = 1;
@@ -0,0 +1,205 @@
+"""
+Навантажувальний тест API у матчевий день (Locust).
+
+Сценарії повторюють запити фронтенду:
+    FanUser    — tournaments.js (список з фільтрами і пагінацією),
+                 tournament-detail.js (деталі турніру), players.html
+                 (таблиця лідерів, пошук)
+    PlayerUser — вхід через /api/token/, оновлення токена, /auth/me/,
+                 профіль і історія рейтингу
+    CoachUser  — тренер вносить статистику матчу (update_stats)
+
+База має бути наповнена командою seed_league (користувачі
+<prefix>_player_N і <prefix>_coach). Запуск без UI зі звітом —
+scripts/loadtest.sh, або вручну:
+
+    locust --headless -u 200 -r 20 -t 2m --host http://127.0.0.1:8000 \\
+        --csv reports/loadtest --html reports/loadtest.html
+
+Змінні оточення:
+    LOCUST_SEED_PREFIX    префікс seed_league (bench)
+    LOCUST_SEED_PLAYERS   скільки гравців згенеровано (40)
+    LOCUST_SEED_PASSWORD  пароль згенерованих користувачів
+"""
+
+import os
+import random
+
+from locust import HttpUser, between, task
+
+SEED_PREFIX = os.environ.get("LOCUST_SEED_PREFIX", "bench")
+SEED_PLAYERS = int(os.environ.get("LOCUST_SEED_PLAYERS", 40))
+# Має збігатися з my_app.benchmark.SEED_PASSWORD
+SEED_PASSWORD = os.environ.get("LOCUST_SEED_PASSWORD", "benchmark-pass")
+
+POSITIONS = ["GK", "DEF", "MID", "FWD"]
+SEARCH_TERMS = ["Гравець1", "Прізвище2", "player_3", "bench", "Гр"]
+
+
+class JWTUserMixin:
+    """Вхід через /api/token/ і Bearer-заголовок для наступних запитів."""
+
+    username = None
+
+    def login(self):
+        response = self.client.post(
+            "/api/token/",
+            json={"username": self.username, "password": SEED_PASSWORD},
+            name="/api/token/",
+        )
+        if response.status_code != 200:
+            self.tokens = None
+            return
+        self.tokens = response.json()
+        self.client.headers["Authorization"] = f"Bearer {self.tokens['access']}"
+
+    def refresh(self):
+        if not self.tokens:
+            return self.login()
+        response = self.client.post(
+            "/api/token/refresh/",
+            json={"refresh": self.tokens["refresh"]},
+            name="/api/token/refresh/",
+        )
+        if response.status_code != 200:
+            return self.login()
+        # ROTATE_REFRESH_TOKENS: разом з access приходить новий refresh
+        self.tokens.update(response.json())
+        self.client.headers["Authorization"] = f"Bearer {self.tokens['access']}"
+
+
+class FanUser(HttpUser):
+    """Анонімний уболівальник: турніри, таблиця лідерів, пошук гравців."""
+
+    weight = 10
+    wait_time = between(1, 5)
+
+    def on_start(self):
+        self.tournament_ids = []
+        self.player_ids = []
+        self.load_tournaments()
+        self.leaderboard()
+
+    @task(5)
+    def load_tournaments(self):
+        params = {"page": random.choice([1, 1, 1, 2])}
+        if random.random() < 0.3:
+            params["status"] = random.choice(["upcoming", "ongoing", "completed"])
+        with self.client.get(
+            "/api/tournaments/",
+            params=params,
+            name="/api/tournaments/",
+            catch_response=True,
+        ) as response:
+            if response.status_code == 404:
+                # Сторінки 2 може не бути — це не помилка сервера
+                response.success()
+            elif response.ok:
+                results = response.json().get("results", [])
+                self.tournament_ids += [row["id"] for row in results]
+
+    @task(8)
+    def tournament_detail(self):
+        if not self.tournament_ids:
+            return self.load_tournaments()
+        tournament_id = random.choice(self.tournament_ids)
+        self.client.get(
+            f"/api/tournaments/{tournament_id}/", name="/api/tournaments/[id]/"
+        )
+
+    @task(4)
+    def leaderboard(self):
+        params = {"page_size": 100}
+        if random.random() < 0.5:
+            params["position"] = random.choice(POSITIONS)
+        response = self.client.get(
+            "/api/players/leaderboard/", params=params, name="/api/players/leaderboard/"
+        )
+        if response.ok:
+            self.player_ids = [row["id"] for row in response.json()["results"]]
+
+    @task(2)
+    def search(self):
+        self.client.get(
+            "/api/players/search/",
+            params={"q": random.choice(SEARCH_TERMS)},
+            name="/api/players/search/",
+        )
+
+    @task(1)
+    def player_detail(self):
+        if self.player_ids:
+            player_id = random.choice(self.player_ids)
+            self.client.get(f"/api/players/{player_id}/", name="/api/players/[id]/")
+
+
+class PlayerUser(JWTUserMixin, HttpUser):
+    """Зареєстрований гравець: вхід, оновлення токена, власний профіль."""
+
+    weight = 3
+    wait_time = between(2, 8)
+
+    def on_start(self):
+        self.username = f"{SEED_PREFIX}_player_{random.randrange(SEED_PLAYERS)}"
+        self.login()
+
+    @task(4)
+    def me(self):
+        response = self.client.get("/api/auth/me/", name="/api/auth/me/")
+        if response.status_code == 401:
+            self.refresh()
+        elif response.ok and response.json().get("player"):
+            player_id = response.json()["player"]["id"]
+            self.client.get(
+                f"/api/players/{player_id}/rating_history/",
+                name="/api/players/[id]/rating_history/",
+            )
+
+    @task(1)
+    def refresh_token(self):
+        self.refresh()
+
+
+class CoachUser(JWTUserMixin, HttpUser):
+    """Тренер після матчу вносить статистику гравців."""
+
+    weight = 1
+    wait_time = between(5, 15)
+
+    def on_start(self):
+        self.username = f"{SEED_PREFIX}_coach"
+        self.login()
+        response = self.client.get(
+            "/api/players/leaderboard/",
+            params={"page_size": 100},
+            name="/api/players/leaderboard/",
+        )
+        self.player_ids = (
+            [row["id"] for row in response.json()["results"]] if response.ok else []
+        )
+        self.match_id = random.randint(1, 10_000)
+
+    @task
+    def update_stats(self):
+        if not self.player_ids:
+            return
+        player_id = random.choice(self.player_ids)
+        response = self.client.post(
+            f"/api/players/{player_id}/update_stats/",
+            json={
+                "match_id": self.match_id,
+                "goals": random.choice([0, 0, 0, 1, 2]),
+                "assists": random.choice([0, 0, 1]),
+                "minutes_played": random.randint(10, 90),
+                "shots": random.randint(0, 5),
+                "shots_on_target": random.randint(0, 3),
+                "key_passes": random.randint(0, 4),
+                "tackles": random.randint(0, 5),
+                "interceptions": random.randint(0, 4),
+                "yellow_cards": random.choice([0, 0, 0, 1]),
+            },
+            name="/api/players/[id]/update_stats/",
+        )
+        if response.status_code == 401:
+            self.refresh()
+        self.match_id += 1
@@ -3,6 +3,7 @@ from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
 
 from .models import (
+    Job,
     Match,
     Player,
     PlayerRatingHistory,
@@ -63,7 +64,7 @@ class TeamAdmin(admin.ModelAdmin):
 
 @admin.register(Standing)
 class StandingAdmin(admin.ModelAdmin):
-    list_display = ("team", "tournament", "played", "points")
+    list_display = ("team", "tournament", "rank", "played", "points")
     list_filter = ("tournament",)
 
 
@@ -78,6 +79,7 @@ class MatchAdmin(admin.ModelAdmin):
         "status",
     )
     list_filter = ("tournament", "status")
+    raw_id_fields = ("home_team_ref", "away_team_ref")
 
 
 @admin.register(Player)
@@ -91,11 +93,28 @@ class PlayerAdmin(admin.ModelAdmin):
     ]
     list_filter = ["position", "created_at"]
     search_fields = ["user__username", "user__email"]
-    readonly_fields = ["overall_rating", "matches_played", "created_at", "updated_at"]
+    readonly_fields = [
+        "overall_rating",
+        "matches_played",
+        "stat_totals",
+        "recent_ratings",
+        "created_at",
+        "updated_at",
+    ]
 
     fieldsets = (
         ("Основна інформація", {"fields": ("user", "position")}),
-        ("Рейтинг", {"fields": ("overall_rating", "matches_played")}),
+        (
+            "Рейтинг",
+            {
+                "fields": (
+                    "overall_rating",
+                    "matches_played",
+                    "stat_totals",
+                    "recent_ratings",
+                )
+            },
+        ),
         ("Дати", {"fields": ("created_at", "updated_at")}),
     )
 
@@ -127,8 +146,41 @@ class PlayerStatsAdmin(admin.ModelAdmin):
 
 @admin.register(PlayerRatingHistory)
 class PlayerRatingHistoryAdmin(admin.ModelAdmin):
-    list_display = ["player", "rating", "recorded_at"]
-    list_filter = ["recorded_at"]
+    list_display = [
+        "player",
+        "rating",
+        "rating_min",
+        "rating_max",
+        "resolution",
+        "recorded_at",
+    ]
+    list_filter = ["resolution", "recorded_at"]
     search_fields = ["player__user__username"]
     readonly_fields = ["recorded_at"]
     date_hierarchy = "recorded_at"
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = [
+        "id",
+        "kind",
+        "status",
+        "progress",
+        "created_by",
+        "created_at",
+        "finished_at",
+    ]
+    list_filter = ["status", "kind"]
+    readonly_fields = [
+        "status",
+        "progress",
+        "message",
+        "result",
+        "error",
+        "worker",
+        "created_at",
+        "started_at",
+        "finished_at",
+        "updated_at",
+    ]
@@ -0,0 +1,137 @@
+"""
+Кеш відповідей read-only API.
+
+Відповідь кешується за ключем "URL + параметри запиту + область авторизації"
+(анонім або конкретний користувач) разом з версіями груп даних (scopes),
+від яких вона залежить: "tournaments", "teams", "standings", "matches",
+"players". Запис у відповідну модель лише змінює версію групи (сигнали в
+models.py), тож старі ключі просто перестають використовуватися — без
+перебору ключів, що працює і з locmem, і з файловим бекендом.
+
+Версія групи — час останньої зміни в наносекундах, тому з неї ж
+виходять ETag і Last-Modified, а умовний запит (If-None-Match /
+If-Modified-Since) отримує 304 без звернення до бази.
+"""
+
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+
+from rest_framework import status
+from rest_framework.response import Response
+
+SCOPES = ("tournaments", "teams", "standings", "matches", "players")
+
+
+def _cache():
+    return caches[getattr(settings, "API_CACHE_ALIAS", "default")]
+
+
+def _version_key(scope):
+    return f"api:version:{scope}"
+
+
+def get_versions(scopes):
+    """Поточні версії груп; відсутні (нові або витіснені) ініціалізуються зараз."""
+    cache = _cache()
+    keys = [_version_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    if missing:
+        for key, value in missing.items():
+            # add: якщо інший процес встиг першим, беремо його значення
+            if not cache.add(key, value, timeout=None):
+                missing[key] = cache.get(key, value)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+def invalidate(*scopes):
+    """
+    Позначити групи даних зміненими.
+
+    Версія оновлюється одразу (читання в тій самій транзакції бачать
+    зміни) і ще раз після commit — щоб паралельний запит, який встиг
+    закешувати дані до commit, не залишився актуальним.
+    """
+
+    def bump():
+        now = time.time_ns()
+        _cache().set_many({_version_key(scope): now for scope in scopes}, timeout=None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def _auth_scope(request):
+    user = request.user
+    return f"user:{user.pk}" if user and user.is_authenticated else "anon"
+
+
+def cache_response(*scopes):
+    """
+    Декоратор GET-дії ViewSet'у: кешує response.data успішних відповідей
+    і відповідає 304 на умовні запити.
+
+    Args:
+        *scopes: групи даних з SCOPES, від яких залежить відповідь
+    """
+    unknown = set(scopes) - set(SCOPES)
+    if unknown:
+        raise ValueError(f"Невідомі групи кешу: {sorted(unknown)}")
+
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view_method(self, request, *args, **kwargs)
+
+            versions = get_versions(scopes)
+            params = sorted(request.query_params.lists())
+            fingerprint = f"{request.path}|{params}|{_auth_scope(request)}|{versions}"
+            digest = hashlib.sha1(fingerprint.encode()).hexdigest()
+            etag = f'"{digest}"'
+            last_modified = max(versions) // 1_000_000_000
+
+            if _not_modified(request, etag, last_modified):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                cache = _cache()
+                key = f"api:response:{digest}"
+                data = cache.get(key)
+                if data is not None:
+                    response = Response(data)
+                else:
+                    response = view_method(self, request, *args, **kwargs)
+                    if response.status_code != status.HTTP_200_OK:
+                        return response
+                    # Без ReturnList/ReturnDict: вони тримають посилання на serializer
+                    data = response.data
+                    data = list(data) if isinstance(data, list) else dict(data)
+                    cache.set(key, data, settings.API_CACHE_TIMEOUT)
+
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(last_modified)
+            patch_cache_control(
+                response, no_cache=True, private=request.user.is_authenticated
+            )
+            patch_vary_headers(response, ["Authorization"])
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def _not_modified(request, etag, last_modified):
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match:
+        return etag in [tag.strip() for tag in if_none_match.split(",")]
+    since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+    return since is not None and last_modified <= since
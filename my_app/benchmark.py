@@ -0,0 +1,369 @@
+"""
+Бенчмарк REST API: синтетична ліга, бюджети SQL-запитів і латентність.
+
+seed_league() наповнює базу турнірами, командами, гравцями, матчами і
+статистикою пакетними запитами. ENDPOINTS — усі GET-маршрути роутера
+my_app.urls з максимальною кількістю SQL-запитів на одну відповідь;
+run_benchmark() вимірює кількість запитів і p50/p95 латентності, а
+compare_with_baseline() порівнює результат з JSON-базовою лінією.
+
+Використовується в my_app/test_benchmarks.py і командою seed_league.
+"""
+
+import json
+import random
+import statistics
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .models import (
+    Job,
+    Match,
+    Player,
+    PlayerSearchDocument,
+    PlayerStats,
+    Standing,
+    Team,
+    Tournament,
+    UserProfile,
+)
+
+# Пароль усіх згенерованих користувачів (для навантажувальних тестів)
+SEED_PASSWORD = "benchmark-pass"
+
+
+def seed_league(
+    tournaments=2, teams=8, players=40, matches=16, stats=5, seed=0, prefix="bench"
+):
+    """
+    Згенерувати синтетичну лігу.
+
+    Args:
+        tournaments: кількість турнірів
+        teams: команд у кожному турнірі
+        players: кількість гравців (користувач + профіль + Player)
+        matches: матчів у кожному турнірі
+        stats: рядків статистики на гравця
+        seed: зерно генератора випадкових чисел
+        prefix: префікс імен користувачів, команд і турнірів
+    Returns:
+        dict: id одного об'єкта кожного типу для підстановки в URL
+            (player, user, coach, admin, tournament, team, standing, match,
+            stats, job)
+    """
+    rng = random.Random(seed)
+    password = make_password(SEED_PASSWORD)
+    positions = [code for code, _ in Player.POSITION_CHOICES]
+    today = timezone.now()
+
+    with transaction.atomic():
+        coach = User.objects.create(username=f"{prefix}_coach", password=password)
+        coach.groups.add(Group.objects.get_or_create(name="Coach")[0])
+        admin = User.objects.create(
+            username=f"{prefix}_admin", password=password, is_staff=True
+        )
+
+        users = User.objects.bulk_create(
+            User(
+                username=f"{prefix}_player_{i}",
+                first_name=f"Гравець{i}",
+                last_name=f"Прізвище{i}",
+                email=f"{prefix}_player_{i}@example.com",
+                password=password,
+            )
+            for i in range(players)
+        )
+        # bulk_create не надсилає post_save, тож профілі створюємо тут
+        UserProfile.objects.bulk_create(UserProfile(user=user) for user in users)
+        player_objs = Player.objects.bulk_create(
+            Player(
+                user=user,
+                position=rng.choice(positions),
+                jersey_number=rng.randint(1, 99),
+            )
+            for user in users
+        )
+        # ...і пошукові документи теж
+        PlayerSearchDocument.objects.reindex(player.pk for player in player_objs)
+
+        tournament_objs = Tournament.objects.bulk_create(
+            Tournament(
+                name=f"{prefix} Cup {t}",
+                start_date=(today + timedelta(days=30)).date(),
+                end_date=(today + timedelta(days=60)).date(),
+                format="Groups",
+                max_teams=teams,
+                location="Київ",
+                status="upcoming",
+            )
+            for t in range(tournaments)
+        )
+        team_objs = Team.objects.bulk_create(
+            Team(
+                tournament=tournament,
+                coach=coach,
+                name=f"{prefix} Team {tournament.pk}-{i}",
+                captain=f"Капітан {i}",
+                email=f"team{tournament.pk}_{i}@example.com",
+                phone="+380000000000",
+                player_roster=[f"Гравець {n}" for n in range(11)],
+                status="approved",
+            )
+            for tournament in tournament_objs
+            for i in range(teams)
+        )
+        match_objs = []
+        for tournament in tournament_objs:
+            sides = [team for team in team_objs if team.tournament == tournament]
+            for m in range(matches):
+                home, away = rng.sample(sides, 2) if len(sides) > 1 else (sides * 2)
+                # bulk_create минає Match.save(), тож назви і посилання задаємо разом
+                match_objs.append(
+                    Match(
+                        tournament=tournament,
+                        date=today - timedelta(days=m),
+                        home_team=home.name,
+                        away_team=away.name,
+                        home_team_ref=home,
+                        away_team_ref=away,
+                        home_score=rng.randint(0, 4),
+                        away_score=rng.randint(0, 4),
+                    )
+                )
+        match_objs = Match.objects.bulk_create(match_objs)
+        # bulk_create не надсилає сигналів — таблиці рахуємо одним проходом
+        for tournament in tournament_objs:
+            Standing.objects.rebuild(tournament.pk)
+
+        match_ids = [match.pk for match in match_objs] or [0]
+        PlayerStats.objects.bulk_ingest(
+            [
+                PlayerStats(
+                    player=player,
+                    match_id=rng.choice(match_ids),
+                    goals=rng.choice([0, 0, 0, 1, 2]),
+                    assists=rng.choice([0, 0, 1]),
+                    minutes_played=rng.randint(10, 90),
+                    shots=rng.randint(0, 5),
+                    shots_on_target=rng.randint(0, 3),
+                    key_passes=rng.randint(0, 4),
+                    saves=rng.randint(0, 6) if player.position == "GK" else 0,
+                    tackles=rng.randint(0, 5),
+                    interceptions=rng.randint(0, 4),
+                    yellow_cards=rng.choice([0, 0, 0, 1]),
+                )
+                for player in player_objs
+                for _ in range(stats)
+            ]
+        )
+
+    return {
+        "player": player_objs[0].pk if player_objs else None,
+        "user": users[0].pk if users else None,
+        "coach": coach.pk,
+        "tournament": tournament_objs[0].pk if tournament_objs else None,
+        "team": team_objs[0].pk if team_objs else None,
+        "standing": Standing.objects.values_list("pk", flat=True).first(),
+        "match": match_objs[0].pk if match_objs else None,
+        "stats": PlayerStats.objects.values_list("pk", flat=True).first(),
+        "admin": admin.pk,
+        "job": Job.objects.create(
+            kind="update_ratings", status=Job.SUCCEEDED, created_by=admin
+        ).pk,
+    }
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    """GET-маршрут для бенчмарку: ім'я маршруту DRF, шаблон URL і бюджет запитів."""
+
+    name: str
+    path: str
+    max_queries: int
+    # Ключ у словнику seed_league ("user", "coach", "admin"), від імені якого запит
+    auth: str = None
+
+    def url(self, ids):
+        return self.path.format(**ids)
+
+
+ENDPOINTS = [
+    Endpoint("api-root", "/api/", 0),
+    Endpoint("player-list", "/api/players/", 2),
+    Endpoint("player-detail", "/api/players/{player}/", 3),
+    Endpoint("player-rating-history", "/api/players/{player}/rating_history/", 3),
+    Endpoint("player-leaderboard", "/api/players/leaderboard/", 1),
+    Endpoint("player-search", "/api/players/search/?q=player_1", 4),
+    Endpoint("player-rank", "/api/players/{player}/rank/", 2),
+    Endpoint("playerstats-list", "/api/player-stats/", 1),
+    Endpoint("playerstats-detail", "/api/player-stats/{stats}/", 1),
+    Endpoint("auth-me", "/api/auth/me/", 4, auth="user"),
+    Endpoint("auth-coach-stats", "/api/auth/coach_stats/", 4, auth="coach"),
+    Endpoint("profile-list", "/api/profiles/", 2),
+    Endpoint("profile-detail", "/api/profiles/{user}/", 1),
+    Endpoint("profile-stats", "/api/profiles/{user}/stats/", 4),
+    Endpoint("tournament-list", "/api/tournaments/", 2),
+    Endpoint("tournament-detail", "/api/tournaments/{tournament}/", 4),
+    Endpoint("team-list", "/api/teams/", 2),
+    Endpoint("team-detail", "/api/teams/{team}/", 1),
+    Endpoint("standing-list", "/api/standings/", 2),
+    Endpoint("standing-detail", "/api/standings/{standing}/", 1),
+    Endpoint("match-list", "/api/matches/", 1),
+    Endpoint("match-detail", "/api/matches/{match}/", 1),
+    Endpoint("job-list", "/api/jobs/", 2, auth="admin"),
+    Endpoint("job-detail", "/api/jobs/{job}/", 2, auth="admin"),
+]
+
+
+# Списки з фільтрами: ті самі маршрути, що й у ENDPOINTS, але інша форма
+# запиту, якій потрібен свій індекс
+FILTERED_ENDPOINTS = [
+    Endpoint("playerstats-list:player", "/api/player-stats/?player_id={player}", 1),
+    Endpoint("playerstats-list:match", "/api/player-stats/?match_id={match}", 1),
+    Endpoint("match-list:tournament", "/api/matches/?tournament={tournament}", 1),
+    Endpoint("match-list:team", "/api/matches/?team={team}", 1),
+    Endpoint("standing-list:tournament", "/api/standings/?tournament={tournament}", 2),
+    Endpoint(
+        "team-list:tournament", "/api/teams/?tournament={tournament}&status=approved", 2
+    ),
+]
+
+
+def sample_ids():
+    """
+    id з наявної бази для підстановки в URL endpoint'ів (ключі як у
+    seed_league); None там, де об'єктів такого типу немає.
+    """
+    player = Player.objects.order_by("pk").first()
+    coach = User.objects.filter(groups__name="Coach").order_by("pk").first()
+    admin = User.objects.filter(is_staff=True).order_by("pk").first()
+    return {
+        "player": player.pk if player else None,
+        "user": player.user_id if player else None,
+        "coach": coach.pk if coach else None,
+        "tournament": Tournament.objects.values_list("pk", flat=True).first(),
+        "team": Team.objects.values_list("pk", flat=True).first(),
+        "standing": Standing.objects.values_list("pk", flat=True).first(),
+        "match": Match.objects.values_list("pk", flat=True).first(),
+        "stats": PlayerStats.objects.values_list("pk", flat=True).first(),
+        "admin": admin.pk if admin else None,
+        "job": Job.objects.values_list("pk", flat=True).first(),
+    }
+
+
+def get_route_names():
+    """Імена всіх маршрутів роутера my_app.urls, що відповідають на GET."""
+    from .urls import router
+
+    names = set()
+    for pattern in router.urls:
+        actions = getattr(pattern.callback, "actions", None)
+        if pattern.name and (actions is None or "get" in actions):
+            names.add(pattern.name)
+    return names
+
+
+def _client(ids, auth):
+    client = APIClient()
+    if auth:
+        user = User.objects.get(pk=ids[auth])
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+    return client
+
+
+def measure(endpoint, ids, repeat=20):
+    """
+    Виконати GET endpoint'у і ще repeat разів для перцентилів латентності.
+
+    Returns:
+        dict: {"queries": запитів на першу відповідь, "p50_ms", "p95_ms"}
+            (p50_ms / p95_ms лише при repeat >= 2)
+    """
+    client = _client(ids, endpoint.auth)
+    url = endpoint.url(ids)
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    # Рахуємо одразу: request_started наступного запиту очищує connection.queries
+    queries = len(ctx.captured_queries)
+    if response.status_code != 200:
+        raise AssertionError(f"{endpoint.name}: {url} -> {response.status_code}")
+
+    result = {"queries": queries}
+    if repeat < 2:
+        return result
+
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        client.get(url)
+        samples.append((time.perf_counter() - started) * 1000)
+    quantiles = statistics.quantiles(samples, n=20, method="inclusive")
+    result["p50_ms"] = round(quantiles[9], 3)
+    result["p95_ms"] = round(quantiles[18], 3)
+    return result
+
+
+def run_benchmark(ids, repeat=20, endpoints=ENDPOINTS):
+    """Виміряти всі endpoints. Returns: {ім'я маршруту: результат measure()}"""
+    return {endpoint.name: measure(endpoint, ids, repeat) for endpoint in endpoints}
+
+
+def compare_with_baseline(results, baseline, threshold=0.5, slack_ms=5.0):
+    """
+    Знайти регресії відносно базової лінії.
+
+    Регресія — більше SQL-запитів, ніж у базовій лінії, або p50/p95 гірше
+    за базове значення більш ніж на threshold (частка) плюс slack_ms
+    (абсолютний допуск на шум для дуже швидких endpoint'ів).
+
+    Returns:
+        list[str]: опис кожної регресії (порожній, якщо регресій немає)
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result["queries"] > base["queries"]:
+            regressions.append(
+                f"{name}: запитів {base['queries']} -> {result['queries']}"
+            )
+        for metric in ("p50_ms", "p95_ms"):
+            limit = base[metric] * (1 + threshold) + slack_ms
+            if result[metric] > limit:
+                regressions.append(
+                    f"{name}: {metric} {base[metric]} -> {result[metric]} "
+                    f"(межа {limit:.3f})"
+                )
+    return regressions
+
+
+def load_baseline(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)["endpoints"]
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(path, results, league):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(
+            {"league": league, "endpoints": results},
+            f,
+            ensure_ascii=False,
+            indent=2,
+            sort_keys=True,
+        )
+        f.write("\n")
@@ -0,0 +1,155 @@
+"""
+Фонові завдання: черга в базі (модель Job) без Redis і Celery.
+
+Endpoint ставить завдання в чергу (enqueue) і одразу відповідає його id;
+команда run_worker забирає завдання з черги і виконує їх у пулі процесів,
+тож важка робота не займає web-воркери. Стан, прогрес і результат —
+GET /api/jobs/<id>/.
+
+Завдання — функція fn(job, **params), зареєстрована в TASKS декоратором
+@task. Вона звітує про прогрес через job.report(...) і повертає
+JSON-сумісний результат; виняток позначає завдання невдалим.
+
+Моделі імпортуються всередині функцій: процеси пулу (spawn) імпортують
+модуль до django.setup().
+"""
+
+import inspect
+import io
+import traceback
+from collections import deque
+
+from django.core.management import call_command
+
+TASKS = {}
+
+# Скільки останніх рядків виводу команди зберігати в результаті
+OUTPUT_LINES = 50
+
+
+def task(kind):
+    """Зареєструвати функцію як фонове завдання типу kind."""
+
+    def register(func):
+        TASKS[kind] = func
+        return func
+
+    return register
+
+
+def check_params(kind, params):
+    """
+    Перевірити тип завдання і параметри до постановки в чергу.
+
+    Raises:
+        ValueError: невідомий тип або параметри, яких функція не приймає
+    """
+    if kind not in TASKS:
+        raise ValueError(f"Невідомий тип завдання: {kind}")
+    if not isinstance(params, dict):
+        raise ValueError("Параметри завдання мають бути об'єктом")
+    try:
+        inspect.signature(TASKS[kind]).bind(None, **params)
+    except TypeError as error:
+        raise ValueError(f"Некоректні параметри завдання {kind}: {error}")
+
+
+def enqueue(kind, params=None, user=None):
+    """Поставити завдання в чергу. Returns: Job"""
+    from .models import Job
+
+    params = params or {}
+    check_params(kind, params)
+    return Job.objects.create(kind=kind, params=params, created_by=user)
+
+
+def run_job(job_id):
+    """
+    Виконати взяте з черги завдання і записати результат або помилку.
+
+    Returns:
+        str: підсумковий статус завдання
+    """
+    from django.utils import timezone
+
+    from .models import Job
+
+    job = Job.objects.get(pk=job_id)
+    try:
+        result = TASKS[job.kind](job, **job.params)
+    except Exception:
+        status = Job.FAILED
+        fields = {"error": traceback.format_exc(), "progress": job.progress}
+    else:
+        status, fields = Job.SUCCEEDED, {"result": result, "progress": 100}
+    # Останній прогрес міг не потрапити в базу через обмеження частоти
+    now = timezone.now()
+    Job.objects.filter(pk=job_id).update(
+        status=status, message=job.message, finished_at=now, updated_at=now, **fields
+    )
+    return status
+
+
+def init_worker():
+    """Ініціалізація процесу пулу run_worker."""
+    import django
+
+    django.setup()
+
+
+class JobOutput(io.TextIOBase):
+    """stdout команди: останній рядок — повідомлення завдання, хвіст — результат."""
+
+    def __init__(self, job):
+        self.job = job
+        self.lines = deque(maxlen=OUTPUT_LINES)
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        lines = [line for line in text.splitlines() if line.strip()]
+        if lines:
+            self.lines.extend(lines)
+            self.job.report(message=lines[-1].strip())
+        return len(text)
+
+
+def _call(job, name, *args, **options):
+    """Виконати management-команду, передаючи її вивід у прогрес завдання."""
+    output = JobOutput(job)
+    call_command(name, *args, stdout=output, stderr=output, **options)
+    return {"output": list(output.lines)}
+
+
+@task("upl_sync")
+def upl_sync(job, teams=None):
+    """Оновити склади команд УПЛ з API-Football (зі статистикою запитів)."""
+    from .upl_service import RequestStats, sync_squads
+
+    stats = RequestStats()
+    synced = sync_squads(teams, progress=job.report, stats=stats)
+    return {"synced": synced, "requests": stats.summary()}
+
+
+@task("update_ratings")
+def update_ratings(job, chunk_size=1000):
+    """Перерахувати загальні рейтинги всіх гравців."""
+    return _call(job, "update_ratings", chunk_size=chunk_size)
+
+
+@task("rescore_stats")
+def rescore_stats(job, chunk_size=5000):
+    """Перерахувати рейтинги всіх матчів і загальні рейтинги гравців."""
+    return _call(job, "rescore_stats", chunk_size=chunk_size)
+
+
+@task("loaddata")
+def loaddata(job, fixtures):
+    """Завантажити фікстури з каталогів fixtures застосунків (лише за назвою)."""
+    if isinstance(fixtures, str):
+        fixtures = [fixtures]
+    for name in fixtures:
+        if not isinstance(name, str) or "/" in name or "\\" in name:
+            raise ValueError(f"Фікстура задається лише назвою: {name!r}")
+    return _call(job, "loaddata", *fixtures)
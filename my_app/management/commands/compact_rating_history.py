@@ -0,0 +1,62 @@
+"""
+Management command для згортання старої історії рейтингу (політика зберігання)
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from my_app.models import (
+    RATING_HISTORY_DAILY_DAYS,
+    RATING_HISTORY_RAW_DAYS,
+    PlayerRatingHistory,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        f"Згорнути історію рейтингу: старішу за {RATING_HISTORY_RAW_DAYS} днів — "
+        f"по днях, старішу за {RATING_HISTORY_DAILY_DAYS} днів — по тижнях"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="Скільки гравців згортати в одній транзакції",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        batch_size = max(1, options["batch_size"])
+        # Один момент для всіх пакетів: межі днів не зсуваються посеред запуску
+        now = timezone.now()
+        player_ids = list(
+            PlayerRatingHistory.objects.needs_compaction(now)
+            .order_by("player_id")
+            .values_list("player_id", flat=True)
+            .distinct()
+        )
+
+        removed = created = 0
+        for start in range(0, len(player_ids), batch_size):
+            batch = player_ids[start : start + batch_size]
+            batch_removed, batch_created = PlayerRatingHistory.objects.filter(
+                player_id__in=batch
+            ).compact(now)
+            removed += batch_removed
+            created += batch_created
+            self.stdout.write(
+                f"  Гравці {start + 1}-{start + len(batch)} з {len(player_ids)}: "
+                f"{batch_removed} записів -> {batch_created}"
+            )
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nГотово за {elapsed:.2f} с! Згорнуто {removed} записів історії "
+                f"в {created} ({len(player_ids)} гравців)"
+            )
+        )
@@ -4,7 +4,6 @@ from django.contrib.auth.models import User
 from django.core.management.base import BaseCommand
 
 from my_app.models import Player, PlayerStats
-from my_app.services import PlayerRatingService
 
 
 class Command(BaseCommand):
@@ -60,6 +59,8 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS(f"Створення {count} тестових гравців..."))
 
         created_count = 0
+        created_players = []
+        stat_rows = []
 
         for i in range(count):
             # Генерація імені
@@ -105,23 +106,31 @@ class Command(BaseCommand):
                     goals = random.randint(0, 3)
                     assists = random.randint(0, 2)
 
-                PlayerStats.objects.create(
-                    player=player,
-                    match_id=random.randint(1, 100),
-                    goals=goals,
-                    assists=assists,
-                    yellow_cards=random.randint(0, 1),
-                    red_cards=0 if random.random() > 0.1 else 1,
-                    minutes_played=random.choice([90, 80, 70, 60]),
+                stat_rows.append(
+                    PlayerStats(
+                        player=player,
+                        match_id=random.randint(1, 100),
+                        goals=goals,
+                        assists=assists,
+                        yellow_cards=random.randint(0, 1),
+                        red_cards=0 if random.random() > 0.1 else 1,
+                        minutes_played=random.choice([90, 80, 70, 60]),
+                    )
                 )
 
-            # Розрахунок рейтингу
-            rating = PlayerRatingService.calculate_rating(player)
-
             created_count += 1
+            created_players.append(player.pk)
+
+        # Одна вставка статистики і один перерахунок рейтингів для всіх гравців
+        PlayerStats.objects.bulk_ingest(stat_rows)
+
+        for player in Player.objects.filter(pk__in=created_players).select_related(
+            "user"
+        ):
             self.stdout.write(
                 self.style.SUCCESS(
-                    f"✓ Створено гравця: {first_name} {last_name} ({position}) - Рейтинг: {rating}"
+                    f"✓ Створено гравця: {player.user.first_name} {player.user.last_name} "
+                    f"({player.position}) - Рейтинг: {player.overall_rating}"
                 )
             )
 
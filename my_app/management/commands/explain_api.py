@@ -0,0 +1,105 @@
+"""
+Management command для аудиту планів SQL-запитів API (EXPLAIN)
+"""
+
+from string import Formatter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+
+from my_app.benchmark import ENDPOINTS, FILTERED_ENDPOINTS, sample_ids, seed_league
+from my_app.query_plans import explain_endpoint
+
+# Скільки символів SQL показувати в звіті
+SQL_PREVIEW = 200
+
+
+class Command(BaseCommand):
+    help = (
+        "Виконати GET-запити API, показати плани їхніх SQL-запитів і знайти "
+        "повні перегляди таблиць"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--endpoint",
+            action="append",
+            help="Ім'я endpoint'у з my_app.benchmark (можна кілька разів); "
+            "за замовчуванням — усі",
+        )
+        parser.add_argument(
+            "--seed",
+            action="store_true",
+            help="Згенерувати синтетичну лігу на час аудиту (зміни відкочуються)",
+        )
+        parser.add_argument(
+            "--fail-on-scan",
+            action="store_true",
+            help="Завершитися з помилкою, якщо знайдено повні перегляди "
+            "(крім COUNT по всій таблиці)",
+        )
+
+    def handle(self, *args, **options):
+        endpoints = ENDPOINTS + FILTERED_ENDPOINTS
+        if options["endpoint"]:
+            unknown = set(options["endpoint"]) - {e.name for e in endpoints}
+            if unknown:
+                raise CommandError(f"Невідомі endpoint'и: {sorted(unknown)}")
+            endpoints = [e for e in endpoints if e.name in options["endpoint"]]
+
+        # Кеш відповідей API обійшов би view, і запитів не було б взагалі
+        no_cache = override_settings(
+            CACHES={
+                **settings.CACHES,
+                "explain": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+            },
+            API_CACHE_ALIAS="explain",
+        )
+        with no_cache, transaction.atomic():
+            ids = seed_league(prefix="explain") if options["seed"] else sample_ids()
+            scans, counts = self.audit(endpoints, ids, options["verbosity"])
+            transaction.set_rollback(True)
+
+        summary = (
+            f"\nПеревірено {len(endpoints)} endpoint'ів: запитів з повним "
+            f"переглядом — {scans}, COUNT по всій таблиці — {counts}"
+        )
+        if scans and options["fail_on_scan"]:
+            raise CommandError(summary.strip())
+        style = self.style.WARNING if scans else self.style.SUCCESS
+        self.stdout.write(style(summary))
+
+    def audit(self, endpoints, ids, verbosity):
+        scans = counts = 0
+        for endpoint in endpoints:
+            needed = {name for _, name, _, _ in Formatter().parse(endpoint.path)}
+            needed |= {endpoint.auth}
+            if any(ids.get(name) is None for name in needed - {None}):
+                self.stdout.write(f"  {endpoint.name}: пропущено — немає даних")
+                continue
+            try:
+                plans = explain_endpoint(endpoint, ids)
+            except AssertionError as error:
+                self.stdout.write(self.style.ERROR(f"  {error}"))
+                continue
+
+            self.stdout.write(
+                f"  {endpoint.name} ({endpoint.url(ids)}): {len(plans)} SELECT"
+            )
+            for plan in plans:
+                if plan.scans and plan.full_count:
+                    counts += 1
+                    label = "COUNT по всій таблиці"
+                elif plan.scans:
+                    scans += 1
+                    label = self.style.WARNING("ПОВНИЙ ПЕРЕГЛЯД")
+                elif verbosity < 2:
+                    continue
+                else:
+                    label = "план"
+                self.stdout.write(f"    {label}: {plan.sql[:SQL_PREVIEW]}")
+                for line in plan.lines if verbosity >= 2 else plan.scans:
+                    self.stdout.write(f"        {line}")
+        return scans, counts
@@ -0,0 +1,23 @@
+"""
+Management command для повної перебудови матеріалізованої таблиці лідерів
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from my_app.models import LeaderboardEntry
+
+
+class Command(BaseCommand):
+    help = "Перерахувати місця всіх гравців у таблиці лідерів"
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        entries = LeaderboardEntry.objects.rebuild()
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Готово! Таблиця лідерів: {len(entries)} гравців за {elapsed:.2f} с"
+            )
+        )
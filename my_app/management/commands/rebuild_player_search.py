@@ -0,0 +1,31 @@
+"""
+Management command для повної перебудови пошукового індексу гравців
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from my_app.models import PlayerSearchDocument
+
+
+class Command(BaseCommand):
+    help = "Перебудувати пошукові документи (і FTS-індекс) усіх гравців"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Скільки гравців записувати одним upsert'ом",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        count = PlayerSearchDocument.objects.rebuild(max(1, options["chunk_size"]))
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Готово! Пошуковий індекс: {count} гравців за {elapsed:.2f} с"
+            )
+        )
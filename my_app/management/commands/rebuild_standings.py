@@ -0,0 +1,30 @@
+"""
+Management command для повного перерахунку турнірних таблиць з результатів матчів
+"""
+
+from django.core.management.base import BaseCommand
+
+from my_app.models import Standing, Tournament
+
+
+class Command(BaseCommand):
+    help = "Перерахувати турнірні таблиці і місця з результатів матчів"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tournament",
+            type=int,
+            action="append",
+            help="id турніру (можна кілька разів); за замовчуванням — усі",
+        )
+
+    def handle(self, *args, **options):
+        tournament_ids = options["tournament"] or list(
+            Tournament.objects.order_by("id").values_list("id", flat=True)
+        )
+        for tournament_id in tournament_ids:
+            rows = Standing.objects.rebuild(tournament_id)
+            self.stdout.write(f"  Турнір #{tournament_id}: {len(rows)} команд")
+        self.stdout.write(
+            self.style.SUCCESS(f"\nГотово! Перераховано {len(tournament_ids)} таблиць")
+        )
@@ -0,0 +1,59 @@
+"""
+Management command для звірки інкрементальних агрегатів гравців
+(overall_rating, matches_played, stat_totals, recent_ratings) з таблицею статистики
+"""
+
+from django.core.management.base import BaseCommand
+
+from my_app.models import Player
+
+
+class Command(BaseCommand):
+    help = "Звірити агрегати гравців зі статистикою матчів і (з --fix) виправити розбіжності"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix", action="store_true", help="Записати перераховані значення"
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Скільки гравців перевіряти за один запит",
+        )
+
+    def handle(self, *args, **options):
+        fix = options["fix"]
+        chunk_size = options["chunk_size"]
+        player_ids = list(Player.objects.order_by("id").values_list("id", flat=True))
+        drifted = 0
+
+        self.stdout.write("Звірка агрегатів гравців...")
+
+        for start in range(0, len(player_ids), chunk_size):
+            chunk = player_ids[start : start + chunk_size]
+            before = {
+                player.pk: (player.overall_rating, player.matches_played)
+                for player in Player.objects.filter(id__in=chunk)
+            }
+            changed = Player.objects.filter(id__in=chunk).refresh_ratings(commit=fix)
+            for player in changed:
+                old_rating, old_matches = before[player.pk]
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"  Гравець #{player.pk}: рейтинг {old_rating} → "
+                        f"{player.overall_rating}, матчів {old_matches} → "
+                        f"{player.matches_played}"
+                    )
+                )
+            drifted += len(changed)
+
+        if not drifted:
+            message = "Розбіжностей не знайдено"
+        elif fix:
+            message = f"Виправлено агрегати {drifted} гравців"
+        else:
+            message = f"Знайдено розбіжності у {drifted} гравців (запустіть з --fix)"
+        self.stdout.write(
+            self.style.SUCCESS(f"\nГотово! {message} з {len(player_ids)}")
+        )
@@ -0,0 +1,84 @@
+"""
+Management command для повного перерахунку рейтингів матчів (PlayerStats.rating)
+векторизованим ядром my_app.rating_kernel.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from my_app.models import Player, PlayerStats
+from my_app.rating_kernel import (
+    COLUMNS,
+    match_ratings,
+    position_code,
+    tenths_to_decimal,
+)
+
+
+class Command(BaseCommand):
+    help = "Перерахувати рейтинги всіх матчів і загальні рейтинги гравців"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Скільки рядків статистики обробляти за один прохід",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        started = time.monotonic()
+        fields = ("id", "player_id", "player__position", "rating") + COLUMNS
+
+        self.stdout.write("Перерахунок рейтингів матчів...")
+
+        scanned = 0
+        changed_players = set()
+        changed_rows = 0
+        last_id = 0
+        while True:
+            rows = list(
+                PlayerStats.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list(*fields)[:chunk_size]
+            )
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            scanned += len(rows)
+
+            columns = list(zip(*rows))
+            ratings = match_ratings(
+                [position_code(position) for position in columns[2]],
+                **{name: columns[4 + i] for i, name in enumerate(COLUMNS)},
+            )
+
+            updates = []
+            for (stat_id, player_id, _, old_rating, *_), tenths in zip(rows, ratings):
+                rating = tenths_to_decimal(tenths)
+                if old_rating != rating:
+                    updates.append(PlayerStats(id=stat_id, rating=rating))
+                    changed_players.add(player_id)
+            if updates:
+                with transaction.atomic():
+                    PlayerStats.objects.bulk_update(updates, ["rating"])
+                changed_rows += len(updates)
+
+        # Пакетами по chunk_size: один IN-список на всіх змінених гравців
+        # перевищив би ліміт параметрів запиту на великій лізі
+        changed_players = sorted(changed_players)
+        refreshed = []
+        for start in range(0, len(changed_players), chunk_size):
+            batch = changed_players[start : start + chunk_size]
+            refreshed += Player.objects.filter(id__in=batch).refresh_ratings()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Готово! Перевірено {scanned} матчів, змінено {changed_rows}, "
+                f"оновлено рейтинги {len(refreshed)} гравців за {elapsed:.2f} с"
+            )
+        )
@@ -0,0 +1,165 @@
+"""
+Management command, що виконує фонові завдання з черги (модель Job)
+"""
+
+import multiprocessing
+import os
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from my_app.jobs import init_worker, run_job
+from my_app.models import Job
+
+# Як часто (секунд) оновлювати heartbeat завдань, що виконуються
+HEARTBEAT_INTERVAL = 30
+
+
+class Command(BaseCommand):
+    help = "Виконувати фонові завдання з черги в пулі процесів"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=2,
+            help="Скільки завдань виконувати паралельно (окремі процеси); "
+            "0 — по одному в процесі команди (напр. для SQLite)",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Пауза між перевірками порожньої черги, секунд",
+        )
+        parser.add_argument(
+            "--stale-after",
+            type=int,
+            default=300,
+            help="Через скільки секунд без звітів завдання іншого воркера "
+            "вважається покинутим",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Виконати все, що є в черзі, і завершитися",
+        )
+
+    def handle(self, *args, **options):
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+        self.processes = max(0, options["processes"])
+        poll_interval = max(0.05, options["poll_interval"])
+
+        stale = Job.objects.fail_stale(timedelta(seconds=options["stale_after"]))
+        if stale:
+            self.stdout.write(self.style.WARNING(f"Покинутих завдань: {stale}"))
+        self.stdout.write(
+            f"Воркер {self.worker}: процесів {self.processes or 'немає (inline)'}"
+            + (" (burst)" if options["burst"] else "")
+        )
+
+        self.pool = self._pool()
+        self.running = {}
+        done = 0
+        last_heartbeat = time.monotonic()
+        try:
+            while True:
+                done += self._collect()
+                claimed = self._claim()
+                done += claimed if not self.pool else 0
+
+                if time.monotonic() - last_heartbeat >= HEARTBEAT_INTERVAL:
+                    Job.objects.filter(
+                        pk__in=[job.pk for job in self.running.values()]
+                    ).heartbeat()
+                    last_heartbeat = time.monotonic()
+
+                if not claimed and not self.running and options["burst"]:
+                    break
+                if not claimed:
+                    if self.running:
+                        wait(self.running, poll_interval, FIRST_COMPLETED)
+                    else:
+                        time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            self.stdout.write("Зупинка: чекаю завершення завдань, що виконуються...")
+            if self.running:
+                wait(self.running)
+                done += self._collect()
+        finally:
+            if self.pool:
+                self.pool.shutdown(wait=True)
+
+        self.stdout.write(self.style.SUCCESS(f"\nГотово! Виконано завдань: {done}"))
+
+    def _pool(self):
+        if not self.processes:
+            return None
+        # spawn: дочірні процеси не успадковують з'єднань з базою батька
+        return ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+        )
+
+    def _claim(self):
+        """Взяти з черги стільки завдань, скільки є вільних процесів."""
+        claimed = 0
+        while len(self.running) < max(1, self.processes):
+            job = Job.objects.claim(self.worker)
+            if job is None:
+                break
+            claimed += 1
+            self.stdout.write(f"  {job}: старт")
+            if self.pool:
+                self.running[self.pool.submit(run_job, job.pk)] = job
+            else:
+                self._finished(job, run_job(job.pk))
+        return claimed
+
+    def _collect(self):
+        """Прибрати завершені завдання пулу; повертає їх кількість."""
+        finished = [future for future in self.running if future.done()]
+        broken, lost = None, []
+        for future in finished:
+            job = self.running.pop(future)
+            try:
+                status = future.result()
+            except BrokenProcessPool as error:
+                broken = error
+                lost.append(job)
+                continue
+            except Exception as error:
+                status = self._fail(job, repr(error))
+            self._finished(job, status)
+        count = len(finished)
+
+        if broken:
+            # Процес пулу загинув (OOM, kill): пул завершує помилкою всі свої
+            # завдання, і самі вони вже не запишуть статус — пишемо за них
+            wait(self.running)
+            count += len(self.running)
+            lost.extend(self.running.values())
+            self.running.clear()
+            for job in lost:
+                error = f"Процес воркера завершився аварійно: {broken}"
+                self._finished(job, self._fail(job, error))
+            self.pool.shutdown(wait=False)
+            self.pool = self._pool()
+        return count
+
+    def _fail(self, job, error):
+        now = timezone.now()
+        Job.objects.filter(pk=job.pk, status=Job.RUNNING).update(
+            status=Job.FAILED, error=error, finished_at=now, updated_at=now
+        )
+        return Job.FAILED
+
+    def _finished(self, job, status):
+        style = self.style.SUCCESS if status == Job.SUCCEEDED else self.style.ERROR
+        self.stdout.write(style(f"  #{job.pk} {job.kind}: {status}"))
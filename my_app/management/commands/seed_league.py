@@ -0,0 +1,53 @@
+"""
+Management command для генерації синтетичної ліги (бенчмарки, навантажувальні тести)
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from my_app.benchmark import SEED_PASSWORD, seed_league
+
+
+class Command(BaseCommand):
+    help = "Згенерувати синтетичну лігу: турніри, команди, гравці, матчі, статистика"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tournaments", type=int, default=2)
+        parser.add_argument(
+            "--teams", type=int, default=8, help="Команд у кожному турнірі"
+        )
+        parser.add_argument("--players", type=int, default=40)
+        parser.add_argument(
+            "--matches", type=int, default=16, help="Матчів у кожному турнірі"
+        )
+        parser.add_argument(
+            "--stats", type=int, default=5, help="Рядків статистики на гравця"
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--prefix",
+            default="bench",
+            help="Префікс імен (має бути унікальним для кожного запуску)",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        ids = seed_league(
+            tournaments=options["tournaments"],
+            teams=options["teams"],
+            players=options["players"],
+            matches=options["matches"],
+            stats=options["stats"],
+            seed=options["seed"],
+            prefix=options["prefix"],
+        )
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Готово за {elapsed:.2f} с! Користувачі {options['prefix']}_player_N, "
+                f"{options['prefix']}_coach і {options['prefix']}_admin, "
+                f"пароль: {SEED_PASSWORD}. "
+                f"Приклади id: {ids}"
+            )
+        )
@@ -2,36 +2,115 @@
 Management command для оновлення рейтингів всіх гравців
 """
 
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 from django.core.management.base import BaseCommand
+from django.db import connections
+
+from my_app.models import LeaderboardEntry, Player
+
 
-from my_app.models import Player
+def _rebuild_chunk(player_ids, threaded):
+    """
+    Порахувати агрегати для одного пакета гравців.
+
+    Два запити на пакет: гравці разом з user і один віконний агрегат статистики.
+    """
+    try:
+        players = Player.objects.filter(id__in=player_ids).select_related("user")
+        before = {player.pk: player.overall_rating for player in players}
+        changed, history = players.rebuild_aggregates()
+        return [(player, before[player.pk]) for player in changed], history
+    finally:
+        # Кожен потік відкриває власне з'єднання — закриваємо його після роботи
+        if threaded:
+            connections.close_all()
 
 
 class Command(BaseCommand):
     help = "Оновити рейтинги всіх гравців на основі їх статистики"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Кількість потоків, що паралельно рахують пакети гравців",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Скільки гравців обробляти одним агрегатним запитом",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Лише показати зміни рейтингів, нічого не записуючи",
+        )
+
     def handle(self, *args, **options):
-        players = Player.objects.all()
-        updated_count = 0
+        workers = max(1, options["workers"])
+        chunk_size = max(1, options["chunk_size"])
+        dry_run = options["dry_run"]
+        self.verbosity = options["verbosity"]
+        started = time.monotonic()
 
-        self.stdout.write("Оновлення рейтингів гравців...")
+        player_ids = list(Player.objects.order_by("id").values_list("id", flat=True))
+        chunks = [
+            player_ids[start : start + chunk_size]
+            for start in range(0, len(player_ids), chunk_size)
+        ]
 
-        for player in players:
-            old_rating = player.overall_rating
-            new_rating = player.update_rating()
+        self.stdout.write(
+            f"Оновлення рейтингів {len(player_ids)} гравців: "
+            f"{len(chunks)} пакетів, потоків: {workers}"
+            + (" (dry-run)" if dry_run else "")
+        )
 
-            if old_rating != new_rating:
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f"✓ {player.user.username}: {old_rating} → {new_rating}"
-                    )
-                )
-                updated_count += 1
-            else:
-                self.stdout.write(f"  {player.user.username}: {old_rating} (без змін)")
+        updated_count = 0
+        if workers == 1:
+            results = (_rebuild_chunk(chunk, threaded=False) for chunk in chunks)
+            updated_count = self._consume(results, len(chunks), dry_run)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(_rebuild_chunk, chunk, True) for chunk in chunks
+                ]
+                results = (future.result() for future in as_completed(futures))
+                updated_count = self._consume(results, len(chunks), dry_run)
+
+        if not dry_run and updated_count:
+            # Одна перебудова таблиці лідерів замість синхронізації після кожного пакета
+            LeaderboardEntry.objects.rebuild()
 
+        elapsed = time.monotonic() - started
+        throughput = len(player_ids) / elapsed if elapsed else len(player_ids)
+        verb = "Буде оновлено" if dry_run else "Оновлено"
         self.stdout.write(
             self.style.SUCCESS(
-                f"\nГотово! Оновлено рейтинги {updated_count} гравців з {players.count()}"
+                f"\nГотово! {verb} рейтинги {updated_count} гравців з "
+                f"{len(player_ids)} за {elapsed:.2f} с ({throughput:.0f} гравців/с)"
             )
         )
+
+    def _consume(self, results, total_chunks, dry_run):
+        """Записати (або показати в dry-run) результати пакетів у головному потоці."""
+        updated_count = 0
+        for done, (changed, history) in enumerate(results, start=1):
+            for player, old_rating in changed:
+                if dry_run and old_rating != player.overall_rating:
+                    self.stdout.write(
+                        f"  {player.user.username}: {old_rating} → "
+                        f"{player.overall_rating}"
+                    )
+            if not dry_run:
+                # Запис лише з головного потоку: SQLite не любить паралельних writer'ів
+                Player.objects.save_aggregates(
+                    [player for player, _ in changed], history, sync_leaderboard=False
+                )
+            updated_count += len(changed)
+            if self.verbosity >= 2 or done == total_chunks:
+                self.stdout.write(f"  [{done}/{total_chunks}] пакетів оброблено")
+        return updated_count
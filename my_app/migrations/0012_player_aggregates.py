@@ -0,0 +1,66 @@
+# Generated by Django 4.2.28 on 2026-10-18 15:17
+
+from django.db import migrations, models
+import my_app.models
+
+RATING_WINDOW = 10
+TOTAL_FIELDS = (
+    "goals",
+    "assists",
+    "shots",
+    "shots_on_target",
+    "key_passes",
+    "saves",
+    "tackles",
+    "interceptions",
+    "yellow_cards",
+    "red_cards",
+)
+
+
+def backfill_aggregates(apps, schema_editor):
+    """Заповнити stat_totals / recent_ratings для вже існуючих гравців."""
+    Player = apps.get_model("my_app", "Player")
+    PlayerStats = apps.get_model("my_app", "PlayerStats")
+
+    for player in Player.objects.all().iterator():
+        stats = PlayerStats.objects.filter(player_id=player.pk).order_by(
+            "-created_at", "-id"
+        )
+        totals = dict.fromkeys(TOTAL_FIELDS, 0)
+        window = []
+        for stat in stats.iterator():
+            for name in TOTAL_FIELDS:
+                totals[name] += getattr(stat, name)
+            if stat.rating is not None and len(window) < RATING_WINDOW:
+                window.append([stat.pk, str(stat.rating)])
+        player.stat_totals = totals
+        player.recent_ratings = window
+        player.save(update_fields=["stat_totals", "recent_ratings"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("my_app", "0011_team_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="player",
+            name="recent_ratings",
+            field=models.JSONField(
+                default=list,
+                help_text="Останні рейтинги матчів [[stat_id, рейтинг], ...], новіші першими",
+            ),
+        ),
+        migrations.AddField(
+            model_name="player",
+            name="stat_totals",
+            field=models.JSONField(
+                default=my_app.models.empty_stat_totals,
+                help_text="Суми статистики за кар'єру",
+            ),
+        ),
+        migrations.RunPython(backfill_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 4.2.28 on 2026-10-18 15:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_leaderboard(apps, schema_editor):
+    """Заповнити таблицю лідерів для вже існуючих гравців (rank як у RANK())."""
+    Player = apps.get_model("my_app", "Player")
+    LeaderboardEntry = apps.get_model("my_app", "LeaderboardEntry")
+
+    players = sorted(
+        Player.objects.values_list("pk", "position", "overall_rating"),
+        key=lambda row: -row[2],
+    )
+    entries = []
+    higher = {}  # скільки гравців з вищим рейтингом: загалом і по амплуа
+    seen = {}
+    previous = None
+    for index, (pk, position, rating) in enumerate(players):
+        if rating != previous:
+            higher = {None: index, **seen}
+            previous = rating
+        entries.append(
+            LeaderboardEntry(
+                player_id=pk,
+                position=position,
+                overall_rating=rating,
+                rank=higher[None] + 1,
+                position_rank=higher.get(position, 0) + 1,
+            )
+        )
+        seen[position] = seen.get(position, 0) + 1
+    LeaderboardEntry.objects.bulk_create(entries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("my_app", "0012_player_aggregates"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LeaderboardEntry",
+            fields=[
+                (
+                    "player",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="leaderboard_entry",
+                        serialize=False,
+                        to="my_app.player",
+                    ),
+                ),
+                (
+                    "position",
+                    models.CharField(
+                        choices=[
+                            ("GK", "Воротар"),
+                            ("DEF", "Захисник"),
+                            ("MID", "Півзахисник"),
+                            ("FWD", "Нападник"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "overall_rating",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=4),
+                ),
+                ("rank", models.PositiveIntegerField(default=1, verbose_name="Місце")),
+                (
+                    "position_rank",
+                    models.PositiveIntegerField(
+                        default=1, verbose_name="Місце в амплуа"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Рядок таблиці лідерів",
+                "verbose_name_plural": "Таблиця лідерів",
+                "ordering": ["rank", "player_id"],
+                "indexes": [
+                    models.Index(
+                        fields=["position", "-overall_rating"],
+                        name="leaderboard_pos_rating",
+                    ),
+                    models.Index(fields=["rank", "player"], name="leaderboard_rank"),
+                    models.Index(
+                        fields=["position", "position_rank", "player"],
+                        name="leaderboard_pos_rank",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_leaderboard, migrations.RunPython.noop),
+    ]
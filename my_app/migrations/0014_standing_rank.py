@@ -0,0 +1,55 @@
+# Generated by Django 4.2.28 on 2026-10-18 15:37
+
+from django.db import migrations, models
+
+
+def backfill_ranks(apps, schema_editor):
+    """Проставити місця в існуючих таблицях (очки, різниця м'ячів, забиті)."""
+    Standing = apps.get_model("my_app", "Standing")
+
+    by_tournament = {}
+    for row in Standing.objects.select_related("team"):
+        by_tournament.setdefault(row.tournament_id, []).append(row)
+    for rows in by_tournament.values():
+        rows.sort(
+            key=lambda row: (
+                -row.points,
+                row.goals_against - row.goals_for,
+                -row.goals_for,
+                row.team.name,
+                row.pk,
+            )
+        )
+        for rank, row in enumerate(rows, start=1):
+            row.rank = rank
+        Standing.objects.bulk_update(rows, ["rank"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("my_app", "0013_leaderboard"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="standing",
+            options={
+                "ordering": ["tournament_id", "rank", "pk"],
+                "verbose_name": "Рядок турнірної таблиці",
+                "verbose_name_plural": "Рядки турнірної таблиці",
+            },
+        ),
+        migrations.AddField(
+            model_name="standing",
+            name="rank",
+            field=models.PositiveIntegerField(default=0, verbose_name="Місце"),
+        ),
+        migrations.AddIndex(
+            model_name="standing",
+            index=models.Index(
+                fields=["tournament", "rank"], name="standing_tour_rank"
+            ),
+        ),
+        migrations.RunPython(backfill_ranks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 4.2.28 on 2026-10-18 15:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_team_refs(apps, schema_editor):
+    """
+    Прив'язати існуючі матчі до команд: назва шукається серед команд того
+    самого турніру; при однакових назвах береться команда з меншим id.
+    """
+    Match = apps.get_model("my_app", "Match")
+    Team = apps.get_model("my_app", "Team")
+
+    team_ids = {}
+    for team_id, tournament_id, name in Team.objects.order_by("-pk").values_list(
+        "pk", "tournament_id", "name"
+    ):
+        team_ids[(tournament_id, name)] = team_id
+
+    matches = list(Match.objects.all())
+    for match in matches:
+        match.home_team_ref_id = team_ids.get((match.tournament_id, match.home_team))
+        match.away_team_ref_id = team_ids.get((match.tournament_id, match.away_team))
+    Match.objects.bulk_update(
+        matches, ["home_team_ref", "away_team_ref"], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("my_app", "0014_standing_rank"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="match",
+            name="away_team_ref",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="away_matches",
+                to="my_app.team",
+                verbose_name="Гості",
+            ),
+        ),
+        migrations.AddField(
+            model_name="match",
+            name="home_team_ref",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="home_matches",
+                to="my_app.team",
+                verbose_name="Господарі",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="match",
+            index=models.Index(fields=["tournament", "date"], name="match_tour_date"),
+        ),
+        migrations.AddIndex(
+            model_name="match",
+            index=models.Index(
+                fields=["home_team_ref", "away_team_ref"], name="match_home_away"
+            ),
+        ),
+        migrations.RunPython(backfill_team_refs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,211 @@
+# Generated by Django 4.2.28 on 2026-10-18 15:53
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Знімок my_app.search на момент міграції: міграція не має залежати від
+# коду, що змінюватиметься (наступні зміни нормалізації — окремою
+# міграцією з переіндексацією)
+FTS_TABLE = "my_app_playersearch_fts"
+DOCUMENT_TABLE = "my_app_playersearchdocument"
+
+TRANSLIT = {
+    "а": "a",
+    "б": "b",
+    "в": "v",
+    "г": "h",
+    "ґ": "g",
+    "д": "d",
+    "е": "e",
+    "є": "ie",
+    "ж": "zh",
+    "з": "z",
+    "и": "y",
+    "і": "i",
+    "ї": "i",
+    "й": "i",
+    "к": "k",
+    "л": "l",
+    "м": "m",
+    "н": "n",
+    "о": "o",
+    "п": "p",
+    "р": "r",
+    "с": "s",
+    "т": "t",
+    "у": "u",
+    "ф": "f",
+    "х": "kh",
+    "ц": "ts",
+    "ч": "ch",
+    "ш": "sh",
+    "щ": "shch",
+    "ь": "",
+    "ю": "iu",
+    "я": "ia",
+    "ё": "io",
+    "ъ": "",
+    "ы": "y",
+    "э": "e",
+    "'": "",
+    "’": "",
+    "ʼ": "",
+}
+
+FOLDS = (("kh", "h"), ("y", "i"), ("j", "i"), ("w", "v"), ("x", "ks"))
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_REPEATS = re.compile(r"(.)\1+")
+
+
+def tokens(text):
+    text = "".join(TRANSLIT.get(char, char) for char in (text or "").lower())
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    text = _NON_ALNUM.sub(" ", text)
+    for source, target in FOLDS:
+        text = text.replace(source, target)
+    return _REPEATS.sub(r"\1", text).split()
+
+
+def name_key(*parts):
+    return " ".join(sorted(token for part in parts for token in tokens(part)))
+
+
+def build_document(username, first_name, last_name, team_names=()):
+    seen = dict.fromkeys(
+        tokens(" ".join([username, first_name, last_name, *team_names]))
+    )
+    return f" {' '.join(seen)} "
+
+
+# FTS5 з external content: текст зберігається лише в DOCUMENT_TABLE, індекс
+# оновлюють тригери. prefix — окремі індекси префіксів довжиною 1-6: без них
+# "shev"* зливає списки всіх токенів з цим префіксом на кожен запит
+SQLITE_FORWARD = [
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        document,
+        content='{DOCUMENT_TABLE}',
+        content_rowid='player_id',
+        tokenize='unicode61',
+        prefix='1 2 3 4 5 6'
+    )
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON {DOCUMENT_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, document)
+        VALUES (new.player_id, new.document);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON {DOCUMENT_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, document)
+        VALUES ('delete', old.player_id, old.document);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE ON {DOCUMENT_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, document)
+        VALUES ('delete', old.player_id, old.document);
+        INSERT INTO {FTS_TABLE}(rowid, document)
+        VALUES (new.player_id, new.document);
+    END
+    """,
+]
+SQLITE_BACKWARD = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}" for suffix in ("ai", "ad", "au")
+] + [f"DROP TABLE IF EXISTS {FTS_TABLE}"]
+
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX {DOCUMENT_TABLE}_trgm ON {DOCUMENT_TABLE} "
+    "USING gin (document gin_trgm_ops)",
+]
+POSTGRES_BACKWARD = [f"DROP INDEX IF EXISTS {DOCUMENT_TABLE}_trgm"]
+
+
+def _execute(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        _execute(schema_editor, SQLITE_FORWARD)
+    elif vendor == "postgresql":
+        _execute(schema_editor, POSTGRES_FORWARD)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        _execute(schema_editor, SQLITE_BACKWARD)
+    elif vendor == "postgresql":
+        _execute(schema_editor, POSTGRES_BACKWARD)
+
+
+def backfill_documents(apps, schema_editor):
+    """Документи для існуючих гравців (див. PlayerSearchQuerySet.reindex)."""
+    Player = apps.get_model("my_app", "Player")
+    Team = apps.get_model("my_app", "Team")
+    PlayerSearchDocument = apps.get_model("my_app", "PlayerSearchDocument")
+
+    rosters = {}
+    for team_name, roster in Team.objects.values_list("name", "player_roster"):
+        for entry in roster or ():
+            teams = rosters.setdefault(name_key(entry), [])
+            if team_name not in teams:
+                teams.append(team_name)
+
+    documents = []
+    for pk, username, first_name, last_name in Player.objects.values_list(
+        "pk", "user__username", "user__first_name", "user__last_name"
+    ):
+        key = name_key(first_name, last_name)
+        teams = rosters.get(key, ()) if key else ()
+        documents.append(
+            PlayerSearchDocument(
+                player_id=pk,
+                name_key=key,
+                document=build_document(username, first_name, last_name, teams),
+            )
+        )
+    PlayerSearchDocument.objects.bulk_create(documents, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("my_app", "0015_match_team_refs"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PlayerSearchDocument",
+            fields=[
+                (
+                    "player",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="search_document",
+                        serialize=False,
+                        to="my_app.player",
+                    ),
+                ),
+                ("name_key", models.CharField(db_index=True, max_length=255)),
+                ("document", models.TextField()),
+            ],
+            options={
+                "verbose_name": "Пошуковий документ гравця",
+                "verbose_name_plural": "Пошукові документи гравців",
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(backfill_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.28 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("my_app", "0016_player_search"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="match",
+            index=models.Index(fields=["date"], name="match_date"),
+        ),
+        migrations.AddIndex(
+            model_name="player",
+            index=models.Index(fields=["overall_rating"], name="player_rating"),
+        ),
+        migrations.AddIndex(
+            model_name="playerstats",
+            index=models.Index(fields=["created_at"], name="stats_created"),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.28 on 2026-10-18 16:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("my_app", "0017_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="playerratinghistory",
+            index=models.Index(
+                fields=["player", "recorded_at"], name="rating_history_player"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="playerstats",
+            index=models.Index(
+                fields=["player", "created_at"], name="stats_player_created"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="playerstats",
+            index=models.Index(
+                fields=["match_id", "created_at"], name="stats_match_created"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="team",
+            index=models.Index(
+                fields=["tournament", "status"], name="team_tour_status"
+            ),
+        ),
+    ]
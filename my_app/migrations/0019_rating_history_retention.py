@@ -0,0 +1,49 @@
+# Generated by Django 4.2.28 on 2026-10-18 16:18
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("my_app", "0018_query_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="playerratinghistory",
+            name="rating_max",
+            field=models.DecimalField(
+                blank=True, decimal_places=2, max_digits=4, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="playerratinghistory",
+            name="rating_min",
+            field=models.DecimalField(
+                blank=True, decimal_places=2, max_digits=4, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="playerratinghistory",
+            name="resolution",
+            field=models.CharField(
+                choices=[("raw", "Кожна зміна"), ("day", "День"), ("week", "Тиждень")],
+                default="raw",
+                max_length=4,
+            ),
+        ),
+        migrations.AddField(
+            model_name="playerratinghistory",
+            name="samples",
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AlterField(
+            model_name="playerratinghistory",
+            name="recorded_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, editable=False
+            ),
+        ),
+    ]
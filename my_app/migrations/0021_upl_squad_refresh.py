@@ -0,0 +1,36 @@
+# Generated by Django 4.2.28 on 2026-10-18 16:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("my_app", "0020_job"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UPLSquadRefresh",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("team_name", models.CharField(max_length=100, unique=True)),
+                ("locked_until", models.DateTimeField(blank=True, null=True)),
+                ("failures", models.PositiveIntegerField(default=0)),
+                ("retry_at", models.DateTimeField(blank=True, null=True)),
+                ("last_error", models.CharField(blank=True, max_length=255)),
+            ],
+            options={
+                "verbose_name": "Оновлення складу УПЛ",
+                "verbose_name_plural": "Оновлення складів УПЛ",
+            },
+        ),
+    ]
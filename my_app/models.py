@@ -1,7 +1,73 @@
-from django.contrib.auth.models import User
-from django.db import models
-from django.db.models.signals import post_save
+import time
+from datetime import timedelta
+from decimal import Decimal
+from itertools import groupby
+
+from django.contrib.auth.models import Group, User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, models, transaction
+from django.db.models import Case, Count, F, Prefetch, Q, Sum, Value, When, Window
+from django.db.models.functions import Cast, Rank, RowNumber
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
 from django.dispatch import receiver
+from django.utils import timezone
+
+from .api_cache import invalidate as invalidate_api_cache
+from .rating_engine import average_rating
+from .rating_kernel import COLUMNS as RATING_COLUMNS
+from .rating_kernel import match_rating, match_ratings, position_code, tenths_to_decimal
+from .roles import refresh_roles
+from .search import (
+    RankedMatches,
+    build_document,
+    fts_query,
+    name_key,
+    tokens,
+)
+
+# Скільки останніх матчів враховується в overall_rating
+RATING_WINDOW = 10
+
+# Скільки останніх матчів показується в recent_stats гравця
+RECENT_STATS_LIMIT = 5
+
+# Статистика, суми якої гравець зберігає в stat_totals
+TOTAL_FIELDS = (
+    "goals",
+    "assists",
+    "shots",
+    "shots_on_target",
+    "key_passes",
+    "saves",
+    "tackles",
+    "interceptions",
+    "yellow_cards",
+    "red_cards",
+)
+
+# Поля Player, які підтримуються інкрементально при записі PlayerStats
+AGGREGATE_FIELDS = ["overall_rating", "matches_played", "stat_totals", "recent_ratings"]
+
+# Зберігання історії рейтингу: записи, молодші за RAW_DAYS днів, лишаються
+# як є, старші згортаються до запису на день, а старші за DAILY_DAYS — до
+# запису на тиждень (PlayerRatingHistoryQuerySet.compact)
+RATING_HISTORY_RAW_DAYS = 30
+RATING_HISTORY_DAILY_DAYS = 180
+
+# Скільки останніх точок історії рейтингу віддає детальна картка гравця
+RATING_HISTORY_SERIES_POINTS = 60
+
+# Лічильник CacheVersion складів УПЛ: змінюється з кожним записом UPLSquadCache
+UPL_SQUADS_VERSION = "upl_squads"
+
+# Як часто (секунд) фонове завдання може записувати свій прогрес (Job.report)
+JOB_REPORT_INTERVAL = 1.0
 
 
 class UserProfile(models.Model):
@@ -29,6 +95,183 @@ def create_user_profile(sender, instance, created, **kwargs):
         UserProfile.objects.get_or_create(user=instance)
 
 
+class PlayerQuerySet(models.QuerySet):
+    def search(self, query):
+        """
+        Гравці, що відповідають запиту (кожен токен — префікс токена
+        документа), впорядковані за релевантністю: search_rank — менше краще.
+
+        SQLite: MATCH по FTS5-індексу і bm25 — повертається
+        search.RankedMatches (сторінки читаються прямо з індексу, тож
+        фільтри треба накласти до search()). Інші бази — queryset з LIKE по
+        PlayerSearchDocument.document і пріоритетом збігу імені.
+        """
+        match = fts_query(query)
+        if not match:
+            return self.none()
+        if connections[self.db].vendor == "sqlite":
+            return RankedMatches(self, match)
+
+        words = tokens(query)
+        condition = Q()
+        for word in words:
+            condition &= Q(search_document__document__contains=f" {word}")
+        return (
+            self.filter(condition)
+            .annotate(
+                search_rank=Case(
+                    When(
+                        search_document__name_key__startswith=" ".join(sorted(words)),
+                        then=Value(0),
+                    ),
+                    default=Value(1),
+                )
+            )
+            .order_by("search_rank", "-overall_rating", "pk")
+        )
+
+    def with_recent_stats(self, limit=RECENT_STATS_LIMIT):
+        """
+        Підвантажити limit останніх рядків статистики кожного гравця в
+        player.latest_stats одним запитом на всю вибірку.
+
+        Зріз obj.stats.all()[:5] обходить кеш prefetch_related і робить
+        окремий запит на гравця; тут рядки нумеруються RowNumber() у межах
+        гравця і відбираються фільтром row <= limit, тож кар'єрна
+        статистика не завантажується.
+        """
+        recent = (
+            PlayerStats.objects.annotate(
+                row=Window(
+                    RowNumber(),
+                    partition_by=[F("player_id")],
+                    order_by=[F("created_at").desc(), F("id").desc()],
+                )
+            )
+            .filter(row__lte=limit)
+            .order_by("player_id", "row")
+        )
+        return self.prefetch_related(
+            Prefetch("stats", queryset=recent, to_attr="latest_stats")
+        )
+
+    def with_rating_series(self, limit=RATING_HISTORY_SERIES_POINTS):
+        """
+        Підвантажити limit останніх записів історії рейтингу кожного гравця
+        в player.rating_series (зріз у prefetch — віконний запит Django).
+        """
+        series = PlayerRatingHistory.objects.order_by("-recorded_at", "-id")
+        return self.prefetch_related(
+            Prefetch("rating_history", queryset=series[:limit], to_attr="rating_series")
+        )
+
+    def refresh_ratings(self, commit=True):
+        """
+        Перебудувати агрегати гравців вибірки з таблиці статистики.
+
+        Один віконний запит повертає останні RATING_WINDOW рейтингів, кількість
+        матчів і суми статистики кожного гравця, далі — один bulk_update і один
+        bulk_create історії лише для гравців, у яких рейтинг змінився.
+        Використовується для масового імпорту, перерахунку і звірки
+        інкрементальних агрегатів (команда reconcile_player_aggregates).
+
+        Args:
+            commit: False — лише порахувати розбіжності, нічого не записуючи
+        Returns:
+            list: гравці, агрегати яких відрізнялися від перерахованих
+        """
+        changed, history = self.rebuild_aggregates()
+        if commit:
+            self.save_aggregates(changed, history)
+        return changed
+
+    def rebuild_aggregates(self):
+        """
+        Порахувати агрегати гравців вибірки, нічого не записуючи.
+
+        Returns:
+            tuple: (гравці зі зміненими агрегатами — вже з новими значеннями,
+                    незбережені записи PlayerRatingHistory)
+        """
+        return _rebuild_aggregates({player.pk: player for player in self})
+
+    def save_aggregates(self, changed, history, sync_leaderboard=True):
+        """
+        Записати результат rebuild_aggregates одним bulk_update і bulk_create
+        і синхронізувати таблицю лідерів (bulk_update не надсилає сигналів).
+        sync_leaderboard=False — якщо викликач сам перебудує таблицю лідерів
+        після серії записів (команда update_ratings).
+        """
+        with transaction.atomic():
+            Player.objects.bulk_update(changed, AGGREGATE_FIELDS)
+            PlayerRatingHistory.objects.bulk_create(history)
+            if sync_leaderboard:
+                LeaderboardEntry.objects.sync_many(changed)
+            invalidate_api_cache("players")
+
+
+def _rebuild_aggregates(players):
+    """Реалізація rebuild_aggregates для вже завантажених гравців ({pk: Player})."""
+    if not players:
+        return [], []
+
+    sums = {
+        f"sum_{name}": Window(Sum(name), partition_by=[F("player_id")])
+        for name in TOTAL_FIELDS
+    }
+    recent = (
+        PlayerStats.objects.filter(player_id__in=players)
+        .annotate(
+            row=Window(
+                RowNumber(),
+                partition_by=[F("player_id")],
+                order_by=[F("created_at").desc(), F("id").desc()],
+            ),
+            total=Window(Count("id"), partition_by=[F("player_id")]),
+            **sums,
+        )
+        .filter(row__lte=RATING_WINDOW)
+        .order_by("player_id", "row")
+        .values_list("player_id", "id", "rating", "total", *sums)
+    )
+    windows = {pk: [] for pk in players}
+    counts = dict.fromkeys(players, 0)
+    totals = {pk: empty_stat_totals() for pk in players}
+    for player_id, stat_id, rating, count, *values in recent:
+        counts[player_id] = count
+        totals[player_id] = dict(zip(TOTAL_FIELDS, values))
+        if rating is not None:
+            windows[player_id].append([stat_id, str(rating)])
+
+    changed, history = [], []
+    for pk, player in players.items():
+        new_rating = _average_rating(windows[pk])
+        if (
+            player.overall_rating == new_rating
+            and player.matches_played == counts[pk]
+            and player.stat_totals == totals[pk]
+            and player.recent_ratings == windows[pk]
+        ):
+            continue
+        if player.overall_rating != new_rating:
+            history.append(PlayerRatingHistory(player=player, rating=new_rating))
+        player.overall_rating = new_rating
+        player.matches_played = counts[pk]
+        player.stat_totals = totals[pk]
+        player.recent_ratings = windows[pk]
+        changed.append(player)
+    return changed, history
+
+
+def _average_rating(window):
+    """Середнє рейтингів вікна [[stat_id, "7.6"], ...], округлене до 2 знаків."""
+    return average_rating(Decimal(rating) for _, rating in window)
+
+
+def empty_stat_totals():
+    return dict.fromkeys(TOTAL_FIELDS, 0)
+
+
 class Player(models.Model):
     """Модель гравця з рейтингом"""
 
@@ -47,11 +290,25 @@ class Player(models.Model):
     avatar = models.ImageField(upload_to="avatars/", null=True, blank=True)
     overall_rating = models.DecimalField(max_digits=4, decimal_places=2, default=0)
     matches_played = models.IntegerField(default=0)
+    # Інкрементальні агрегати (оновлюються в PlayerStats.save / post_delete)
+    stat_totals = models.JSONField(
+        default=empty_stat_totals, help_text="Суми статистики за кар'єру"
+    )
+    recent_ratings = models.JSONField(
+        default=list,
+        help_text="Останні рейтинги матчів [[stat_id, рейтинг], ...], новіші першими",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = PlayerQuerySet.as_manager()
+
     class Meta:
         ordering = ["-overall_rating"]
+        indexes = [
+            # Keyset-пагінація списку гравців (-overall_rating, -id)
+            models.Index(fields=["overall_rating"], name="player_rating"),
+        ]
         verbose_name = "Гравець"
         verbose_name_plural = "Гравці"
 
@@ -63,11 +320,9 @@ class Player(models.Model):
         Загальний рейтинг гравця = середнє рейтингів матчів (шкала 1.0–10.0).
         Рейтинг кожного матчу вже розраховується в PlayerStats._calculate_match_rating().
         """
-        from decimal import Decimal
-
         from django.db.models import Avg
 
-        recent_stats = self.stats.filter(rating__isnull=False)[:10]
+        recent_stats = self.stats.filter(rating__isnull=False)[:RATING_WINDOW]
         if not recent_stats.exists():
             return Decimal("0.00")
 
@@ -75,14 +330,337 @@ class Player(models.Model):
         return round(Decimal(str(avg)), 2)
 
     def update_rating(self):
-        """Оновити загальний рейтинг гравця і записати в історію."""
-        new_rating = self.calculate_rating()
+        """Оновити загальний рейтинг гравця з вікна recent_ratings і записати в історію."""
+        new_rating = _average_rating(self.recent_ratings)
         if self.overall_rating != new_rating:
             PlayerRatingHistory.objects.create(player=self, rating=new_rating)
             self.overall_rating = new_rating
             self.save(update_fields=["overall_rating"])
         return new_rating
 
+    def apply_stats_change(self, removed=None, added=None):
+        """
+        Інкрементально оновити агрегати після запису одного рядка PlayerStats.
+
+        Вставка — added, видалення — removed, зміна — обидва (той самий рядок
+        до і після). Кількість матчів і суми змінюються за O(1); вікно
+        recent_ratings перечитується (максимум RATING_WINDOW рядків) лише тоді,
+        коли видалено рядок, що в нього входив. Має викликатися в тій самій
+        транзакції, що й запис статистики: рядок гравця блокується
+        select_for_update, тож паралельні записи не губляться.
+        """
+        locked = (
+            Player.objects.select_for_update().values(*AGGREGATE_FIELDS).get(pk=self.pk)
+        )
+        for name, value in locked.items():
+            setattr(self, name, value)
+
+        totals = {**empty_stat_totals(), **self.stat_totals}
+        window = [list(entry) for entry in self.recent_ratings]
+        window_ids = [stat_id for stat_id, _ in window]
+        refill = False
+
+        if removed is not None:
+            self.matches_played -= 1
+            for name in TOTAL_FIELDS:
+                totals[name] -= getattr(removed, name)
+        if added is not None:
+            self.matches_played += 1
+            for name in TOTAL_FIELDS:
+                totals[name] += getattr(added, name)
+
+        if removed is not None and added is not None:
+            # Зміна існуючого рядка — позиція у вікні не змінюється
+            if added.pk in window_ids:
+                window[window_ids.index(added.pk)][1] = str(added.rating)
+        elif added is not None:
+            window = [[added.pk, str(added.rating)]] + window[: RATING_WINDOW - 1]
+        elif removed.pk in window_ids:
+            del window[window_ids.index(removed.pk)]
+            refill = len(window) < min(RATING_WINDOW, self.matches_played)
+
+        if refill:
+            window = [
+                [stat_id, str(rating)]
+                for stat_id, rating in self.stats.filter(rating__isnull=False)
+                .order_by("-created_at", "-id")
+                .values_list("id", "rating")[:RATING_WINDOW]
+            ]
+
+        self.stat_totals = totals
+        self.recent_ratings = window
+        new_rating = _average_rating(window)
+        if self.overall_rating != new_rating:
+            PlayerRatingHistory.objects.create(player=self, rating=new_rating)
+            self.overall_rating = new_rating
+        self.save(update_fields=AGGREGATE_FIELDS)
+
+
+class LeaderboardQuerySet(models.QuerySet):
+    # Скільки гравців синхронізувати поштучно, перш ніж перебудувати таблицю цілком
+    INCREMENTAL_LIMIT = 50
+
+    def sync(self, player):
+        """
+        Інкрементально оновити запис гравця в таблиці лідерів.
+
+        Місця (rank / position_rank) змінюються лише для гравців, яких він
+        обійшов або пропустив уперед: діапазонний UPDATE по індексу
+        (position, overall_rating), без перерахунку всієї таблиці.
+        """
+        rating, position = player.overall_rating, player.position
+        entry = self.filter(player_id=player.pk).first()
+        if entry and entry.overall_rating == rating and entry.position == position:
+            return entry
+
+        with transaction.atomic():
+            others = self.exclude(player_id=player.pk)
+            if entry is None:
+                _shift_ranks(others, "rank", None, rating)
+                _shift_ranks(
+                    others.filter(position=position), "position_rank", None, rating
+                )
+            else:
+                _shift_ranks(others, "rank", entry.overall_rating, rating)
+                if entry.position == position:
+                    _shift_ranks(
+                        others.filter(position=position),
+                        "position_rank",
+                        entry.overall_rating,
+                        rating,
+                    )
+                else:
+                    _shift_ranks(
+                        others.filter(position=entry.position),
+                        "position_rank",
+                        entry.overall_rating,
+                        None,
+                    )
+                    _shift_ranks(
+                        others.filter(position=position), "position_rank", None, rating
+                    )
+
+            values = {
+                "position": position,
+                "overall_rating": rating,
+                "rank": others.filter(overall_rating__gt=rating).count() + 1,
+                "position_rank": others.filter(
+                    position=position, overall_rating__gt=rating
+                ).count()
+                + 1,
+            }
+            if entry is None:
+                entry = self.create(player_id=player.pk, **values)
+            else:
+                self.filter(player_id=player.pk).update(**values)
+                for name, value in values.items():
+                    setattr(entry, name, value)
+        return entry
+
+    def sync_many(self, players):
+        """Синхронізувати кількох гравців; для великих пакетів — повна перебудова."""
+        if len(players) > self.INCREMENTAL_LIMIT:
+            return self.rebuild()
+        for player in players:
+            self.sync(player)
+
+    def rebuild(self):
+        """Перебудувати всю таблицю лідерів одним віконним запитом і одним upsert."""
+        # Cast: на SQLite Django обгортає сортування вікна за DecimalField
+        # у CAST(... AS NUMERIC), що ламає синтаксис OVER (...)
+        rating = Cast("overall_rating", models.FloatField()).desc()
+        rows = Player.objects.annotate(
+            overall_place=Window(Rank(), order_by=rating),
+            position_place=Window(
+                Rank(), partition_by=[F("position")], order_by=rating
+            ),
+        ).values_list(
+            "pk", "position", "overall_rating", "overall_place", "position_place"
+        )
+        entries = [
+            LeaderboardEntry(
+                player_id=pk,
+                position=position,
+                overall_rating=rating,
+                rank=rank,
+                position_rank=position_rank,
+            )
+            for pk, position, rating, rank, position_rank in rows
+        ]
+        with transaction.atomic():
+            self.bulk_create(
+                entries,
+                update_conflicts=True,
+                unique_fields=["player"],
+                update_fields=["position", "overall_rating", "rank", "position_rank"],
+            )
+        invalidate_api_cache("players")
+        return entries
+
+
+def _shift_ranks(queryset, field, old, new):
+    """
+    Зсунути місця гравців після зміни рейтингу одного з них з old на new.
+
+    Місце = 1 + кількість гравців з вищим рейтингом, тож зачеплені лише
+    рейтинги з проміжку [min(old, new), max(old, new)). None означає, що
+    гравця в таблиці не було (old) або більше немає (new).
+    """
+    if old is None:
+        queryset = queryset.filter(overall_rating__lt=new)
+        delta = 1
+    elif new is None:
+        queryset = queryset.filter(overall_rating__lt=old)
+        delta = -1
+    elif new > old:
+        queryset = queryset.filter(overall_rating__gte=old, overall_rating__lt=new)
+        delta = 1
+    elif new < old:
+        queryset = queryset.filter(overall_rating__gte=new, overall_rating__lt=old)
+        delta = -1
+    else:
+        return
+    queryset.update(**{field: F(field) + delta})
+
+
+class LeaderboardEntry(models.Model):
+    """Матеріалізована таблиця лідерів: рейтинг і місця гравця"""
+
+    player = models.OneToOneField(
+        Player,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="leaderboard_entry",
+    )
+    position = models.CharField(max_length=20, choices=Player.POSITION_CHOICES)
+    overall_rating = models.DecimalField(max_digits=4, decimal_places=2, default=0)
+    rank = models.PositiveIntegerField(default=1, verbose_name="Місце")
+    position_rank = models.PositiveIntegerField(
+        default=1, verbose_name="Місце в амплуа"
+    )
+
+    objects = LeaderboardQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["rank", "player_id"]
+        indexes = [
+            models.Index(
+                fields=["position", "-overall_rating"], name="leaderboard_pos_rating"
+            ),
+            models.Index(fields=["rank", "player"], name="leaderboard_rank"),
+            models.Index(
+                fields=["position", "position_rank", "player"],
+                name="leaderboard_pos_rank",
+            ),
+        ]
+        verbose_name = "Рядок таблиці лідерів"
+        verbose_name_plural = "Таблиця лідерів"
+
+    def __str__(self):
+        return f"#{self.rank} {self.player_id} ({self.overall_rating})"
+
+
+@receiver(post_save, sender=Player)
+def sync_leaderboard_entry(sender, instance, created, update_fields=None, **kwargs):
+    """Оновити таблицю лідерів, коли змінився рейтинг або позиція гравця"""
+    if update_fields is not None and not {"overall_rating", "position"} & set(
+        update_fields
+    ):
+        return
+    LeaderboardEntry.objects.sync(instance)
+
+
+@receiver(pre_delete, sender=Player)
+def remove_leaderboard_entry(sender, instance, **kwargs):
+    """Підтягнути місця гравців, що стояли нижче видаленого"""
+    entry = LeaderboardEntry.objects.filter(player_id=instance.pk).first()
+    if entry is None:
+        return
+    others = LeaderboardEntry.objects.exclude(player_id=instance.pk)
+    _shift_ranks(others, "rank", entry.overall_rating, None)
+    _shift_ranks(
+        others.filter(position=entry.position),
+        "position_rank",
+        entry.overall_rating,
+        None,
+    )
+
+
+class PlayerStatsQuerySet(models.QuerySet):
+    def bulk_ingest(self, rows, batch_size=500):
+        """
+        Масовий імпорт статистики матчів.
+
+        Рейтинги матчів рахуються в пам'яті одним викликом векторизованого
+        ядра (rating_kernel.match_ratings), рядки вставляються одним
+        bulk_create, а агрегати зачеплених гравців доповнюються в пам'яті
+        і записуються одним bulk_update. На відміну від PlayerStats.save()
+        кількість запитів не залежить від кількості рядків.
+
+        Args:
+            rows: ітерабельне з PlayerStats або словників з полями моделі
+            batch_size: розмір пакета для bulk_create
+        Returns:
+            list: створені об'єкти PlayerStats
+        """
+        objs = [
+            row if isinstance(row, PlayerStats) else PlayerStats(**row) for row in rows
+        ]
+        if not objs:
+            return []
+
+        with transaction.atomic():
+            players = Player.objects.select_for_update().in_bulk(
+                {obj.player_id for obj in objs}
+            )
+            ratings = match_ratings(
+                [position_code(players[obj.player_id].position) for obj in objs],
+                **{
+                    name: [getattr(obj, name) for obj in objs]
+                    for name in RATING_COLUMNS
+                },
+            )
+            for obj, rating in zip(objs, ratings):
+                obj.rating = tenths_to_decimal(rating)
+
+            created = self.bulk_create(objs, batch_size=batch_size)
+            if connections[self.db].features.can_return_rows_from_bulk_insert:
+                _apply_ingested(players, created)
+            else:
+                # Без id нових рядків вікно recent_ratings не зібрати
+                Player.objects.save_aggregates(*_rebuild_aggregates(players))
+        return created
+
+
+def _apply_ingested(players, stats):
+    """Доповнити агрегати гравців ({pk: Player}) щойно вставленими рядками."""
+    by_player = {}
+    for stat in stats:
+        by_player.setdefault(stat.player_id, []).append(stat)
+
+    history = []
+    for pk, rows in by_player.items():
+        player = players[pk]
+        totals = {**empty_stat_totals(), **player.stat_totals}
+        for row in rows:
+            for name in TOTAL_FIELDS:
+                totals[name] += getattr(row, name)
+        # Рядки вставлено в порядку created_at, тож найновіші — в кінці
+        newest = [[row.pk, str(row.rating)] for row in reversed(rows)]
+        player.recent_ratings = (newest + player.recent_ratings)[:RATING_WINDOW]
+        player.stat_totals = totals
+        player.matches_played += len(rows)
+        new_rating = _average_rating(player.recent_ratings)
+        if player.overall_rating != new_rating:
+            history.append(PlayerRatingHistory(player=player, rating=new_rating))
+            player.overall_rating = new_rating
+
+    changed = [players[pk] for pk in by_player]
+    Player.objects.bulk_update(changed, AGGREGATE_FIELDS)
+    PlayerRatingHistory.objects.bulk_create(history)
+    LeaderboardEntry.objects.sync_many(changed)
+    invalidate_api_cache("players")
+
 
 class PlayerStats(models.Model):
     """Статистика гравця за матч"""
@@ -113,8 +691,17 @@ class PlayerStats(models.Model):
     rating = models.DecimalField(max_digits=3, decimal_places=1, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = PlayerStatsQuerySet.as_manager()
+
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Keyset-пагінація статистики (-created_at, -id), зокрема з
+            # ?player_id= / ?match_id=, і останні матчі гравця (with_recent_stats)
+            models.Index(fields=["created_at"], name="stats_created"),
+            models.Index(fields=["player", "created_at"], name="stats_player_created"),
+            models.Index(fields=["match_id", "created_at"], name="stats_match_created"),
+        ]
         verbose_name = "Статистика гравця"
         verbose_name_plural = "Статистика гравців"
 
@@ -125,95 +712,206 @@ class PlayerStats(models.Model):
         """При збереженні статистики автоматично рахуємо рейтинг матчу і оновлюємо гравця"""
         # Розраховуємо рейтинг матчу перед збереженням
         self.rating = self._calculate_match_rating()
-        super().save(*args, **kwargs)
-        # Оновлюємо загальний рейтинг гравця
-        self.player.matches_played = self.player.stats.count()
-        self.player.save(update_fields=["matches_played"])
-        self.player.update_rating()
+        with transaction.atomic():
+            previous = None
+            if self.pk is not None:
+                previous = (
+                    PlayerStats.objects.filter(pk=self.pk)
+                    .only("player_id", "rating", *TOTAL_FIELDS)
+                    .first()
+                )
+            super().save(*args, **kwargs)
+            # Інкрементально оновлюємо агрегати гравця (без перерахунку кар'єри)
+            if previous is not None and previous.player_id != self.player_id:
+                previous.player.apply_stats_change(removed=previous)
+                previous = None
+            self.player.apply_stats_change(removed=previous, added=self)
 
-    def _calculate_match_rating(self):
+    def _calculate_match_rating(self, position=None):
         """
         xG-натхнена формула рейтингу матчу (1.0 – 10.0).
 
         Базовий бал: 5.0 (повна гра 90 хв).
-        Бонуси/штрафи залежать від позиції та статистики.
-        """
-        from decimal import Decimal
-
-        position = self.player.position
-        score = Decimal("5.0")
-
-        # --- Бонус за хвилини на полі ---
-        if self.minutes_played < 20:
-            score -= Decimal("1.5")
-        elif self.minutes_played < 45:
-            score -= Decimal("0.75")
-        elif self.minutes_played < 60:
-            score -= Decimal("0.25")
-
-        # --- Голи (позиційно зважені) ---
-        goal_weights = {
-            "GK": Decimal("0.5"),
-            "DEF": Decimal("1.5"),
-            "MID": Decimal("1.5"),
-            "FWD": Decimal("1.0"),
-        }
-        score += Decimal(str(self.goals)) * goal_weights.get(position, Decimal("1.0"))
+        Бонуси/штрафи залежать від позиції та статистики; ваги описані
+        в my_app/rating_kernel.py.
+        position можна передати явно, щоб не звертатися до self.player
+        (використовується в bulk_ingest).
+        """
+        return match_rating(
+            position or self.player.position,
+            **{name: getattr(self, name) for name in RATING_COLUMNS},
+        )
 
-        # --- Асисти ---
-        score += Decimal(str(self.assists)) * Decimal("1.0")
 
-        # --- xG proxy: удари у ціль ---
-        # Кожен удар у ціль = +0.2, максимум +1.5
-        sot_bonus = min(
-            Decimal(str(self.shots_on_target)) * Decimal("0.2"), Decimal("1.5")
+@receiver(post_delete, sender=PlayerStats)
+def remove_stats_from_aggregates(sender, instance, origin=None, **kwargs):
+    """Прибрати видалений рядок статистики з агрегатів гравця"""
+    # Каскадне видалення гравця або користувача — оновлювати нічого
+    if getattr(origin, "model", type(origin)) is not PlayerStats:
+        return
+    instance.player.apply_stats_change(removed=instance)
+
+
+def rating_history_cutoffs(now=None):
+    """
+    Межі політики зберігання історії рейтингу.
+
+    Returns:
+        tuple: (початок дня RAW_DAYS днів тому, понеділок тижня DAILY_DAYS
+            днів тому) — за місцевим часом, щоб дні і тижні не різались
+    """
+    now = timezone.localtime(now)
+    midnight = {"hour": 0, "minute": 0, "second": 0, "microsecond": 0}
+    raw = (now - timedelta(days=RATING_HISTORY_RAW_DAYS)).replace(**midnight)
+    daily = (now - timedelta(days=RATING_HISTORY_DAILY_DAYS)).replace(**midnight)
+    return raw, daily - timedelta(days=daily.weekday())
+
+
+class PlayerRatingHistoryQuerySet(models.QuerySet):
+    def needs_compaction(self, now=None):
+        """Записи, які compact() згорне: сирі старші за RAW_DAYS, денні — за DAILY_DAYS."""
+        raw, daily = rating_history_cutoffs(now)
+        return self.filter(
+            Q(resolution=PlayerRatingHistory.RAW, recorded_at__lt=raw)
+            | Q(resolution=PlayerRatingHistory.DAY, recorded_at__lt=daily)
         )
-        score += sot_bonus
-
-        # --- Ключові передачі ---
-        kp_bonus = min(Decimal(str(self.key_passes)) * Decimal("0.15"), Decimal("0.9"))
-        score += kp_bonus
-
-        # --- Сейви (тільки GK) ---
-        if position == "GK":
-            save_bonus = min(Decimal(str(self.saves)) * Decimal("0.3"), Decimal("2.0"))
-            score += save_bonus
-
-        # --- Оборонні дії (DEF/MID/GK) ---
-        if position in ("GK", "DEF", "MID"):
-            def_bonus = min(
-                (Decimal(str(self.tackles)) + Decimal(str(self.interceptions)))
-                * Decimal("0.1"),
-                Decimal("1.0"),
-            )
-            score += def_bonus
 
-        # --- Штрафи за картки ---
-        score -= Decimal(str(self.yellow_cards)) * Decimal("1.0")
-        score -= Decimal(str(self.red_cards)) * Decimal("3.0")
+    def compact(self, now=None, batch_size=500):
+        """
+        Згорнути старі записи вибірки за політикою RATING_HISTORY_*_DAYS.
+
+        Записи гравця групуються по днях (або по тижнях з понеділка, якщо
+        старші за DAILY_DAYS); група замінюється одним записом: рейтинг і
+        час — останнього запису, rating_min / rating_max — межі групи,
+        samples — скільки сирих записів вона охоплює. Група з одного запису
+        потрібної роздільності не змінюється, тож повторний запуск нічого
+        не робить. Виконується в одній транзакції — велику таблицю краще
+        згортати по кількасот гравців (команда compact_rating_history).
+
+        Returns:
+            tuple: (видалено записів, створено записів)
+        """
+        raw, daily = rating_history_cutoffs(now)
+        buckets = {}
+        for row in self.filter(recorded_at__lt=raw).order_by(
+            "player_id", "recorded_at", "id"
+        ):
+            local = timezone.localtime(row.recorded_at).date()
+            if row.recorded_at < daily:
+                key = (PlayerRatingHistory.WEEK, local - timedelta(local.weekday()))
+            else:
+                key = (PlayerRatingHistory.DAY, local)
+            buckets.setdefault((row.player_id, *key), []).append(row)
+
+        removed, created = [], []
+        for (player_id, resolution, _), rows in buckets.items():
+            if len(rows) == 1 and rows[0].resolution == resolution:
+                continue
+            last = rows[-1]
+            created.append(
+                PlayerRatingHistory(
+                    player_id=player_id,
+                    resolution=resolution,
+                    rating=last.rating,
+                    rating_min=min(row.low for row in rows),
+                    rating_max=max(row.high for row in rows),
+                    samples=sum(row.samples for row in rows),
+                    recorded_at=last.recorded_at,
+                )
+            )
+            removed += [row.pk for row in rows]
 
-        # Обмежуємо до [1.0, 10.0]
-        score = max(Decimal("1.0"), min(Decimal("10.0"), score))
-        return round(score, 1)
+        with transaction.atomic():
+            for start in range(0, len(removed), batch_size):
+                PlayerRatingHistory.objects.filter(
+                    pk__in=removed[start : start + batch_size]
+                ).delete()
+            PlayerRatingHistory.objects.bulk_create(created, batch_size=batch_size)
+        return len(removed), len(created)
 
 
 class PlayerRatingHistory(models.Model):
-    """Історія зміни рейтингу"""
+    """
+    Історія зміни рейтингу.
+
+    Сирий запис (RAW) — одна зміна рейтингу; денний (DAY) і тижневий (WEEK)
+    — згорнуті compact() зміни за період: rating — останній рейтинг,
+    rating_min / rating_max — межі, samples — кількість змін.
+    """
+
+    RAW, DAY, WEEK = "raw", "day", "week"
+    RESOLUTION_CHOICES = [
+        (RAW, "Кожна зміна"),
+        (DAY, "День"),
+        (WEEK, "Тиждень"),
+    ]
 
     player = models.ForeignKey(
         Player, on_delete=models.CASCADE, related_name="rating_history"
     )
     rating = models.DecimalField(max_digits=4, decimal_places=2)
-    recorded_at = models.DateTimeField(auto_now_add=True)
+    # Не auto_now_add: compact() зберігає час останнього запису групи
+    recorded_at = models.DateTimeField(default=timezone.now, editable=False)
+    resolution = models.CharField(max_length=4, choices=RESOLUTION_CHOICES, default=RAW)
+    rating_min = models.DecimalField(
+        max_digits=4, decimal_places=2, null=True, blank=True
+    )
+    rating_max = models.DecimalField(
+        max_digits=4, decimal_places=2, null=True, blank=True
+    )
+    samples = models.PositiveIntegerField(default=1)
+
+    objects = PlayerRatingHistoryQuerySet.as_manager()
 
     class Meta:
         ordering = ["-recorded_at"]
+        indexes = [
+            # Історія одного гравця, новіші першими (rating_history)
+            models.Index(
+                fields=["player", "recorded_at"], name="rating_history_player"
+            ),
+        ]
         verbose_name = "Історія рейтингу"
         verbose_name_plural = "Історія рейтингів"
 
     def __str__(self):
         return f"{self.player.user.username} - {self.rating}"
 
+    @property
+    def low(self):
+        return self.rating if self.rating_min is None else self.rating_min
+
+    @property
+    def high(self):
+        return self.rating if self.rating_max is None else self.rating_max
+
+
+class CacheVersionQuerySet(models.QuerySet):
+    def current(self, name):
+        """Поточна версія кешу name (0, якщо її ще не змінювали)."""
+        return self.filter(name=name).values_list("version", flat=True).first() or 0
+
+    def bump(self, name):
+        """Збільшити версію кешу name: процеси скинуть свої локальні копії."""
+        if not self.filter(name=name).update(version=F("version") + 1):
+            self.get_or_create(name=name, defaults={"version": 1})
+
+
+class CacheVersion(models.Model):
+    """
+    Лічильник версії кешу в базі. Процес тримає в пам'яті свою копію даних
+    разом з версією, під якою її прочитав, і скидає копію, щойно лічильник
+    змінився (напр. склади УПЛ у my_app.upl_service).
+    """
+
+    name = models.CharField(max_length=50, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+
+    objects = CacheVersionQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.name}: v{self.version}"
+
 
 class UPLSquadCache(models.Model):
     """Кеш складів команд УПЛ з API-Football (оновлюється раз на добу)"""
@@ -233,6 +931,215 @@ class UPLSquadCache(models.Model):
         return f"{self.team_name} (оновлено: {self.fetched_at:%d.%m.%Y %H:%M})"
 
 
+class UPLSquadRefreshQuerySet(models.QuerySet):
+    def acquire(self, team_name, lease):
+        """
+        Взяти блокування оновлення складу команди на lease (timedelta).
+
+        Блокування вільне, якщо його не тримає інший процес (або lease минув)
+        і команда не на паузі після невдач (retry_at). Зайняте блокування
+        перевіряється читанням, тож запити, поки склад оновлюється, нічого
+        не пишуть; саме взяття — умовний UPDATE, тож виграє лише один.
+
+        Returns:
+            bool: чи взято блокування
+        """
+        now = timezone.now()
+        state = self.filter(team_name=team_name).first()
+        if state is None:
+            self.bulk_create(
+                [UPLSquadRefresh(team_name=team_name)], ignore_conflicts=True
+            )
+        elif state.blocked(now):
+            return False
+        free = Q(locked_until__isnull=True) | Q(locked_until__lte=now)
+        ready = Q(retry_at__isnull=True) | Q(retry_at__lte=now)
+        return bool(
+            self.filter(free, ready, team_name=team_name).update(
+                locked_until=now + lease
+            )
+        )
+
+    def succeed(self, team_names, unlock=True):
+        """
+        Зняти паузу після невдач з команд team_names, а з unlock — і
+        блокування. Без unlock (склад оновлено, не взявши блокування)
+        оновлення, що саме виконується, лишається єдиним.
+        """
+        fields = {"failures": 0, "retry_at": None, "last_error": ""}
+        if unlock:
+            fields["locked_until"] = None
+        return self.filter(team_name__in=team_names).update(**fields)
+
+    def fail(self, team_name, error, base, cap):
+        """
+        Зняти блокування після невдалого оновлення і поставити команду на
+        паузу: base * 2**(n-1) після n-ї невдачі поспіль, не більше cap
+        (timedelta).
+        """
+        now = timezone.now()
+        failures = (
+            self.filter(team_name=team_name).values_list("failures", flat=True).first()
+            or 0
+        ) + 1
+        delay = min(base * 2 ** (failures - 1), cap)
+        return self.filter(team_name=team_name).update(
+            locked_until=None,
+            failures=failures,
+            retry_at=now + delay,
+            last_error=error[:255],
+        )
+
+
+class UPLSquadRefresh(models.Model):
+    """
+    Стан оновлення складу команди УПЛ (my_app.upl_service): рядок-блокування,
+    щоб склад команди одночасно оновлював лише один потік чи процес, і
+    негативний кеш — пауза з експоненційним зростанням після невдач API.
+    """
+
+    team_name = models.CharField(max_length=100, unique=True)
+    # Блокування з терміном дії: якщо процес загинув, його зніме час
+    locked_until = models.DateTimeField(null=True, blank=True)
+    failures = models.PositiveIntegerField(default=0)
+    retry_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.CharField(max_length=255, blank=True)
+
+    objects = UPLSquadRefreshQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Оновлення складу УПЛ"
+        verbose_name_plural = "Оновлення складів УПЛ"
+
+    def __str__(self):
+        return f"{self.team_name} (невдач поспіль: {self.failures})"
+
+    def locked(self, now):
+        return self.locked_until is not None and self.locked_until > now
+
+    def blocked(self, now):
+        """Чи не можна зараз оновлювати: триває інше оновлення або пауза."""
+        return self.locked(now) or (self.retry_at is not None and self.retry_at > now)
+
+
+class JobQuerySet(models.QuerySet):
+    def claim(self, worker):
+        """
+        Забрати з черги найстаріше завдання і позначити його виконуваним.
+
+        Умовний UPDATE ... WHERE status='queued' не дасть двом воркерам
+        узяти одне завдання: той, хто не встиг, бере наступне.
+
+        Returns:
+            Job | None: взяте завдання або None, якщо черга порожня
+        """
+        while True:
+            job = self.filter(status=Job.QUEUED).order_by("created_at", "pk").first()
+            if job is None:
+                return None
+            now = timezone.now()
+            claimed = self.filter(pk=job.pk, status=Job.QUEUED).update(
+                status=Job.RUNNING, worker=worker, started_at=now, updated_at=now
+            )
+            if claimed:
+                job.status, job.worker = Job.RUNNING, worker
+                job.started_at = job.updated_at = now
+                return job
+
+    def heartbeat(self):
+        """Позначити завдання вибірки живими (воркер ще виконує їх)."""
+        return self.filter(status=Job.RUNNING).update(updated_at=timezone.now())
+
+    def fail_stale(self, older_than):
+        """
+        Завдання, від яких воркер не звітував довше older_than (timedelta), —
+        воркер зупинився посеред роботи. Вони позначаються невдалими, а не
+        повертаються в чергу: імпорт чи перерахунок може бути виконаний
+        наполовину.
+
+        Returns:
+            int: скільки завдань позначено
+        """
+        now = timezone.now()
+        return self.filter(status=Job.RUNNING, updated_at__lt=now - older_than).update(
+            status=Job.FAILED,
+            error="Воркер зупинився, не завершивши завдання",
+            finished_at=now,
+            updated_at=now,
+        )
+
+
+class Job(models.Model):
+    """
+    Фонове завдання (черга в базі): endpoint ставить його в чергу,
+    команда run_worker виконує (my_app.jobs).
+    """
+
+    QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+    STATUS_CHOICES = [
+        (QUEUED, "У черзі"),
+        (RUNNING, "Виконується"),
+        (SUCCEEDED, "Виконано"),
+        (FAILED, "Помилка"),
+    ]
+
+    kind = models.CharField(max_length=50, verbose_name="Тип завдання")
+    params = models.JSONField(default=dict, blank=True, verbose_name="Параметри")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    progress = models.PositiveSmallIntegerField(default=0, verbose_name="Прогрес, %")
+    message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name="jobs",
+        null=True,
+        blank=True,
+    )
+    # Ім'я воркера (хост:pid), що виконує завдання
+    worker = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Останній звіт воркера: прогрес або heartbeat (див. fail_stale)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = JobQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["-created_at", "-pk"]
+        verbose_name = "Фонове завдання"
+        verbose_name_plural = "Фонові завдання"
+        indexes = [models.Index(fields=["status", "created_at"], name="job_queue")]
+
+    def __str__(self):
+        return f"#{self.pk} {self.kind} ({self.get_status_display()})"
+
+    @property
+    def finished(self):
+        return self.status in (self.SUCCEEDED, self.FAILED)
+
+    def report(self, done=None, total=None, message=None, force=False):
+        """
+        Зберегти прогрес виконання: done з total кроків і/або повідомлення.
+        Записується не частіше JOB_REPORT_INTERVAL секунд (і завжди — на
+        останньому кроці або з force), щоб дрібні кроки не навантажували базу.
+        """
+        if total and done is not None:
+            self.progress = min(100, int(100 * done / total))
+            force = force or done >= total
+        if message is not None:
+            self.message = message[:255]
+        now = time.monotonic()
+        if not force and now - getattr(self, "_reported", 0) < JOB_REPORT_INTERVAL:
+            return
+        self._reported = now
+        Job.objects.filter(pk=self.pk).update(
+            progress=self.progress, message=self.message, updated_at=timezone.now()
+        )
+
+
 class Tournament(models.Model):
     name = models.CharField(max_length=255)
     start_date = models.DateField()
@@ -284,6 +1191,10 @@ class Team(models.Model):
     )
 
     class Meta:
+        indexes = [
+            # Заявки турніру за статусом (?tournament=&status=, адмінка)
+            models.Index(fields=["tournament", "status"], name="team_tour_status"),
+        ]
         verbose_name = "Команда"
         verbose_name_plural = "Команди"
 
@@ -291,6 +1202,187 @@ class Team(models.Model):
         return f"{self.name} ({self.tournament.name})"
 
 
+# Очки за перемогу / нічию і статус матчу, який враховується в таблиці
+POINTS_WIN = 3
+POINTS_DRAW = 1
+COUNTED_MATCH_STATUS = "completed"
+STANDING_FIELDS = [
+    "played",
+    "won",
+    "drawn",
+    "lost",
+    "goals_for",
+    "goals_against",
+    "points",
+]
+# Поля Match, від яких залежить турнірна таблиця
+MATCH_STANDING_FIELDS = [
+    "tournament_id",
+    "home_team_ref_id",
+    "away_team_ref_id",
+    "home_score",
+    "away_score",
+    "status",
+]
+
+
+def match_deltas(home_score, away_score):
+    """Внесок одного матчу в рядки таблиці: (дельта господарів, дельта гостей)."""
+
+    def side(scored, conceded):
+        won, drawn = scored > conceded, scored == conceded
+        return {
+            "played": 1,
+            "won": int(won),
+            "drawn": int(drawn),
+            "lost": int(scored < conceded),
+            "goals_for": scored,
+            "goals_against": conceded,
+            "points": POINTS_WIN * won + POINTS_DRAW * drawn,
+        }
+
+    return side(home_score, away_score), side(away_score, home_score)
+
+
+class StandingQuerySet(models.QuerySet):
+    def apply_match(self, state, sign=1):
+        """
+        Додати (sign=1) або відняти (sign=-1) результат одного матчу.
+
+        Змінюються лише два рядки таблиці — F()-оновленнями, без перерахунку
+        з усіх матчів турніру. Сторона без посилання на команду турніру
+        (home_team_ref / away_team_ref) пропускається.
+
+        Args:
+            state: dict з полями MATCH_STANDING_FIELDS
+        Returns:
+            bool: чи матч враховується в таблиці (і, отже, чи вона змінилася)
+        """
+        if state["status"] != COUNTED_MATCH_STATUS:
+            return False
+        tournament_id = state["tournament_id"]
+        team_ids = (state["home_team_ref_id"], state["away_team_ref_id"])
+        deltas = match_deltas(state["home_score"], state["away_score"])
+        for team_id, delta in zip(team_ids, deltas):
+            if team_id is None:
+                continue
+            updated = self.filter(tournament_id=tournament_id, team_id=team_id).update(
+                **{field: F(field) + sign * value for field, value in delta.items()}
+            )
+            if not updated:
+                self.create(
+                    tournament_id=tournament_id,
+                    team_id=team_id,
+                    **{field: sign * value for field, value in delta.items()},
+                )
+        invalidate_api_cache("standings")
+        return True
+
+    def rerank(self, tournament_id):
+        """
+        Перерахувати місця в турнірі: очки, різниця м'ячів, забиті м'ячі,
+        далі очні зустрічі між командами, що й далі рівні, і назва команди.
+
+        Матчі читаються лише для груп рівних команд (очні зустрічі).
+        """
+        rows = sorted(
+            self.filter(tournament_id=tournament_id).select_related("team"),
+            key=_table_key,
+        )
+        ranked = []
+        for _, group in groupby(rows, key=_table_key):
+            group = list(group)
+            if len(group) > 1:
+                group = _sort_head_to_head(tournament_id, group)
+            ranked += group
+
+        changed = []
+        for rank, row in enumerate(ranked, start=1):
+            if row.rank != rank:
+                row.rank = rank
+                changed.append(row)
+        if changed:
+            self.bulk_update(changed, ["rank"])
+            invalidate_api_cache("standings")
+        return ranked
+
+    def rebuild(self, tournament_id):
+        """
+        Повністю перерахувати таблицю турніру з його матчів (звірка, міграція
+        старих даних). Для кожної команди турніру лишається рівно один рядок.
+        """
+        team_ids = Team.objects.filter(tournament_id=tournament_id).values_list(
+            "pk", flat=True
+        )
+        totals = {pk: dict.fromkeys(STANDING_FIELDS, 0) for pk in team_ids}
+        matches = Match.objects.filter(
+            tournament_id=tournament_id, status=COUNTED_MATCH_STATUS
+        ).values_list(
+            "home_team_ref_id", "away_team_ref_id", "home_score", "away_score"
+        )
+        for home, away, home_score, away_score in matches:
+            for team_id, delta in zip(
+                (home, away), match_deltas(home_score, away_score)
+            ):
+                if team_id in totals:
+                    for field, value in delta.items():
+                        totals[team_id][field] += value
+
+        with transaction.atomic():
+            existing = {}
+            for row in self.filter(tournament_id=tournament_id).order_by("pk"):
+                existing.setdefault(row.team_id, row)
+            rows = []
+            for team_id, values in totals.items():
+                row = existing.get(team_id) or Standing(
+                    tournament_id=tournament_id, team_id=team_id
+                )
+                for field, value in values.items():
+                    setattr(row, field, value)
+                rows.append(row)
+            self.filter(tournament_id=tournament_id).exclude(
+                pk__in=[row.pk for row in rows if row.pk]
+            ).delete()
+            self.bulk_update([row for row in rows if row.pk], STANDING_FIELDS)
+            self.bulk_create([row for row in rows if not row.pk])
+            invalidate_api_cache("standings")
+            return self.rerank(tournament_id)
+
+
+def _rank_key(points, goals_for, goals_against):
+    return (-points, goals_against - goals_for, -goals_for)
+
+
+def _table_key(row):
+    return _rank_key(row.points, row.goals_for, row.goals_against)
+
+
+def _sort_head_to_head(tournament_id, rows):
+    """Впорядкувати рівні за основними показниками команди за очними зустрічями."""
+    team_ids = {row.team_id for row in rows}
+    mini = {team_id: dict.fromkeys(STANDING_FIELDS, 0) for team_id in team_ids}
+    matches = Match.objects.filter(
+        tournament_id=tournament_id,
+        status=COUNTED_MATCH_STATUS,
+        home_team_ref__in=team_ids,
+        away_team_ref__in=team_ids,
+    ).values_list("home_team_ref_id", "away_team_ref_id", "home_score", "away_score")
+    for home, away, home_score, away_score in matches:
+        for team_id, delta in zip((home, away), match_deltas(home_score, away_score)):
+            for field, value in delta.items():
+                mini[team_id][field] += value
+
+    def key(row):
+        table = mini[row.team_id]
+        return (
+            *_rank_key(table["points"], table["goals_for"], table["goals_against"]),
+            row.team.name,
+            row.pk,
+        )
+
+    return sorted(rows, key=key)
+
+
 class Standing(models.Model):
     tournament = models.ForeignKey(
         Tournament, related_name="standings", on_delete=models.CASCADE
@@ -303,8 +1395,15 @@ class Standing(models.Model):
     goals_for = models.IntegerField(default=0)
     goals_against = models.IntegerField(default=0)
     points = models.IntegerField(default=0)
+    rank = models.PositiveIntegerField(default=0, verbose_name="Місце")
+
+    objects = StandingQuerySet.as_manager()
 
     class Meta:
+        ordering = ["tournament_id", "rank", "pk"]
+        indexes = [
+            models.Index(fields=["tournament", "rank"], name="standing_tour_rank"),
+        ]
         verbose_name = "Рядок турнірної таблиці"
         verbose_name_plural = "Рядки турнірної таблиці"
 
@@ -314,12 +1413,333 @@ class Match(models.Model):
         Tournament, related_name="matches", on_delete=models.CASCADE
     )
     date = models.DateTimeField()
+    # Назви команд — денормалізовані поля для відображення; зв'язок з
+    # командами турніру — home_team_ref / away_team_ref
     home_team = models.CharField(max_length=100)
     away_team = models.CharField(max_length=100)
+    home_team_ref = models.ForeignKey(
+        Team,
+        related_name="home_matches",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name="Господарі",
+    )
+    away_team_ref = models.ForeignKey(
+        Team,
+        related_name="away_matches",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name="Гості",
+    )
     home_score = models.IntegerField(default=0)
     away_score = models.IntegerField(default=0)
     status = models.CharField(max_length=50, default="completed")
 
     class Meta:
+        indexes = [
+            models.Index(fields=["tournament", "date"], name="match_tour_date"),
+            # Keyset-пагінація матчів без фільтра турніру (date, id)
+            models.Index(fields=["date"], name="match_date"),
+            models.Index(
+                fields=["home_team_ref", "away_team_ref"], name="match_home_away"
+            ),
+        ]
         verbose_name = "Матч"
         verbose_name_plural = "Матчі"
+
+    def save(self, *args, **kwargs):
+        self.resolve_teams()
+        super().save(*args, **kwargs)
+
+    def resolve_teams(self):
+        """
+        Узгодити посилання на команди з назвами: назва береться з команди,
+        а якщо посилання немає — команда шукається за назвою в турнірі.
+        """
+        for side in ("home", "away"):
+            team = getattr(self, f"{side}_team_ref")
+            name = getattr(self, f"{side}_team")
+            if team is not None:
+                setattr(self, f"{side}_team", team.name)
+            elif name:
+                team = (
+                    Team.objects.filter(tournament_id=self.tournament_id, name=name)
+                    .order_by("pk")
+                    .first()
+                )
+                setattr(self, f"{side}_team_ref", team)
+
+
+@receiver(post_save, sender=Team)
+def sync_match_team_names(sender, instance, created, raw=False, **kwargs):
+    """Оновити денормалізовані назви команди в її матчах після перейменування"""
+    if created or raw:
+        return
+    renamed = 0
+    for side in ("home", "away"):
+        renamed += (
+            Match.objects.filter(**{f"{side}_team_ref": instance})
+            .exclude(**{f"{side}_team": instance.name})
+            .update(**{f"{side}_team": instance.name})
+        )
+    if renamed:
+        invalidate_api_cache("matches")
+
+
+def _match_state(match):
+    return {field: getattr(match, field) for field in MATCH_STANDING_FIELDS}
+
+
+@receiver(pre_save, sender=Match)
+def remember_match_result(sender, instance, raw=False, **kwargs):
+    """Запам'ятати попередній результат матчу, щоб відняти його з таблиці"""
+    instance._standing_previous = None
+    if instance.pk and not raw:
+        instance._standing_previous = (
+            Match.objects.filter(pk=instance.pk).values(*MATCH_STANDING_FIELDS).first()
+        )
+
+
+@receiver(post_save, sender=Match)
+def apply_match_to_standings(sender, instance, raw=False, **kwargs):
+    """Застосувати до турнірної таблиці лише дельту зміненого матчу"""
+    if raw:
+        return
+    previous = getattr(instance, "_standing_previous", None)
+    current = _match_state(instance)
+    if previous == current:
+        return
+    with transaction.atomic():
+        changed = set()
+        if previous and Standing.objects.apply_match(previous, sign=-1):
+            changed.add(previous["tournament_id"])
+        if Standing.objects.apply_match(current):
+            changed.add(current["tournament_id"])
+        for tournament_id in changed:
+            Standing.objects.rerank(tournament_id)
+
+
+@receiver(post_delete, sender=Match)
+def remove_match_from_standings(sender, instance, origin=None, **kwargs):
+    """Відняти видалений матч з таблиці (крім каскадного видалення турніру)"""
+    # origin — турнір або queryset турнірів (масова дія в адмінці)
+    if getattr(origin, "model", type(origin)) is not Match:
+        return
+    state = _match_state(instance)
+    if Standing.objects.apply_match(state, sign=-1):
+        Standing.objects.rerank(state["tournament_id"])
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def refresh_user_roles(sender, instance, action, reverse, pk_set, **kwargs):
+    """Оновити кеш ролей (my_app.roles) після зміни груп користувача"""
+    if action == "pre_clear" and reverse:
+        # group.user_set.clear(): після очищення учасників уже не знайти
+        instance._member_ids = list(instance.user_set.values_list("pk", flat=True))
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        instance.__dict__.pop("_roles", None)
+        user_ids = [instance.pk]
+    elif action == "post_clear":
+        user_ids = instance.__dict__.pop("_member_ids", [])
+    else:
+        user_ids = list(pk_set)
+    refresh_roles(user_ids)
+
+
+@receiver(pre_delete, sender=Group)
+def remember_group_members(sender, instance, **kwargs):
+    instance._member_ids = list(instance.user_set.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def refresh_group_member_roles(sender, instance, created=False, **kwargs):
+    """Перейменування чи видалення групи змінює ролі всіх її учасників"""
+    if created:
+        return
+    member_ids = instance.__dict__.pop("_member_ids", None)
+    if member_ids is None:
+        member_ids = list(instance.user_set.values_list("pk", flat=True))
+    refresh_roles(member_ids)
+
+
+class PlayerSearchQuerySet(models.QuerySet):
+    def reindex(self, player_ids, rosters=None):
+        """
+        Перебудувати документи пошуку гравців одним upsert'ом.
+
+        Args:
+            player_ids: id гравців
+            rosters: результат roster_teams() (щоб не читати команди для
+                кожного пакета при повній перебудові)
+        Returns:
+            int: кількість записаних документів
+        """
+        players = list(
+            Player.objects.filter(pk__in=list(player_ids)).values_list(
+                "pk", "user__username", "user__first_name", "user__last_name"
+            )
+        )
+        if not players:
+            return 0
+        if rosters is None:
+            rosters = roster_teams()
+        documents = []
+        for pk, username, first_name, last_name in players:
+            key = name_key(first_name, last_name)
+            teams = rosters.get(key, ()) if key else ()
+            documents.append(
+                PlayerSearchDocument(
+                    player_id=pk,
+                    name_key=key,
+                    document=build_document(username, first_name, last_name, teams),
+                )
+            )
+        self.bulk_create(
+            documents,
+            update_conflicts=True,
+            unique_fields=["player"],
+            update_fields=["name_key", "document"],
+            batch_size=500,
+        )
+        invalidate_api_cache("players")
+        return len(documents)
+
+    def rebuild(self, chunk_size=2000):
+        """Перебудувати документи всіх гравців пакетами по chunk_size."""
+        rosters = roster_teams()
+        player_ids = list(Player.objects.order_by("pk").values_list("pk", flat=True))
+        return sum(
+            self.reindex(player_ids[start : start + chunk_size], rosters)
+            for start in range(0, len(player_ids), chunk_size)
+        )
+
+    def for_roster_keys(self, keys):
+        """id гравців, чиє ім'я збігається з одним з ключів заявки"""
+        keys = [key for key in keys if key]
+        return list(self.filter(name_key__in=keys).values_list("player_id", flat=True))
+
+
+def roster_teams():
+    """{ключ імені з заявки: [назви команд]} по всіх командах (один запит)."""
+    rosters = {}
+    for team_name, roster in Team.objects.values_list("name", "player_roster"):
+        for entry in roster or ():
+            teams = rosters.setdefault(name_key(entry), [])
+            if team_name not in teams:
+                teams.append(team_name)
+    return rosters
+
+
+def _roster_keys(roster):
+    return {name_key(entry) for entry in roster or ()}
+
+
+class PlayerSearchDocument(models.Model):
+    """
+    Нормалізований текст гравця для пошуку (my_app.search): логін,
+    ім'я, прізвище і команди, в заявках яких є гравець з таким іменем.
+    На SQLite дзеркалиться тригерами в FTS5-таблицю search.FTS_TABLE.
+    """
+
+    player = models.OneToOneField(
+        Player,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="search_document",
+    )
+    # Токени імені й прізвища в алфавітному порядку — для зв'язку з заявками
+    name_key = models.CharField(max_length=255, db_index=True)
+    document = models.TextField()
+
+    objects = PlayerSearchQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Пошуковий документ гравця"
+        verbose_name_plural = "Пошукові документи гравців"
+
+    def __str__(self):
+        return f"{self.player_id}:{self.document.strip()}"
+
+
+@receiver(post_save, sender=Player)
+def index_player(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Проіндексувати нового гравця або гравця, якого перепризначили користувачу"""
+    if raw or (update_fields is not None and "user" not in update_fields):
+        return
+    PlayerSearchDocument.objects.reindex([instance.pk])
+
+
+@receiver(post_save, sender=User)
+def index_user_player(
+    sender, instance, created, raw=False, update_fields=None, **kwargs
+):
+    """Оновити пошуковий документ після зміни логіна чи імені користувача"""
+    if created or raw:
+        return
+    if update_fields is not None and not {
+        "username",
+        "first_name",
+        "last_name",
+    } & set(update_fields):
+        return
+    player_ids = Player.objects.filter(user=instance).values_list("pk", flat=True)
+    PlayerSearchDocument.objects.reindex(player_ids)
+
+
+@receiver(pre_save, sender=Team)
+def remember_team_roster(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    instance._search_previous = (
+        Team.objects.filter(pk=instance.pk).values_list("name", "player_roster").first()
+    )
+
+
+@receiver(post_save, sender=Team)
+@receiver(post_delete, sender=Team)
+def index_team_roster(sender, instance, raw=False, **kwargs):
+    """Переіндексувати гравців, яких торкнулася зміна назви чи заявки команди"""
+    if raw:
+        return
+    keys = _roster_keys(instance.player_roster)
+    previous = instance.__dict__.pop("_search_previous", None)
+    if previous is not None:
+        old_name, old_roster = previous
+        if old_name == instance.name and old_roster == instance.player_roster:
+            return
+        keys |= _roster_keys(old_roster)
+    player_ids = PlayerSearchDocument.objects.for_roster_keys(keys)
+    PlayerSearchDocument.objects.reindex(player_ids)
+
+
+# Групи кешу API (my_app.api_cache), які застарівають після запису в модель
+API_CACHE_SCOPES = {
+    Tournament: ("tournaments",),
+    Team: ("teams",),
+    Standing: ("standings",),
+    Match: ("matches",),
+    Player: ("players",),
+    PlayerStats: ("players",),
+}
+
+
+def invalidate_api_cache_on_write(sender, **kwargs):
+    """Скинути закешовані відповіді API, що залежать від зміненої моделі"""
+    invalidate_api_cache(*API_CACHE_SCOPES[sender])
+
+
+for _model in API_CACHE_SCOPES:
+    post_save.connect(invalidate_api_cache_on_write, sender=_model)
+    post_delete.connect(invalidate_api_cache_on_write, sender=_model)
+
+
+@receiver([post_save, post_delete], sender=UPLSquadCache)
+def bump_upl_squads_version(sender, **kwargs):
+    """Скинути копії складів у пам'яті процесів (bulk-запис міняє версію сам)"""
+    CacheVersion.objects.bump(UPL_SQUADS_VERSION)
@@ -0,0 +1,259 @@
+"""
+Класи пагінації API.
+
+StandardPagination — сторінки за номером (?page=N) для невеликих списків
+і для результатів, упорядкованих не за полями моделі (релевантність
+пошуку). KeysetPagination — для списків, упорядкованих за полями моделі:
+?cursor= з поля "next" відбирає рядки після останнього рядка попередньої
+сторінки умовою WHERE за ключем сортування, без OFFSET, тож будь-яка
+сторінка коштує стільки ж, скільки перша.
+
+Спільне для обох:
+    ?page_size=M  розмір сторінки, не більше MAX_PAGE_SIZE;
+    ?count=       чи рахувати "count" — COUNT(*) по всій вибірці.
+                  StandardPagination рахує, доки не передано ?count=false,
+                  KeysetPagination — лише з ?count=true.
+"""
+
+import base64
+import datetime
+import decimal
+import json
+import operator
+from functools import reduce
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections
+from django.db.models import Q
+
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+DEFAULT_PAGE_SIZE = api_settings.PAGE_SIZE or 20
+MAX_PAGE_SIZE = 100
+
+_TRUE = ("1", "true", "yes", "on")
+_FALSE = ("0", "false", "no", "off")
+
+
+def _count_requested(request, default):
+    value = request.query_params.get("count", "").strip().lower()
+    if value in _TRUE:
+        return True
+    if value in _FALSE:
+        return False
+    return default
+
+
+class StandardPagination(PageNumberPagination):
+    """
+    ?page=N&page_size=M. З ?count=false сторінка читається з одним зайвим
+    рядком замість COUNT(*): "next" відомий, "count" у відповіді немає.
+    """
+
+    page_size = DEFAULT_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.counted = _count_requested(request, default=True)
+        if self.counted:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        try:
+            self.number = int(request.query_params.get(self.page_query_param, 1))
+        except ValueError:
+            self.number = 0
+        if self.number < 1:
+            raise NotFound(self.invalid_page_message.format(page_number=self.number))
+
+        offset = (self.number - 1) * page_size
+        rows = list(queryset[offset : offset + page_size + 1])
+        if not rows and self.number > 1:
+            raise NotFound(self.invalid_page_message.format(page_number=self.number))
+        self.has_next = len(rows) > page_size
+        return rows[:page_size]
+
+    def get_next_link(self):
+        if self.counted:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.page_query_param, self.number + 1)
+
+    def get_previous_link(self):
+        if self.counted:
+            return super().get_previous_link()
+        if self.number == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.number - 1)
+
+    def get_paginated_response(self, data):
+        if self.counted:
+            return super().get_paginated_response(data)
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset-пагінація вперед: ?cursor=<токен з "next">&page_size=M.
+
+    Порядок — ordering view (або аргумент конструктора): поля моделі з
+    необов'язковим "-", останнє має бути унікальним ("pk"), щоб рядки з
+    однаковим значенням не губилися між сторінками. Cursor кодує значення
+    полів ordering останнього рядка сторінки; наступна сторінка — рядки,
+    що йдуть за ним у цьому порядку. Для сталої ціни глибоких сторінок
+    потрібен індекс у тому ж порядку (або у зворотному цілком).
+    """
+
+    page_size = DEFAULT_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = MAX_PAGE_SIZE
+    cursor_query_param = "cursor"
+    ordering = ("pk",)
+
+    def __init__(self, ordering=None, page_size=None):
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+        if page_size is not None:
+            self.page_size = page_size
+
+    def get_ordering(self, view):
+        return tuple(getattr(view, "ordering", None) or self.ordering)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self.get_ordering(view)
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        self.count = (
+            queryset.count() if _count_requested(request, default=False) else None
+        )
+
+        token = request.query_params.get(self.cursor_query_param)
+        if token:
+            try:
+                values = self.decode_cursor(token)
+                queryset = self._after(queryset, values, page_size + 1)
+            except (DjangoValidationError, TypeError, ValueError):
+                raise ValidationError({self.cursor_query_param: "Некоректний cursor"})
+
+        # page_size + 1 рядок, щоб дізнатися, чи є наступна сторінка
+        rows = list(queryset[: page_size + 1])
+        self.next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            self.next_cursor = self.encode_cursor(self._key(rows[-1]))
+        return rows
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        payload = {"next": self.get_next_link(), "results": data}
+        if self.count is not None:
+            payload = {"count": self.count, **payload}
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "count": {"type": "integer"},
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def _key(self, obj):
+        values = []
+        for field in self.ordering:
+            value = obj
+            for attr in field.lstrip("-").split("__"):
+                value = getattr(value, attr)
+            values.append(value)
+        return values
+
+    def _after(self, queryset, values, limit):
+        """
+        Рядки queryset, що йдуть після ключа values у порядку ordering:
+        (a > x) OR (a = x AND b > y) ... ("<" для полів за спаданням).
+
+        Кожна гілка OR — окремий підзапит id з тим самим порядком і LIMIT:
+        вона читає індекс від позиції cursor, а зовнішній запит сортує не
+        більше limit рядків на гілку. Одна умова з OR змусила б базу йти
+        індексом з початку повз усі рядки з однаковим a (SQLite не
+        використовує для цього і порівняння кортежів (a, b) < (x, y)).
+        """
+        branches = []
+        equal = {}
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            branches.append(Q(**equal, **{f"{name}__{lookup}": value}))
+            equal[name] = value
+
+        if not connections[queryset.db].features.allow_sliced_subqueries_with_in:
+            first = self.ordering[0]
+            bound = "lte" if first.startswith("-") else "gte"
+            return queryset.filter(
+                Q(**{f"{first.lstrip('-')}__{bound}": values[0]}),
+                reduce(operator.or_, branches),
+            )
+
+        ids = queryset.order_by(*self.ordering).values("pk")
+        return queryset.filter(
+            reduce(
+                operator.or_,
+                (Q(pk__in=ids.filter(branch)[:limit]) for branch in branches),
+            )
+        )
+
+    @staticmethod
+    def encode_cursor(values):
+        # Значення як рядки без втрати точності (DjangoJSONEncoder обрізає
+        # мікросекунди, і рядки з тієї ж мілісекунди загубилися б)
+        encoded = [
+            (
+                value.isoformat()
+                if isinstance(value, (datetime.date, datetime.time))
+                else str(value) if isinstance(value, decimal.Decimal) else value
+            )
+            for value in values
+        ]
+        raw = json.dumps(encoded, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, token):
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise ValueError(token)
+        return values
@@ -0,0 +1,143 @@
+"""
+Аудит планів SQL-запитів API.
+
+explain_endpoint() виконує GET endpoint'у з my_app.benchmark і для кожного
+SELECT, який той надіслав, отримує план (EXPLAIN QUERY PLAN на SQLite,
+EXPLAIN на PostgreSQL) та позначає повні перегляди таблиць:
+
+    SQLite      SCAN <таблиця> (з індексом чи без)
+    PostgreSQL  Seq Scan on <таблиця>
+
+Перегляд не вважається повним, якщо це сторінка списку — обхід на
+верхньому рівні запиту з LIMIT і без WHERE: він зупиняється після LIMIT
+рядків. Обхід з WHERE такої межі не має — для рідкісного значення фільтра
+він пройде всю таблицю, тож позначається. COUNT по всій таблиці
+(лічильник пагінації, підсумки) переглядає її неминуче — такі плани
+позначені full_count, щоб звіт відділяв їх від пропущених індексів.
+
+Використовується командою explain_api.
+"""
+
+import re
+from dataclasses import dataclass, field
+
+from django.db import connection as default_connection
+from django.test.utils import CaptureQueriesContext
+
+from .benchmark import _client
+
+_SQLITE_SCAN = re.compile(r"^SCAN (\w+)")
+_SQLITE_SUBQUERY = re.compile(r"^(?:CO-ROUTINE|MATERIALIZE) (\S+)")
+_POSTGRES_SCAN = re.compile(r"Seq Scan on (\w+)")
+
+
+@dataclass
+class QueryPlan:
+    sql: str
+    # Рядки плану з відступом за вкладеністю
+    lines: list = field(default_factory=list)
+    # Рядки плану з повним переглядом таблиці
+    scans: list = field(default_factory=list)
+    # COUNT по всій таблиці без WHERE
+    full_count: bool = False
+
+
+def _top_level(sql):
+    """SQL без вмісту дужок і лапок — лише зовнішній запит, у верхньому регістрі."""
+    depth, quote, chars = 0, None, []
+    for char in sql:
+        if quote:
+            quote = None if char == quote else quote
+        elif char in "'\"":
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif depth == 0:
+            chars.append(char)
+    return " ".join("".join(chars).upper().split())
+
+
+def is_page_walk(sql):
+    """Зовнішній запит — сторінка списку: є LIMIT і немає WHERE."""
+    top = f" {_top_level(sql)} "
+    return " LIMIT " in top and " WHERE " not in top
+
+
+def is_full_count(sql):
+    """Зовнішній запит — COUNT без WHERE (агрегат по всій таблиці)."""
+    top = f" {_top_level(sql)} "
+    return top.startswith(" SELECT COUNT") and " WHERE " not in top
+
+
+def explain(sql, connection=default_connection):
+    """
+    План запиту sql (з підставленими параметрами, як у connection.queries).
+
+    Returns:
+        QueryPlan або None, якщо база не SQLite і не PostgreSQL
+    """
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            rows = cursor.fetchall()
+        return _sqlite_plan(sql, rows)
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN {sql}")
+            lines = [row[0] for row in cursor.fetchall()]
+        scans = []
+        if not (lines and lines[0].startswith("Limit") and is_page_walk(sql)):
+            scans = [line for line in lines if _POSTGRES_SCAN.search(line)]
+        return QueryPlan(sql, lines, scans, is_full_count(sql))
+    return None
+
+
+def _sqlite_plan(sql, rows):
+    # Рядок плану SQLite: (id, id батьківського вузла, -, опис)
+    depth = {0: -1}
+    subqueries = set()
+    plan = QueryPlan(sql, full_count=is_full_count(sql))
+    page_walk = is_page_walk(sql)
+    for node, parent, _, detail in rows:
+        depth[node] = depth.get(parent, -1) + 1
+        plan.lines.append("  " * depth[node] + detail)
+        named = _SQLITE_SUBQUERY.match(detail)
+        if named:
+            subqueries.add(named.group(1))
+        scan = _SQLITE_SCAN.match(detail)
+        if (
+            scan
+            and scan.group(1) not in subqueries
+            and scan.group(1) != "CONSTANT"
+            and "VIRTUAL TABLE" not in detail
+            and not (page_walk and parent == 0)
+        ):
+            plan.scans.append(detail)
+    return plan
+
+
+def explain_endpoint(endpoint, ids, connection=default_connection):
+    """
+    Виконати GET endpoint'у і отримати плани всіх його SELECT-запитів.
+
+    Returns:
+        list[QueryPlan] у порядку виконання запитів
+    """
+    client = _client(ids, endpoint.auth)
+    url = endpoint.url(ids)
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    # Копіюємо одразу: request_started наступного запиту очищує connection.queries
+    captured = [query["sql"] for query in ctx.captured_queries]
+    if response.status_code != 200:
+        raise AssertionError(f"{endpoint.name}: {url} -> {response.status_code}")
+
+    plans = []
+    for sql in captured:
+        if sql.lstrip().upper().startswith(("SELECT", "WITH")):
+            plan = explain(sql, connection)
+            if plan is not None:
+                plans.append(plan)
+    return plans
@@ -0,0 +1,238 @@
+"""
+Єдиний рушій рейтингу гравців для my_app і backend.players.
+
+Формула рейтингу матчу — змінна стратегія (RatingFormula): поточна
+xG-формула (rating_kernel) або стара формула з вагами backend.players.
+RatingEngine рахує рейтинги пакетами по queryset'ах статистики і кешує
+результат calculate_rating для кожного гравця за ключем його стану —
+версією статистики гравця в кеші Django (my_app.api_cache), яку змінюють
+сигнали запису статистики, — тож повторні виклики без нових матчів не
+звертаються до бази.
+"""
+
+import threading
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+import numpy as np
+
+from . import api_cache, rating_kernel
+
+
+class RatingFormula:
+    """Стратегія рейтингу матчу: векторизований розрахунок у десятих бала."""
+
+    name = None
+    columns = ()
+
+    def match_ratings(self, positions, **columns):
+        """
+        Args:
+            positions: коди позицій ("GK", "DEF", ...) для кожного рядка
+            **columns: колонки статистики з self.columns
+        Returns:
+            np.ndarray[int64]: рейтинги матчів у десятих бала
+        """
+        raise NotImplementedError
+
+
+class XGFormula(RatingFormula):
+    """xG-натхнена формула PlayerStats._calculate_match_rating (my_app)."""
+
+    name = "xg"
+    columns = rating_kernel.COLUMNS
+
+    def match_ratings(self, positions, **columns):
+        codes = [rating_kernel.position_code(position) for position in positions]
+        return rating_kernel.match_ratings(codes, **columns)
+
+
+class LegacyWeightsFormula(RatingFormula):
+    """Стара формула backend.players: 5.0 + голи/асисти мінус картки."""
+
+    name = "legacy"
+    # Ваги в десятих бала
+    WEIGHTS = {"goals": 30, "assists": 20, "yellow_cards": -10, "red_cards": -30}
+    BASE, MIN, MAX = 50, 10, 100
+    columns = tuple(WEIGHTS)
+
+    def match_ratings(self, positions, **columns):
+        score = np.full(len(positions), self.BASE, dtype=np.int64)
+        for name, weight in self.WEIGHTS.items():
+            score += np.asarray(columns[name], dtype=np.int64) * weight
+        return np.clip(score, self.MIN, self.MAX)
+
+
+FORMULAS = {formula.name: formula for formula in (XGFormula(), LegacyWeightsFormula())}
+
+
+def average_rating(ratings):
+    """Середнє рейтингів матчів, округлене до 2 знаків (0.00, якщо матчів немає)."""
+    ratings = list(ratings)
+    if not ratings:
+        return Decimal("0.00")
+    return round(sum(ratings, Decimal("0")) / len(ratings), 2)
+
+
+class RatingEngine:
+    """
+    Рушій overall_rating для конкретної пари моделей статистики / історії.
+
+    Args:
+        formula: RatingFormula або її ім'я з FORMULAS
+        stats_model: модель статистики матчу (FK player, поле rating)
+        history_model: модель історії рейтингу (player, rating)
+        window: скільки останніх матчів враховувати (None — усі)
+        update_matches_played: чи записувати matches_played у гравця
+        state_key: функція player -> ключ стану для кешу; за замовчуванням
+            версія статистики гравця в кеші Django без запиту до бази.
+            Версію змінюють post_save/post_delete stats_model і rescore;
+            масові queryset.update()/bulk_create в обхід сигналів мають
+            викликати forget()
+        on_rescored: функція(player_ids), яка викликається після того, як
+            evaluate-перерахунок змінив збережені рейтинги матчів
+        memo_size: максимум гравців у кеші (LRU)
+    """
+
+    def __init__(
+        self,
+        formula,
+        stats_model,
+        history_model,
+        window=None,
+        update_matches_played=True,
+        state_key=None,
+        on_rescored=None,
+        memo_size=10000,
+    ):
+        self.formula = FORMULAS[formula] if isinstance(formula, str) else formula
+        self.stats_model = stats_model
+        self.history_model = history_model
+        self.window = window
+        self.update_matches_played = update_matches_played
+        self.state_key = state_key or self._default_state_key
+        self._versioned = state_key is None
+        if self._versioned:
+            post_save.connect(self._stats_written, sender=stats_model)
+            post_delete.connect(self._stats_written, sender=stats_model)
+        self.on_rescored = on_rescored
+        self.memo_size = memo_size
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _version_scope(self, player_id):
+        return f"rating:{self.stats_model._meta.label_lower}:{player_id}"
+
+    def _default_state_key(self, player):
+        return api_cache.get_versions([self._version_scope(player.pk)])[0]
+
+    def _stats_written(self, sender, instance, **kwargs):
+        api_cache.invalidate(self._version_scope(instance.player_id))
+
+    def evaluate(self, stats):
+        """
+        Перерахувати рейтинги матчів для queryset'у статистики одним запитом.
+
+        Returns:
+            dict: {stat_id: (player_id, збережений рейтинг, новий рейтинг)}
+        """
+        rows = list(
+            stats.values_list(
+                "id", "player_id", "rating", "player__position", *self.formula.columns
+            )
+        )
+        if not rows:
+            return {}
+        ids, player_ids, stored, positions, *columns = zip(*rows)
+        tenths = self.formula.match_ratings(
+            positions, **dict(zip(self.formula.columns, columns))
+        )
+        return {
+            stat_id: (player_id, old, rating_kernel.tenths_to_decimal(new))
+            for stat_id, player_id, old, new in zip(ids, player_ids, stored, tenths)
+        }
+
+    def rescore(self, stats):
+        """
+        Записати рейтинги матчів, що розійшлися з формулою, одним bulk_update.
+
+        Returns:
+            set: id гравців, чиї рейтинги матчів змінилися
+        """
+        return self._save_stale(self.evaluate(stats))
+
+    def _save_stale(self, evaluated):
+        stale = [
+            self.stats_model(id=stat_id, rating=new)
+            for stat_id, (_, old, new) in evaluated.items()
+            if old != new
+        ]
+        if not stale:
+            return set()
+        self.stats_model.objects.bulk_update(stale, ["rating"])
+        player_ids = {evaluated[stat.id][0] for stat in stale}
+        if self._versioned:
+            # bulk_update не надсилає сигналів
+            api_cache.invalidate(*map(self._version_scope, player_ids))
+        if self.on_rescored:
+            self.on_rescored(player_ids)
+        return player_ids
+
+    def calculate_rating(self, player):
+        """
+        Перерахувати і зберегти overall_rating гравця.
+
+        Якщо стан гравця (state_key) не змінився з попереднього виклику,
+        повертає закешований результат без жодного запиту до рейтингових
+        таблиць. Запис в історію додається лише при зміні рейтингу.
+        """
+        key = self.state_key(player)
+        with self._lock:
+            cached = self._memo.get(player.pk)
+            if cached is not None and cached[0] == key:
+                self._memo.move_to_end(player.pk)
+                return cached[1]
+
+        stats = self.stats_model.objects.filter(player=player).order_by(
+            "-created_at", "-id"
+        )
+        if self.window:
+            stats = stats[: self.window]
+
+        with transaction.atomic():
+            evaluated = self.evaluate(stats)
+            if self._save_stale(evaluated):
+                player.refresh_from_db()
+            new_rating = average_rating(new for _, _, new in evaluated.values())
+
+            update_fields = []
+            if self.update_matches_played and player.matches_played != len(evaluated):
+                player.matches_played = len(evaluated)
+                update_fields.append("matches_played")
+            if player.overall_rating != new_rating:
+                player.overall_rating = new_rating
+                update_fields.append("overall_rating")
+                self.history_model.objects.create(player=player, rating=new_rating)
+            if update_fields:
+                player.save(update_fields=update_fields)
+
+        self._remember(player.pk, self.state_key(player), new_rating)
+        return new_rating
+
+    def _remember(self, player_id, key, rating):
+        with self._lock:
+            self._memo[player_id] = (key, rating)
+            self._memo.move_to_end(player_id)
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+
+    def forget(self, player_id=None):
+        """Скинути кеш одного гравця (або весь кеш, якщо player_id не вказано)."""
+        with self._lock:
+            if player_id is None:
+                self._memo.clear()
+            else:
+                self._memo.pop(player_id, None)
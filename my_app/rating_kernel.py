@@ -0,0 +1,162 @@
+"""
+Ядро формули рейтингу матчу (PlayerStats._calculate_match_rating).
+
+Усі ваги формули кратні 0.05, тому розрахунок ведеться в цілих сотих бала:
+без Decimal і без похибок float. Після округлення до 0.1 (банківське
+округлення, як у round(Decimal, 1)) результат побітово збігається з
+початковою Decimal-формулою.
+
+match_rating() — скалярний варіант для одного рядка (PlayerStats.save()),
+match_ratings() — векторизований NumPy-варіант для масового імпорту і
+повного перерахунку (команда rescore_stats).
+"""
+
+from decimal import Decimal
+
+import numpy as np
+
+# Коди позицій для колонкових масивів; будь-яка інша позиція -> OTHER
+POSITION_CODES = {"GK": 0, "DEF": 1, "MID": 2, "FWD": 3}
+OTHER_POSITION = 4
+
+# Ваги в сотих бала, індекс — код позиції
+BASE_SCORE = 500
+GOAL_WEIGHTS = (50, 150, 150, 100, 100)
+ASSIST_WEIGHT = 100
+SOT_WEIGHT, SOT_CAP = 20, 150
+KEY_PASS_WEIGHT, KEY_PASS_CAP = 15, 90
+SAVE_WEIGHT, SAVE_CAP = 30, 200
+DEFENSIVE_WEIGHT, DEFENSIVE_CAP = 10, 100
+YELLOW_PENALTY, RED_PENALTY = 100, 300
+MIN_SCORE, MAX_SCORE = 100, 1000
+
+# (менше ніж N хвилин, штраф) — перевіряються по черзі
+MINUTES_PENALTIES = ((20, 150), (45, 75), (60, 25))
+
+# Позиції, для яких рахуються сейви / оборонні дії
+SAVE_POSITIONS = (POSITION_CODES["GK"],)
+DEFENSIVE_POSITIONS = (
+    POSITION_CODES["GK"],
+    POSITION_CODES["DEF"],
+    POSITION_CODES["MID"],
+)
+
+COLUMNS = (
+    "goals",
+    "assists",
+    "shots_on_target",
+    "key_passes",
+    "saves",
+    "tackles",
+    "interceptions",
+    "yellow_cards",
+    "red_cards",
+    "minutes_played",
+)
+
+
+def position_code(position):
+    return POSITION_CODES.get(position, OTHER_POSITION)
+
+
+def _round_tenths(hundredths):
+    """Округлити цілі соті до десятих за правилом ROUND_HALF_EVEN."""
+    tenths, rest = divmod(hundredths, 10)
+    if rest > 5 or (rest == 5 and tenths % 2):
+        tenths += 1
+    return tenths
+
+
+def match_rating(
+    position,
+    goals=0,
+    assists=0,
+    shots_on_target=0,
+    key_passes=0,
+    saves=0,
+    tackles=0,
+    interceptions=0,
+    yellow_cards=0,
+    red_cards=0,
+    minutes_played=90,
+):
+    """
+    Рейтинг одного матчу (1.0 – 10.0) як Decimal з одним знаком після коми.
+    """
+    code = position_code(position)
+    score = BASE_SCORE
+
+    for limit, penalty in MINUTES_PENALTIES:
+        if minutes_played < limit:
+            score -= penalty
+            break
+
+    score += goals * GOAL_WEIGHTS[code]
+    score += assists * ASSIST_WEIGHT
+    score += min(shots_on_target * SOT_WEIGHT, SOT_CAP)
+    score += min(key_passes * KEY_PASS_WEIGHT, KEY_PASS_CAP)
+    if code in SAVE_POSITIONS:
+        score += min(saves * SAVE_WEIGHT, SAVE_CAP)
+    if code in DEFENSIVE_POSITIONS:
+        score += min((tackles + interceptions) * DEFENSIVE_WEIGHT, DEFENSIVE_CAP)
+    score -= yellow_cards * YELLOW_PENALTY
+    score -= red_cards * RED_PENALTY
+
+    score = max(MIN_SCORE, min(MAX_SCORE, score))
+    return Decimal(_round_tenths(score)).scaleb(-1)
+
+
+def match_ratings(positions, **columns):
+    """
+    Векторизований рейтинг матчів.
+
+    Args:
+        positions: масив кодів позицій (див. POSITION_CODES / position_code)
+        **columns: масиви статистики з іменами з COLUMNS; відсутні колонки
+            вважаються нулями (minutes_played — 90)
+    Returns:
+        np.ndarray[int64]: рейтинги в десятих бала (76 означає 7.6)
+    """
+    codes = np.asarray(positions, dtype=np.int64)
+    size = codes.shape[0]
+
+    def column(name, default=0):
+        values = columns.get(name)
+        if values is None:
+            return np.full(size, default, dtype=np.int64)
+        return np.asarray(values, dtype=np.int64)
+
+    minutes = column("minutes_played", 90)
+    score = np.full(size, BASE_SCORE, dtype=np.int64)
+
+    penalty = np.zeros(size, dtype=np.int64)
+    for limit, value in reversed(MINUTES_PENALTIES):
+        penalty = np.where(minutes < limit, value, penalty)
+    score -= penalty
+
+    score += column("goals") * np.asarray(GOAL_WEIGHTS, dtype=np.int64)[codes]
+    score += column("assists") * ASSIST_WEIGHT
+    score += np.minimum(column("shots_on_target") * SOT_WEIGHT, SOT_CAP)
+    score += np.minimum(column("key_passes") * KEY_PASS_WEIGHT, KEY_PASS_CAP)
+
+    saves = np.minimum(column("saves") * SAVE_WEIGHT, SAVE_CAP)
+    score += np.where(np.isin(codes, SAVE_POSITIONS), saves, 0)
+
+    defensive = np.minimum(
+        (column("tackles") + column("interceptions")) * DEFENSIVE_WEIGHT,
+        DEFENSIVE_CAP,
+    )
+    score += np.where(np.isin(codes, DEFENSIVE_POSITIONS), defensive, 0)
+
+    score -= column("yellow_cards") * YELLOW_PENALTY
+    score -= column("red_cards") * RED_PENALTY
+
+    np.clip(score, MIN_SCORE, MAX_SCORE, out=score)
+    tenths, rest = np.divmod(score, 10)
+    tenths += (rest > 5) | ((rest == 5) & (tenths % 2 == 1))
+    return tenths
+
+
+def tenths_to_decimal(tenths):
+    """Перетворити рейтинг у десятих (з match_ratings) на Decimal для моделі."""
+    return Decimal(int(tenths)).scaleb(-1)
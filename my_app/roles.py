@@ -0,0 +1,139 @@
+"""
+Ролі користувачів (групи Django) без запиту до бази на кожну перевірку.
+
+Ролі користувача — множина назв його груп. Вони визначаються один раз
+на запит (результат запам'ятовується на об'єкті request.user, тож усі
+permission-класи і серіалізатори одного запиту поділяють його) у такому
+порядку:
+
+    1. кеш ролей користувача ("roles:user:<id>" у кеші API);
+    2. claim "roles" JWT-токена, з яким прийшов запит;
+    3. запит до бази, результат якого кладеться в кеш.
+
+Кеш оновлюється одразу при зміні груп (m2m_changed у models.py), тому
+має перевагу над claim'ом: той фіксує ролі на момент видачі токена і
+використовується лише тоді, коли запису в кеші немає (новий процес,
+витіснення). Access-токен отримує свіжі ролі при кожному оновленні.
+
+З кешем у пам'яті (locmem) зміна груп оновлює лише процес, що її обробив,
+тому записи кешу живуть не довше за access-токен: у інших воркерах
+відкликана роль діє щонайбільше ACCESS_TOKEN_LIFETIME — стільки ж, скільки
+й claim уже виданого токена.
+"""
+
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.core.cache import caches
+from django.db.models import Exists, OuterRef
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+COACH_GROUP = "Coach"
+ROLES_CLAIM = "roles"
+
+
+def cache_timeout():
+    """Час життя запису ролей у кеші, секунд: не довше за access-токен."""
+    return int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+
+
+def _cache():
+    return caches[getattr(settings, "API_CACHE_ALIAS", "default")]
+
+
+def _key(user_id):
+    return f"roles:user:{user_id}"
+
+
+def refresh_roles(user_ids):
+    """
+    Перечитати ролі користувачів з бази (один запит) і оновити кеш.
+
+    Returns:
+        dict: {id користувача: frozenset назв груп}
+    """
+    roles = {user_id: set() for user_id in user_ids}
+    if roles:
+        memberships = Group.objects.filter(user__in=roles).values_list("user", "name")
+        for user_id, name in memberships:
+            roles[user_id].add(name)
+        _cache().set_many(
+            {_key(user_id): sorted(names) for user_id, names in roles.items()},
+            timeout=cache_timeout(),
+        )
+    return {user_id: frozenset(names) for user_id, names in roles.items()}
+
+
+def roles_for_id(user_id):
+    """Ролі користувача за id: з кешу, а при промаху — з бази."""
+    cached = _cache().get(_key(user_id))
+    if cached is not None:
+        return frozenset(cached)
+    return refresh_roles([user_id])[user_id]
+
+
+def get_roles(user):
+    """Ролі користувача (порожні для анонімного), не частіше одного разу на об'єкт."""
+    if not user or not user.is_authenticated:
+        return frozenset()
+    roles = getattr(user, "_roles", None)
+    if roles is None:
+        cached = _cache().get(_key(user.pk))
+        claim = getattr(user, "_roles_claim", None)
+        if cached is not None:
+            roles = frozenset(cached)
+        elif claim is not None:
+            roles = frozenset(claim)
+        else:
+            roles = refresh_roles([user.pk])[user.pk]
+        user._roles = roles
+    return roles
+
+
+def is_coach(user):
+    """
+    Чи належить користувач до групи Coach. Для рядків, анотованих
+    with_coach_flag(), відповідь береться з анотації без кешу і бази.
+    """
+    flag = getattr(user, "coach_flag", None)
+    if flag is not None:
+        return flag
+    return COACH_GROUP in get_roles(user)
+
+
+def with_coach_flag(users):
+    """Анотувати queryset користувачів прапорцем coach_flag (EXISTS-підзапит)"""
+    return users.annotate(
+        coach_flag=Exists(Group.objects.filter(name=COACH_GROUP, user=OuterRef("pk")))
+    )
+
+
+class RoleRefreshToken(RefreshToken):
+    """Refresh-токен, що передає в кожен access-токен актуальні ролі."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[ROLES_CLAIM] = sorted(get_roles(user))
+        return token
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        user_id = self.payload.get(api_settings.USER_ID_CLAIM)
+        if user_id is not None:
+            access[ROLES_CLAIM] = sorted(roles_for_id(user_id))
+        return access
+
+
+class RoleJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication, що зберігає claim з ролями на користувачі запиту."""
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        claim = validated_token.get(ROLES_CLAIM)
+        if isinstance(claim, list):
+            user._roles_claim = claim
+        return user
@@ -0,0 +1,173 @@
+"""
+Повнотекстовий пошук гравців.
+
+Текст гравця (логін, ім'я, прізвище, назви команд, у заявках яких він
+є) нормалізується в "документ" з латинських токенів: кирилиця
+транслітерується (українська таблиця + російські літери), діакритика
+знімається, а неоднозначні сполучення згортаються (kh→h, y→i, подвоєні
+літери). Запит нормалізується так само, тож "Шевченко", "shevchenko" і
+"ШЕВЧЕНКО" дають однаковий результат, а "Олексій" знаходиться за
+"Oleksiy".
+
+Документи зберігаються в PlayerSearchDocument (models.py). На SQLite
+над ними будується FTS5-індекс FTS_TABLE (external content, тригери
+в міграції): префіксний MATCH і ранжування bm25. На інших базах —
+LIKE по межі токена (на PostgreSQL — з GIN-індексом pg_trgm).
+"""
+
+import re
+import unicodedata
+
+from django.db import connections
+
+FTS_TABLE = "my_app_playersearch_fts"
+DOCUMENT_TABLE = "my_app_playersearchdocument"
+
+# Транслітерація за українською офіційною таблицею (без позиційних правил —
+# їх нівелює згортання нижче) і російські літери, яких немає в українській
+TRANSLIT = {
+    "а": "a",
+    "б": "b",
+    "в": "v",
+    "г": "h",
+    "ґ": "g",
+    "д": "d",
+    "е": "e",
+    "є": "ie",
+    "ж": "zh",
+    "з": "z",
+    "и": "y",
+    "і": "i",
+    "ї": "i",
+    "й": "i",
+    "к": "k",
+    "л": "l",
+    "м": "m",
+    "н": "n",
+    "о": "o",
+    "п": "p",
+    "р": "r",
+    "с": "s",
+    "т": "t",
+    "у": "u",
+    "ф": "f",
+    "х": "kh",
+    "ц": "ts",
+    "ч": "ch",
+    "ш": "sh",
+    "щ": "shch",
+    "ь": "",
+    "ю": "iu",
+    "я": "ia",
+    "ё": "io",
+    "ъ": "",
+    "ы": "y",
+    "э": "e",
+    "'": "",
+    "’": "",
+    "ʼ": "",
+}
+
+# Згортання латиниці: різні транслітерації одного імені дають один токен
+FOLDS = (("kh", "h"), ("y", "i"), ("j", "i"), ("w", "v"), ("x", "ks"))
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_REPEATS = re.compile(r"(.)\1+")
+
+
+def tokens(text):
+    """Нормалізовані токени тексту (див. опис модуля)."""
+    text = "".join(TRANSLIT.get(char, char) for char in (text or "").lower())
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    text = _NON_ALNUM.sub(" ", text)
+    for source, target in FOLDS:
+        text = text.replace(source, target)
+    return _REPEATS.sub(r"\1", text).split()
+
+
+def name_key(*parts):
+    """Ключ імені незалежно від порядку слів: "Шевченко Олексій" == "Олексій Шевченко"."""
+    return " ".join(sorted(token for part in parts for token in tokens(part)))
+
+
+def build_document(username, first_name, last_name, team_names=()):
+    """Текст документа: унікальні токени, обрамлені пробілами для LIKE ' tok%'."""
+    seen = dict.fromkeys(
+        tokens(" ".join([username, first_name, last_name, *team_names]))
+    )
+    return f" {' '.join(seen)} "
+
+
+def fts_query(query):
+    """MATCH-вираз FTS5: усі токени запиту як префікси ("shev"* AND "ol"*)."""
+    return " AND ".join(f'"{token}"*' for token in tokens(query))
+
+
+class RankedMatches:
+    """
+    Збіги FTS5 як послідовність для Paginator: count() і зрізи рахуються
+    по індексу (без JOIN з таблицями гравців), а об'єкти сторінки
+    дочитуються з queryset за id. Фільтри queryset (позиція, рейтинг)
+    обмежують збіги підзапитом EXISTS (...).
+
+    Порядок — bm25 (атрибут search_rank) по всіх збігах: SQLite рахує
+    його для кожного збігу (~2 мкс), тож запит з однієї літери, що
+    відповідає значній частині гравців, дорожчий, але порядок сторінок
+    не залежить від кількості збігів.
+    """
+
+    def __init__(self, queryset, match):
+        self.queryset = queryset
+        self.where = f"{FTS_TABLE} MATCH %s"
+        self.params = [match]
+        if queryset.query.has_filters():
+            # Корельований EXISTS: перевірка за первинним ключем для кожного
+            # збігу дешевша, ніж матеріалізація всієї відфільтрованої вибірки
+            meta = queryset.model._meta
+            correlated = (
+                queryset.order_by()
+                .values("pk")
+                .extra(
+                    where=[f'"{meta.db_table}"."{meta.pk.column}" = {FTS_TABLE}.rowid']
+                )
+            )
+            sql, params = correlated.query.sql_with_params()
+            self.where += f" AND EXISTS ({sql})"
+            self.params += params
+        self._count = None
+
+    def _fetch(self, sql, params=()):
+        with connections[self.queryset.db].cursor() as cursor:
+            cursor.execute(sql, [*self.params, *params])
+            return cursor.fetchall()
+
+    def count(self):
+        if self._count is None:
+            self._count = self._fetch(
+                f"SELECT count(*) FROM {FTS_TABLE} WHERE {self.where}"
+            )[0][0]
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice) or key.step not in (None, 1):
+            raise TypeError("RankedMatches підтримує лише зрізи")
+        start = key.start or 0
+        stop = self.count() if key.stop is None else key.stop
+        if stop <= start:
+            return []
+        rows = self._fetch(
+            f"SELECT rowid, rank FROM {FTS_TABLE} WHERE {self.where} "
+            "ORDER BY rank, rowid LIMIT %s OFFSET %s",
+            [stop - start, start],
+        )
+        objects = self.queryset.in_bulk([pk for pk, _ in rows])
+        page = []
+        for pk, rank in rows:
+            if pk in objects:
+                objects[pk].search_rank = rank
+                page.append(objects[pk])
+        return page
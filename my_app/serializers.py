@@ -3,8 +3,17 @@ from django.contrib.auth.password_validation import validate_password
 from django.utils import timezone
 
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
 
+from .jobs import TASKS, check_params
 from .models import (
+    RATING_HISTORY_SERIES_POINTS,
+    RECENT_STATS_LIMIT,
+    Job,
+    LeaderboardEntry,
     Match,
     Player,
     PlayerRatingHistory,
@@ -14,6 +23,7 @@ from .models import (
     Tournament,
     UserProfile,
 )
+from .roles import RoleRefreshToken, is_coach
 
 
 class TeamSerializer(serializers.ModelSerializer):
@@ -23,7 +33,7 @@ class TeamSerializer(serializers.ModelSerializer):
 
     def validate(self, attrs):
         # Якщо створюється нова команда або змінюється турнір
-        tournament = attrs.get('tournament')
+        tournament = attrs.get("tournament")
         # Якщо оновлюється існуюча команда без зміни турніру
         if not tournament and self.instance:
             tournament = self.instance.tournament
@@ -48,6 +58,23 @@ class MatchSerializer(serializers.ModelSerializer):
         model = Match
         fields = "__all__"
 
+    def validate(self, attrs):
+        tournament = attrs.get("tournament") or getattr(
+            self.instance, "tournament", None
+        )
+        for side in ("home", "away"):
+            ref_field, name_field = f"{side}_team_ref", f"{side}_team"
+            if ref_field in attrs:
+                team = attrs[ref_field]
+                if team is not None and team.tournament_id != tournament.pk:
+                    raise serializers.ValidationError(
+                        {ref_field: "Команда не бере участі в цьому турнірі"}
+                    )
+            elif name_field in attrs:
+                # Змінено лише назву — команда шукається заново в Match.resolve_teams
+                attrs[ref_field] = None
+        return attrs
+
 
 class TournamentSerializer(serializers.ModelSerializer):
     teams = TeamSerializer(many=True, read_only=True)
@@ -69,6 +96,47 @@ class TournamentSerializer(serializers.ModelSerializer):
         return value
 
 
+class TournamentListSerializer(serializers.ModelSerializer):
+    """
+    Короткий serializer турніру для списків: кількість команд і матчів
+    замість вкладених ростерів, таблиці й матчів.
+
+    Вкладені колекції додаються лише на запит: ?expand=teams,standings,matches
+    (ViewSet передає їх у context["expand"] і робить відповідний prefetch).
+    """
+
+    EXPANDABLE = {
+        "teams": TeamSerializer,
+        "standings": StandingSerializer,
+        "matches": MatchSerializer,
+    }
+
+    teams_count = serializers.IntegerField(read_only=True)
+    matches_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Tournament
+        fields = [
+            "id",
+            "name",
+            "start_date",
+            "end_date",
+            "format",
+            "max_teams",
+            "location",
+            "description",
+            "status",
+            "image",
+            "teams_count",
+            "matches_count",
+        ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in self.context.get("expand", ()):
+            self.fields[name] = self.EXPANDABLE[name](many=True, read_only=True)
+
+
 class UserSerializer(serializers.ModelSerializer):
     """Serializer для користувача"""
 
@@ -155,7 +223,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
         read_only_fields = ["username"]
 
     def get_is_coach(self, obj):
-        return obj.groups.filter(name="Coach").exists()
+        return is_coach(obj)
 
     def get_avatar(self, obj):
         try:
@@ -264,11 +332,29 @@ class PlayerStatsSerializer(serializers.ModelSerializer):
 
 
 class PlayerRatingHistorySerializer(serializers.ModelSerializer):
-    """Serializer для історії рейтингу"""
+    """
+    Serializer для історії рейтингу. Для згорнутих записів (resolution
+    day / week) rating — останній рейтинг періоду, rating_min / rating_max —
+    його межі; у сирого запису межі дорівнюють rating.
+    """
 
     class Meta:
         model = PlayerRatingHistory
-        fields = ["rating", "recorded_at"]
+        fields = [
+            "rating",
+            "rating_min",
+            "rating_max",
+            "samples",
+            "resolution",
+            "recorded_at",
+        ]
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        for name in ("rating_min", "rating_max"):
+            if data[name] is None:
+                data[name] = data["rating"]
+        return data
 
 
 class PlayerSerializer(serializers.ModelSerializer):
@@ -307,17 +393,118 @@ class PlayerSerializer(serializers.ModelSerializer):
         return name if name else obj.user.username
 
     def get_recent_stats(self, obj):
-        """Отримати останні 5 матчів"""
-        recent = obj.stats.all()[:5]
+        """Отримати останні 5 матчів (з Player.objects.with_recent_stats())"""
+        recent = getattr(obj, "latest_stats", None)
+        if recent is None:
+            recent = obj.stats.all()[:RECENT_STATS_LIMIT]
         return PlayerStatsSerializer(recent, many=True).data
 
 
+class LeaderboardEntrySerializer(serializers.ModelSerializer):
+    """Легкий serializer рядка таблиці лідерів (без вкладеної статистики)"""
+
+    id = serializers.IntegerField(source="player_id", read_only=True)
+    username = serializers.CharField(source="player.user.username", read_only=True)
+    full_name = serializers.SerializerMethodField()
+    jersey_number = serializers.IntegerField(
+        source="player.jersey_number", read_only=True
+    )
+    matches_played = serializers.IntegerField(
+        source="player.matches_played", read_only=True
+    )
+
+    class Meta:
+        model = LeaderboardEntry
+        fields = [
+            "id",
+            "username",
+            "full_name",
+            "position",
+            "jersey_number",
+            "overall_rating",
+            "matches_played",
+            "rank",
+            "position_rank",
+        ]
+        read_only_fields = fields
+
+    def get_full_name(self, obj):
+        user = obj.player.user
+        name = f"{user.first_name} {user.last_name}".strip()
+        return name if name else user.username
+
+
 class PlayerDetailSerializer(PlayerSerializer):
     """Детальний serializer для гравця"""
 
     user = UserSerializer(read_only=True)
-    rating_history = PlayerRatingHistorySerializer(many=True, read_only=True)
+    rating_history = serializers.SerializerMethodField()
     all_stats = PlayerStatsSerializer(source="stats", many=True, read_only=True)
 
     class Meta(PlayerSerializer.Meta):
         fields = PlayerSerializer.Meta.fields + ["user", "rating_history", "all_stats"]
+
+    def get_rating_history(self, obj):
+        """
+        Останні RATING_HISTORY_SERIES_POINTS записів історії, новіші першими:
+        недавні зміни по одній, старіші — згорнуті по днях і тижнях.
+        Повна історія — сторінками в /players/{id}/rating_history/.
+        """
+        series = getattr(obj, "rating_series", None)
+        if series is None:
+            series = obj.rating_history.all()[:RATING_HISTORY_SERIES_POINTS]
+        return PlayerRatingHistorySerializer(series, many=True).data
+
+
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Видача пари токенів з claim'ом ролей користувача (my_app.roles)"""
+
+    token_class = RoleRefreshToken
+
+
+class RoleTokenRefreshSerializer(TokenRefreshSerializer):
+    """Оновлення access-токена з актуальними ролями"""
+
+    token_class = RoleRefreshToken
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """Фонове завдання: стан, прогрес і результат; створення — kind і params"""
+
+    url = serializers.HyperlinkedIdentityField(view_name="job-detail")
+    kind = serializers.ChoiceField(choices=sorted(TASKS))
+    params = serializers.JSONField(required=False, default=dict)
+
+    class Meta:
+        model = Job
+        fields = [
+            "id",
+            "url",
+            "kind",
+            "params",
+            "status",
+            "progress",
+            "message",
+            "result",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+        read_only_fields = [
+            "status",
+            "progress",
+            "message",
+            "result",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+
+    def validate(self, attrs):
+        try:
+            check_params(attrs["kind"], attrs.get("params", {}))
+        except ValueError as error:
+            raise serializers.ValidationError({"params": str(error)})
+        return attrs
@@ -1,8 +1,28 @@
-from decimal import Decimal
-
 from django.db.models import Avg, Sum
 
-from .models import Player, PlayerRatingHistory, PlayerStats
+from .models import RATING_WINDOW, Player, PlayerRatingHistory, PlayerStats
+from .rating_engine import RatingEngine
+
+
+def _aggregate_state(player):
+    """Ключ кешу рушія: агрегати гравця змінюються з кожним записом статистики."""
+    return player.matches_played, tuple(map(tuple, player.recent_ratings))
+
+
+def _refresh_players(player_ids):
+    Player.objects.filter(pk__in=player_ids).refresh_ratings()
+
+
+rating_engine = RatingEngine(
+    "xg",
+    PlayerStats,
+    PlayerRatingHistory,
+    window=RATING_WINDOW,
+    # matches_played і вікно рейтингів підтримує сама модель
+    update_matches_played=False,
+    state_key=_aggregate_state,
+    on_rescored=_refresh_players,
+)
 
 
 class PlayerRatingService:
@@ -11,30 +31,16 @@ class PlayerRatingService:
     @staticmethod
     def calculate_rating(player):
         """
-        Розраховує overall_rating гравця як середнє рейтингів матчів (шкала 1.0–10.0).
-        Рейтинг кожного матчу вже розраховується автоматично в PlayerStats._calculate_match_rating().
+        Розраховує overall_rating гравця як середнє рейтингів останніх
+        RATING_WINDOW матчів (шкала 1.0–10.0) через спільний rating_engine.
+        Повторний виклик без нової статистики не робить запитів до БД.
 
         Args:
             player: об'єкт Player
         Returns:
             Decimal: новий overall_rating гравця
         """
-        stats = PlayerStats.objects.filter(player=player).exclude(rating__isnull=True)
-
-        if not stats.exists():
-            return Decimal("0.00")
-
-        avg = stats.aggregate(avg=Avg("rating"))["avg"] or Decimal("0")
-        new_rating = round(Decimal(str(avg)), 2)
-
-        # Зберігаємо в полі гравця
-        player.overall_rating = new_rating
-        player.save(update_fields=["overall_rating"])
-
-        # Додаємо запис в історію
-        PlayerRatingHistory.objects.create(player=player, rating=new_rating)
-
-        return new_rating
+        return rating_engine.calculate_rating(player)
 
     @staticmethod
     def get_player_statistics(player):
@@ -0,0 +1,122 @@
+"""
+Бенчмарк REST API (my_app.benchmark).
+
+Бюджети SQL-запитів і відсутність повних переглядів таблиць у їхніх
+планах (my_app.query_plans) перевіряються завжди. Латентність — лише з
+API_BENCHMARK=1 (на спільних CI-машинах вона надто шумна):
+
+    API_BENCHMARK=1 pytest my_app/test_benchmarks.py
+    API_BENCHMARK=1 API_BENCHMARK_UPDATE=1 pytest my_app/test_benchmarks.py
+
+Змінні оточення:
+    API_BENCHMARK_LEAGUE     розмір ліги, напр. "players=2000,stats=20"
+    API_BENCHMARK_BASELINE   шлях до JSON базової лінії
+    API_BENCHMARK_THRESHOLD  допустиме погіршення p50/p95 (частка, 0.5)
+    API_BENCHMARK_REPEAT     запитів на endpoint для перцентилів (30)
+"""
+
+import os
+from pathlib import Path
+
+from django.conf import settings as django_settings
+from django.core.management import call_command
+from django.db import connection
+
+import pytest
+
+from my_app.benchmark import (
+    ENDPOINTS,
+    FILTERED_ENDPOINTS,
+    compare_with_baseline,
+    get_route_names,
+    load_baseline,
+    measure,
+    run_benchmark,
+    save_baseline,
+    seed_league,
+)
+from my_app.query_plans import explain, explain_endpoint
+
+
+def league_size():
+    size = {}
+    for item in filter(None, os.environ.get("API_BENCHMARK_LEAGUE", "").split(",")):
+        name, _, value = item.partition("=")
+        size[name.strip()] = int(value)
+    return size
+
+
+@pytest.fixture
+def league(db, settings):
+    # Міряємо роботу view, а не кеш відповідей
+    settings.API_CACHE_TIMEOUT = 0
+    return seed_league(**league_size())
+
+
+class TestQueryBudgets:
+    def test_every_get_route_has_budget(self):
+        assert get_route_names() == {endpoint.name for endpoint in ENDPOINTS}
+
+    @pytest.mark.parametrize(
+        "endpoint", ENDPOINTS + FILTERED_ENDPOINTS, ids=lambda e: e.name
+    )
+    def test_query_budget(self, league, endpoint):
+        result = measure(endpoint, league, repeat=0)
+        assert result["queries"] <= endpoint.max_queries
+
+
+@pytest.mark.skipif(
+    connection.vendor not in ("sqlite", "postgresql"), reason="EXPLAIN: SQLite/PG"
+)
+class TestQueryPlans:
+    @pytest.mark.parametrize(
+        "endpoint", ENDPOINTS + FILTERED_ENDPOINTS, ids=lambda e: e.name
+    )
+    def test_no_full_scans(self, league, endpoint):
+        # COUNT по всій таблиці (лічильник пагінації) переглядає її неминуче
+        scans = [
+            (plan.sql, plan.scans)
+            for plan in explain_endpoint(endpoint, league)
+            if plan.scans and not plan.full_count
+        ]
+        assert not scans
+
+    def test_filtered_walk_is_a_scan(self, db):
+        from my_app.models import PlayerStats
+
+        page = PlayerStats.objects.order_by("-created_at")
+        assert not explain(str(page[:20].query)).scans
+        assert explain(str(page.filter(goals=1)[:20].query)).scans
+
+    def test_command_does_not_fail_on_full_counts(self, db):
+        # team-list рахує COUNT(*) по всій таблиці, але індекси не пропущені
+        call_command(
+            "explain_api", "--seed", "--fail-on-scan", "--endpoint", "team-list"
+        )
+
+
+@pytest.mark.skipif(
+    not os.environ.get("API_BENCHMARK"), reason="латентність: API_BENCHMARK=1"
+)
+class TestLatencyBaseline:
+    def test_no_regression_against_baseline(self, league):
+        path = Path(
+            os.environ.get(
+                "API_BENCHMARK_BASELINE",
+                django_settings.BASE_DIR / "benchmarks" / "api_baseline.json",
+            )
+        )
+        results = run_benchmark(
+            league, repeat=int(os.environ.get("API_BENCHMARK_REPEAT", 30))
+        )
+        baseline = load_baseline(path)
+        if baseline is None or os.environ.get("API_BENCHMARK_UPDATE"):
+            save_baseline(path, results, league_size())
+            return
+
+        regressions = compare_with_baseline(
+            results,
+            baseline,
+            threshold=float(os.environ.get("API_BENCHMARK_THRESHOLD", 0.5)),
+        )
+        assert not regressions, "\n".join(regressions)
@@ -0,0 +1,164 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.utils import timezone
+
+import pytest
+from rest_framework.test import APIClient
+
+from my_app import jobs
+from my_app.models import Job, Player, PlayerStats
+
+
+def run_worker():
+    out = StringIO()
+    call_command("run_worker", burst=True, processes=0, stdout=out)
+    return out.getvalue()
+
+
+@pytest.fixture
+def admin_client():
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(username="admin", is_staff=True))
+    return client
+
+
+@pytest.mark.django_db
+class TestJobQueue:
+    def test_claim_takes_oldest_queued_job_once(self):
+        first = jobs.enqueue("update_ratings")
+        second = jobs.enqueue("rescore_stats", {"chunk_size": 10})
+
+        assert Job.objects.claim("w1") == first
+        assert Job.objects.claim("w2") == second
+        assert Job.objects.claim("w1") is None
+        assert Job.objects.get(pk=second.pk).worker == "w2"
+
+    def test_enqueue_rejects_unknown_kind_and_params(self):
+        with pytest.raises(ValueError):
+            jobs.enqueue("format_disk")
+        with pytest.raises(ValueError):
+            jobs.enqueue("update_ratings", {"workers": 8})
+        assert not Job.objects.exists()
+
+    def test_fail_stale_running_jobs(self):
+        job = jobs.enqueue("update_ratings")
+        Job.objects.claim("gone")
+        assert Job.objects.fail_stale(timedelta(minutes=5)) == 0
+
+        Job.objects.filter(pk=job.pk).update(
+            updated_at=timezone.now() - timedelta(minutes=10)
+        )
+        assert Job.objects.fail_stale(timedelta(minutes=5)) == 1
+        job.refresh_from_db()
+        assert job.status == Job.FAILED and job.finished_at
+
+    def test_worker_runs_command_job(self):
+        user = User.objects.create_user(username="p1")
+        player = Player.objects.create(user=user, position="FWD")
+        PlayerStats.objects.create(player=player, match_id=1, goals=1)
+        Player.objects.update(overall_rating=Decimal("1.00"))
+        job = jobs.enqueue("update_ratings", {"chunk_size": 10})
+
+        assert "Виконано завдань: 1" in run_worker()
+        job.refresh_from_db()
+        assert job.status == Job.SUCCEEDED
+        assert job.progress == 100
+        assert "Готово" in job.result["output"][-1]
+        assert job.message == job.result["output"][-1].strip()
+        player.refresh_from_db()
+        assert player.overall_rating == Decimal("6.00")
+
+    def test_broken_pool_fails_each_job_once(self):
+        from concurrent.futures import Future
+        from concurrent.futures.process import BrokenProcessPool
+
+        from my_app.management.commands.run_worker import Command
+
+        class DeadPool:
+            def shutdown(self, wait=True):
+                pass
+
+        first, second = jobs.enqueue("update_ratings"), jobs.enqueue("rescore_stats")
+        for _ in range(2):
+            Job.objects.claim("w1")
+        futures = [Future(), Future()]
+        for future in futures:
+            future.set_exception(BrokenProcessPool("процес завершився"))
+
+        command = Command(stdout=StringIO())
+        command.processes, command.pool = 0, DeadPool()
+        command.running = dict(zip(futures, (first, second)))
+
+        assert command._collect() == 2
+        assert not command.running
+        assert set(Job.objects.values_list("status", flat=True)) == {Job.FAILED}
+        assert "аварійно" in Job.objects.get(pk=first.pk).error
+
+    def test_failed_job_keeps_traceback(self, monkeypatch):
+        def boom(job):
+            job.report(1, 4, "крок 1", force=True)
+            raise RuntimeError("API недоступний")
+
+        monkeypatch.setitem(jobs.TASKS, "boom", boom)
+        job = jobs.enqueue("boom")
+        run_worker()
+
+        job.refresh_from_db()
+        assert job.status == Job.FAILED
+        assert (job.progress, job.message) == (25, "крок 1")
+        assert "RuntimeError: API недоступний" in job.error
+        assert job.result is None
+
+
+@pytest.mark.django_db
+class TestJobAPI:
+    def test_enqueue_and_poll(self, admin_client):
+        response = admin_client.post(
+            "/api/jobs/",
+            {"kind": "rescore_stats", "params": {"chunk_size": 100}},
+            format="json",
+        )
+        assert response.status_code == 202
+        job_id = response.data["id"]
+        assert response.data["status"] == Job.QUEUED
+        assert response.data["url"].endswith(f"/api/jobs/{job_id}/")
+
+        run_worker()
+        data = admin_client.get(f"/api/jobs/{job_id}/").data
+        assert data["status"] == Job.SUCCEEDED
+        assert data["progress"] == 100
+        assert data["finished_at"]
+
+        listed = admin_client.get("/api/jobs/?status=succeeded").data["results"]
+        assert [row["id"] for row in listed] == [job_id]
+
+    def test_validation_and_permissions(self, admin_client):
+        response = admin_client.post("/api/jobs/", {"kind": "shell"}, format="json")
+        assert response.status_code == 400
+        response = admin_client.post(
+            "/api/jobs/",
+            {"kind": "loaddata", "params": {"fixture": "x"}},
+            format="json",
+        )
+        assert response.status_code == 400 and "params" in response.data
+
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username="fan"))
+        assert client.post("/api/jobs/", {"kind": "update_ratings"}).status_code == 403
+        assert client.get("/api/jobs/").status_code == 403
+        assert not Job.objects.exists()
+
+    def test_loaddata_accepts_fixture_names_only(self, admin_client):
+        response = admin_client.post(
+            "/api/jobs/",
+            {"kind": "loaddata", "params": {"fixtures": ["/etc/passwd"]}},
+            format="json",
+        )
+        run_worker()
+        job = Job.objects.get(pk=response.data["id"])
+        assert job.status == Job.FAILED
+        assert "лише назвою" in job.error
@@ -1,10 +1,14 @@
+from datetime import datetime, timedelta
 from decimal import Decimal
+from zoneinfo import ZoneInfo
 
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 import pytest
 
 from my_app.models import (
+    LeaderboardEntry,
     Match,
     Player,
     PlayerRatingHistory,
@@ -116,3 +120,382 @@ class TestModels:
         )
         assert match.home_team == "Team A"
         assert match.home_score == 2
+
+
+@pytest.mark.django_db
+class TestBulkIngest:
+    def _player(self, username, position):
+        user = User.objects.create_user(username=username, password="password")
+        return Player.objects.create(user=user, position=position)
+
+    def test_bulk_ingest_matches_per_row_save(self):
+        rows = [
+            dict(goals=2, shots_on_target=3, minutes_played=90),
+            dict(assists=1, key_passes=4, tackles=3, minutes_played=40),
+            dict(yellow_cards=1, saves=5, minutes_played=15),
+        ]
+        saved = self._player("saved", "MID")
+        for row in rows:
+            PlayerStats.objects.create(player=saved, match_id=1, **row)
+
+        bulk = self._player("bulk", "MID")
+        created = PlayerStats.objects.bulk_ingest(
+            [dict(player=bulk, match_id=1, **row) for row in rows]
+        )
+
+        assert len(created) == 3
+        assert sorted(s.rating for s in bulk.stats.all()) == sorted(
+            s.rating for s in saved.stats.all()
+        )
+        saved.refresh_from_db()
+        bulk.refresh_from_db()
+        assert bulk.matches_played == saved.matches_played == 3
+        assert bulk.overall_rating == saved.overall_rating
+        assert PlayerRatingHistory.objects.filter(player=bulk).count() == 1
+
+    def test_bulk_ingest_query_count_is_independent_of_rows(
+        self, django_assert_num_queries
+    ):
+        players = [self._player(f"p{i}", "FWD") for i in range(5)]
+
+        for matches in (1, 10):
+            rows = [
+                PlayerStats(player=player, match_id=match_id, goals=matches)
+                for player in players
+                for match_id in range(matches)
+            ]
+            with django_assert_num_queries(46):
+                PlayerStats.objects.bulk_ingest(rows)
+        assert PlayerStats.objects.count() == 55
+
+    def test_refresh_ratings_uses_last_matches_only(self):
+        player = self._player("window", "FWD")
+        PlayerStats.objects.bulk_ingest(
+            [PlayerStats(player=player, match_id=i, red_cards=1) for i in range(5)]
+            + [PlayerStats(player=player, match_id=i, goals=5) for i in range(10)]
+        )
+        player.refresh_from_db()
+        assert player.matches_played == 15
+        assert player.overall_rating == player.calculate_rating()
+
+
+@pytest.mark.django_db
+class TestIncrementalAggregates:
+    def _player(self, position="MID"):
+        user = User.objects.create_user(username="agg", password="password")
+        return Player.objects.create(user=user, position=position)
+
+    def _assert_consistent(self, player):
+        player.refresh_from_db()
+        assert Player.objects.filter(pk=player.pk).refresh_ratings(commit=False) == []
+        assert player.overall_rating == player.calculate_rating()
+        assert player.matches_played == player.stats.count()
+
+    def test_insert_update_delete_keep_aggregates_in_sync(self):
+        player = self._player()
+        stats = [
+            PlayerStats.objects.create(player=player, match_id=i, goals=i % 3)
+            for i in range(12)
+        ]
+        self._assert_consistent(player)
+        assert player.stat_totals["goals"] == sum(i % 3 for i in range(12))
+
+        stats[-1].assists = 2
+        stats[-1].save()
+        stats[0].goals = 5
+        stats[0].save()
+        self._assert_consistent(player)
+
+        stats[-1].delete()
+        self._assert_consistent(player)
+        PlayerStats.objects.filter(pk__in=[s.pk for s in stats[:3]]).delete()
+        self._assert_consistent(player)
+        assert player.matches_played == 8
+
+    def test_insert_cost_does_not_grow_with_career(self, django_assert_num_queries):
+        player = self._player("FWD")
+        with django_assert_num_queries(14):
+            PlayerStats.objects.create(player=player, match_id=1, goals=1)
+
+        PlayerStats.objects.bulk_ingest(
+            [PlayerStats(player=player, match_id=i) for i in range(50)]
+        )
+        with django_assert_num_queries(14):
+            PlayerStats.objects.create(player=player, match_id=1, goals=2)
+
+    def test_reconcile_command_repairs_drift(self):
+        from django.core.management import call_command
+
+        player = self._player()
+        PlayerStats.objects.create(player=player, match_id=1, goals=1)
+        Player.objects.filter(pk=player.pk).update(
+            matches_played=7, overall_rating=Decimal("1.00"), recent_ratings=[]
+        )
+
+        call_command("reconcile_player_aggregates")
+        player.refresh_from_db()
+        assert player.matches_played == 7
+
+        call_command("reconcile_player_aggregates", fix=True)
+        self._assert_consistent(player)
+        assert player.matches_played == 1
+
+
+@pytest.mark.django_db
+class TestUpdateRatingsCommand:
+    def test_dry_run_reports_without_writing_then_updates(self):
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        players = []
+        for i in range(3):
+            user = User.objects.create_user(username=f"u{i}", password="password")
+            player = Player.objects.create(user=user, position="FWD")
+            PlayerStats.objects.create(player=player, match_id=1, goals=1)
+            players.append(player)
+        Player.objects.filter(pk=players[0].pk).update(overall_rating=Decimal("1.00"))
+
+        out = StringIO()
+        call_command("update_ratings", chunk_size=2, dry_run=True, stdout=out)
+        assert "u0: 1.00 → 6.00" in out.getvalue()
+        players[0].refresh_from_db()
+        assert players[0].overall_rating == Decimal("1.00")
+
+        call_command("update_ratings", chunk_size=2, stdout=StringIO())
+        players[0].refresh_from_db()
+        assert players[0].overall_rating == Decimal("6.00")
+        assert PlayerRatingHistory.objects.filter(player=players[0]).count() == 2
+
+    @pytest.mark.django_db(transaction=True)
+    def test_parallel_workers(self):
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        for i in range(6):
+            user = User.objects.create_user(username=f"w{i}", password="password")
+            player = Player.objects.create(user=user, position="MID")
+            PlayerStats.objects.create(player=player, match_id=1, assists=1)
+        Player.objects.update(overall_rating=Decimal("0.00"))
+
+        call_command("update_ratings", workers=3, chunk_size=2, stdout=StringIO())
+        assert set(Player.objects.values_list("overall_rating", flat=True)) == {
+            Decimal("6.00")
+        }
+
+
+@pytest.mark.django_db
+class TestLeaderboard:
+    def _ranks(self):
+        return list(
+            LeaderboardEntry.objects.order_by("player_id").values_list(
+                "player_id", "overall_rating", "rank", "position_rank"
+            )
+        )
+
+    def test_incremental_ranks_match_rebuild(self):
+        players = []
+        for i, position in enumerate(["FWD", "MID", "FWD", "DEF", "MID", "FWD"]):
+            user = User.objects.create_user(username=f"lb{i}", password="password")
+            players.append(Player.objects.create(user=user, position=position))
+        for i, player in enumerate(players):
+            PlayerStats.objects.create(player=player, match_id=1, goals=i % 3)
+
+        stats = PlayerStats.objects.create(player=players[0], match_id=2, goals=3)
+        stats.goals = 0
+        stats.save()
+        players[4].position = "FWD"
+        players[4].save()
+        PlayerStats.objects.bulk_ingest(
+            [PlayerStats(player=players[3], match_id=3, assists=2)]
+        )
+        players[1].delete()
+
+        incremental = self._ranks()
+        LeaderboardEntry.objects.all().delete()
+        LeaderboardEntry.objects.rebuild()
+        assert incremental == self._ranks()
+        assert len(incremental) == 5
+
+
+@pytest.mark.django_db
+class TestStandingsEngine:
+    def _tournament(self, names):
+        tour = Tournament.objects.create(
+            name="League",
+            start_date="2025-01-01",
+            end_date="2025-12-31",
+            format="League",
+            max_teams=8,
+            location="Kyiv",
+        )
+        for name in names:
+            Team.objects.create(
+                tournament=tour, name=name, captain="C", email="c@c.com", phone="1"
+            )
+        return tour
+
+    def _match(self, tour, home, away, home_score, away_score, **kwargs):
+        return Match.objects.create(
+            tournament=tour,
+            date="2025-02-01T15:00:00Z",
+            home_team=home,
+            away_team=away,
+            home_score=home_score,
+            away_score=away_score,
+            **kwargs,
+        )
+
+    def _table(self, tour):
+        return [
+            (row.team.name, row.played, row.goals_for, row.points, row.rank)
+            for row in Standing.objects.filter(tournament=tour)
+        ]
+
+    def test_deltas_match_full_rebuild(self):
+        tour = self._tournament(["A", "B", "C", "D"])
+        self._match(tour, "A", "B", 2, 0)
+        edited = self._match(tour, "C", "D", 1, 1)
+        deleted = self._match(tour, "A", "C", 0, 3)
+        self._match(tour, "B", "D", 5, 0, status="scheduled")
+
+        edited.home_score = 4
+        edited.save()
+        deleted.delete()
+        incremental = self._table(tour)
+
+        Standing.objects.rebuild(tour.pk)
+        assert self._table(tour) == incremental
+        assert incremental == [
+            ("C", 1, 4, 3, 1),
+            ("A", 1, 2, 3, 2),
+            ("B", 1, 0, 0, 3),
+            ("D", 1, 1, 0, 4),
+        ]
+
+    def test_head_to_head_breaks_ties(self):
+        tour = self._tournament(["A", "B", "C", "D"])
+        # A і B рівні за очками, різницею і забитими; очна зустріч — за B
+        self._match(tour, "B", "A", 1, 0)
+        self._match(tour, "A", "D", 3, 2)
+        self._match(tour, "C", "B", 3, 2)
+
+        table = self._table(tour)
+        assert [name for name, *_ in table] == ["C", "B", "A", "D"]
+        assert table[1][1:4] == table[2][1:4]
+
+    def test_match_resolves_team_refs_and_follows_renames(self):
+        tour = self._tournament(["A", "B"])
+        other = self._tournament(["A"])
+        match = self._match(tour, "A", "Guests", 1, 0)
+        home = Team.objects.get(tournament=tour, name="A")
+        assert match.home_team_ref == home
+        assert match.away_team_ref is None
+        assert home.home_matches.get() == match
+
+        home.name = "A United"
+        home.save()
+        match.refresh_from_db()
+        assert match.home_team == "A United"
+        assert Standing.objects.get(team=home).points == 3
+        assert not Team.objects.get(tournament=other).home_matches.exists()
+
+    def test_tournaments_deleted_through_queryset(self):
+        tour = self._tournament(["A", "B"])
+        kept = self._tournament(["A", "B"])
+        self._match(tour, "A", "B", 2, 1)
+        self._match(kept, "A", "B", 0, 1)
+        Match.objects.filter(tournament=kept).delete()
+
+        Tournament.objects.filter(pk=tour.pk).delete()
+
+        assert not Standing.objects.filter(tournament_id=tour.pk).exists()
+        assert not Match.objects.filter(tournament_id=tour.pk).exists()
+        assert self._table(kept) == [("A", 0, 0, 0, 1), ("B", 0, 0, 0, 2)]
+
+
+@pytest.mark.django_db
+class TestRatingHistoryCompaction:
+    # 15.06.2024, субота: сирі записи — з 16.05, денні — з понеділка 18.12.2023
+    NOW = datetime(2024, 6, 15, 12, 0, tzinfo=ZoneInfo("Europe/Kyiv"))
+
+    def _history(self, player, *points):
+        PlayerRatingHistory.objects.bulk_create(
+            PlayerRatingHistory(player=player, rating=Decimal(rating), recorded_at=at)
+            for at, rating in points
+        )
+
+    def _rows(self, player):
+        return list(
+            PlayerRatingHistory.objects.filter(player=player)
+            .order_by("recorded_at")
+            .values_list("resolution", "rating", "rating_min", "rating_max", "samples")
+        )
+
+    def _player(self, username):
+        user = User.objects.create_user(username=username, password="password")
+        return Player.objects.create(user=user, position="FWD")
+
+    def test_compacts_old_rows_into_days_and_weeks(self):
+        player = self._player("hist")
+        kyiv = ZoneInfo("Europe/Kyiv")
+        self._history(
+            player,
+            # чотири зміни за тиждень з понеділка 06.11.2023 -> один тижневий запис
+            (datetime(2023, 11, 6, 9, tzinfo=kyiv), "5.00"),
+            (datetime(2023, 11, 7, 9, tzinfo=kyiv), "9.00"),
+            (datetime(2023, 11, 9, 9, tzinfo=kyiv), "4.00"),
+            (datetime(2023, 11, 12, 23, tzinfo=kyiv), "6.50"),
+            # одна зміна 05.05 і три 06.05 -> два денні записи
+            (datetime(2024, 5, 5, 10, tzinfo=kyiv), "7.00"),
+            (datetime(2024, 5, 6, 0, 30, tzinfo=kyiv), "6.00"),
+            (datetime(2024, 5, 6, 12, tzinfo=kyiv), "8.00"),
+            (datetime(2024, 5, 6, 23, 30, tzinfo=kyiv), "7.50"),
+            # свіжі записи не змінюються
+            (datetime(2024, 5, 16, 0, 0, tzinfo=kyiv), "7.20"),
+            (datetime(2024, 6, 14, 18, tzinfo=kyiv), "7.40"),
+        )
+
+        assert PlayerRatingHistory.objects.compact(self.NOW) == (8, 3)
+        assert self._rows(player) == [
+            ("week", Decimal("6.50"), Decimal("4.00"), Decimal("9.00"), 4),
+            ("day", Decimal("7.00"), Decimal("7.00"), Decimal("7.00"), 1),
+            ("day", Decimal("7.50"), Decimal("6.00"), Decimal("8.00"), 3),
+            ("raw", Decimal("7.20"), None, None, 1),
+            ("raw", Decimal("7.40"), None, None, 1),
+        ]
+        assert PlayerRatingHistory.objects.compact(self.NOW) == (0, 0)
+        assert not PlayerRatingHistory.objects.needs_compaction(self.NOW).exists()
+
+        # Через пів року все, що старше 01.07.2024, — по тижнях; 05.05 —
+        # неділя, тож денні записи 05.05 і 06.05 потрапляють у різні тижні
+        later = self.NOW + timedelta(days=200)
+        assert PlayerRatingHistory.objects.compact(later) == (4, 4)
+        assert [row[0] for row in self._rows(player)] == ["week"] * 5
+        assert self._rows(player)[2] == (
+            "week",
+            Decimal("7.50"),
+            Decimal("6.00"),
+            Decimal("8.00"),
+            3,
+        )
+        assert PlayerRatingHistory.objects.compact(later) == (0, 0)
+
+    def test_command_compacts_in_batches(self):
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        old = timezone.now() - timedelta(days=400)
+        players = [self._player(f"c{i}") for i in range(3)]
+        for player in players:
+            self._history(
+                player, *((old + timedelta(hours=h), "6.00") for h in range(5))
+            )
+
+        out = StringIO()
+        call_command("compact_rating_history", batch_size=2, stdout=out)
+        assert "Згорнуто 15 записів історії в 3 (3 гравців)" in out.getvalue()
+        assert [row[-1] for row in self._rows(players[0])] == [5]
+        assert not PlayerRatingHistory.objects.needs_compaction().exists()
@@ -0,0 +1,101 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+
+import pytest
+
+from backend.players import models as backend_models
+from backend.players.services import PlayerRatingService as BackendRatingService
+from my_app.models import Player, PlayerRatingHistory, PlayerStats
+from my_app.rating_engine import FORMULAS, LegacyWeightsFormula
+from my_app.services import PlayerRatingService, rating_engine
+
+
+def legacy_reference(goals, assists, yellow_cards, red_cards):
+    """Цикл зі старого backend.players PlayerRatingService.calculate_rating."""
+    rating = Decimal("5.0")
+    rating += goals * Decimal("3.0") + assists * Decimal("2.0")
+    rating += yellow_cards * Decimal("-1.0") + red_cards * Decimal("-3.0")
+    return max(Decimal("1.0"), min(Decimal("10.0"), rating))
+
+
+class TestFormulas:
+    def test_registry(self):
+        assert set(FORMULAS) == {"xg", "legacy"}
+
+    def test_legacy_formula_matches_reference(self):
+        rows = [
+            (g, a, y, r)
+            for g in range(4)
+            for a in range(3)
+            for y in range(3)
+            for r in range(2)
+        ]
+        goals, assists, yellow, red = zip(*rows)
+        tenths = LegacyWeightsFormula().match_ratings(
+            ["MID"] * len(rows),
+            goals=goals,
+            assists=assists,
+            yellow_cards=yellow,
+            red_cards=red,
+        )
+        assert [Decimal(int(t)) / 10 for t in tenths] == [
+            legacy_reference(*row) for row in rows
+        ]
+
+
+@pytest.mark.django_db
+class TestRatingEngine:
+    def test_repeated_calculation_is_memoized(self, django_assert_num_queries):
+        user = User.objects.create_user(username="memo", password="password")
+        player = Player.objects.create(user=user, position="FWD")
+        PlayerStats.objects.create(player=player, match_id=1, goals=1)
+        rating_engine.forget()
+
+        assert PlayerRatingService.calculate_rating(player) == Decimal("6.00")
+        with django_assert_num_queries(0):
+            assert PlayerRatingService.calculate_rating(player) == Decimal("6.00")
+
+        PlayerStats.objects.create(player=player, match_id=2, goals=3)
+        assert PlayerRatingService.calculate_rating(player) == Decimal("7.00")
+        assert PlayerRatingHistory.objects.filter(player=player).count() == 2
+
+    def test_default_state_key_hits_without_queries(self, django_assert_num_queries):
+        user = User.objects.create_user(username="versioned", password="password")
+        player = backend_models.Player.objects.create(user=user, position="MID")
+        stats = backend_models.PlayerStats.objects.create(
+            player=player, match_id=1, goals=1
+        )
+
+        assert BackendRatingService.calculate_rating(player) == Decimal("8.00")
+        with django_assert_num_queries(0):
+            assert BackendRatingService.calculate_rating(player) == Decimal("8.00")
+
+        stats.assists = 1
+        stats.save()
+        assert BackendRatingService.calculate_rating(player) == Decimal("10.00")
+        stats.delete()
+        assert BackendRatingService.calculate_rating(player) == Decimal("0.00")
+
+    def test_backend_service_repairs_stale_match_ratings(self):
+        user = User.objects.create_user(username="legacy", password="password")
+        player = backend_models.Player.objects.create(user=user, position="MID")
+        backend_models.PlayerStats.objects.create(player=player, match_id=1, goals=1)
+        backend_models.PlayerStats.objects.create(
+            player=player, match_id=2, assists=1, yellow_cards=1
+        )
+
+        assert BackendRatingService.calculate_rating(player) == Decimal("7.00")
+        assert sorted(player.stats.values_list("rating", flat=True)) == [
+            Decimal("6.0"),
+            Decimal("8.0"),
+        ]
+        player.refresh_from_db()
+        assert player.matches_played == 2
+        assert player.overall_rating == Decimal("7.00")
+
+        BackendRatingService.calculate_rating(player)
+        assert (
+            backend_models.PlayerRatingHistory.objects.filter(player=player).count()
+            == 1
+        )
@@ -0,0 +1,131 @@
+import random
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+
+import numpy as np
+import pytest
+
+from my_app.models import Player, PlayerQuerySet, PlayerStats
+from my_app.rating_kernel import (
+    COLUMNS,
+    match_rating,
+    match_ratings,
+    position_code,
+    tenths_to_decimal,
+)
+
+POSITIONS = ["GK", "DEF", "MID", "FWD", "XX"]
+
+
+def reference_rating(position, row):
+    """Початкова Decimal-формула PlayerStats._calculate_match_rating."""
+    score = Decimal("5.0")
+    if row["minutes_played"] < 20:
+        score -= Decimal("1.5")
+    elif row["minutes_played"] < 45:
+        score -= Decimal("0.75")
+    elif row["minutes_played"] < 60:
+        score -= Decimal("0.25")
+    goal_weights = {
+        "GK": Decimal("0.5"),
+        "DEF": Decimal("1.5"),
+        "MID": Decimal("1.5"),
+        "FWD": Decimal("1.0"),
+    }
+    score += Decimal(str(row["goals"])) * goal_weights.get(position, Decimal("1.0"))
+    score += Decimal(str(row["assists"])) * Decimal("1.0")
+    score += min(Decimal(str(row["shots_on_target"])) * Decimal("0.2"), Decimal("1.5"))
+    score += min(Decimal(str(row["key_passes"])) * Decimal("0.15"), Decimal("0.9"))
+    if position == "GK":
+        score += min(Decimal(str(row["saves"])) * Decimal("0.3"), Decimal("2.0"))
+    if position in ("GK", "DEF", "MID"):
+        score += min(
+            (Decimal(str(row["tackles"])) + Decimal(str(row["interceptions"])))
+            * Decimal("0.1"),
+            Decimal("1.0"),
+        )
+    score -= Decimal(str(row["yellow_cards"])) * Decimal("1.0")
+    score -= Decimal(str(row["red_cards"])) * Decimal("3.0")
+    score = max(Decimal("1.0"), min(Decimal("10.0"), score))
+    return round(score, 1)
+
+
+def random_rows(count, seed):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        row = {name: rng.randint(0, 12) for name in COLUMNS}
+        row["yellow_cards"] = rng.randint(0, 2)
+        row["red_cards"] = rng.choice([0, 0, 0, 1])
+        row["minutes_played"] = rng.randint(0, 120)
+        rows.append((rng.choice(POSITIONS), row))
+    return rows
+
+
+class TestRatingKernel:
+    @pytest.mark.parametrize("seed", range(5))
+    def test_scalar_matches_reference(self, seed):
+        for position, row in random_rows(2000, seed):
+            assert match_rating(position, **row) == reference_rating(position, row)
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_vectorized_matches_reference(self, seed):
+        rows = random_rows(20000, seed)
+        tenths = match_ratings(
+            [position_code(position) for position, _ in rows],
+            **{name: [row[name] for _, row in rows] for name in COLUMNS},
+        )
+        expected = [reference_rating(position, row) for position, row in rows]
+        assert [tenths_to_decimal(t) for t in tenths] == expected
+
+    def test_half_tenths_round_to_even(self):
+        # 5.0 + 0.15 = 5.15 -> 5.2 ; 5.0 + 0.45 = 5.45 -> 5.4
+        assert match_rating("FWD", key_passes=1) == Decimal("5.2")
+        assert match_rating("FWD", key_passes=3) == Decimal("5.4")
+        tenths = match_ratings([position_code("FWD")] * 2, key_passes=[1, 3])
+        assert tenths.tolist() == [52, 54]
+
+    def test_missing_columns_use_defaults(self):
+        tenths = match_ratings(np.array([position_code("MID")]))
+        assert tenths.tolist() == [50]
+
+
+@pytest.mark.django_db
+class TestRescoreCommand:
+    def test_rescore_fixes_stale_ratings(self):
+        user = User.objects.create_user(username="rescore", password="password")
+        player = Player.objects.create(user=user, position="FWD")
+        stats = PlayerStats.objects.create(player=player, match_id=1, goals=2)
+        PlayerStats.objects.filter(pk=stats.pk).update(rating=Decimal("1.0"))
+        Player.objects.filter(pk=player.pk).update(overall_rating=Decimal("1.00"))
+
+        call_command("rescore_stats", chunk_size=1)
+
+        stats.refresh_from_db()
+        player.refresh_from_db()
+        assert stats.rating == Decimal("7.0")
+        assert player.overall_rating == Decimal("7.00")
+
+    def test_rescore_refreshes_players_in_batches(self, monkeypatch):
+        batches = []
+        refresh_ratings = PlayerQuerySet.refresh_ratings
+
+        def spy(queryset, *args, **kwargs):
+            batches.append(queryset.count())
+            return refresh_ratings(queryset, *args, **kwargs)
+
+        monkeypatch.setattr(PlayerQuerySet, "refresh_ratings", spy)
+        for n in range(5):
+            user = User.objects.create_user(username=f"batch{n}")
+            player = Player.objects.create(user=user, position="FWD")
+            PlayerStats.objects.create(player=player, match_id=1, goals=2)
+        PlayerStats.objects.update(rating=Decimal("1.0"))
+
+        call_command("rescore_stats", chunk_size=2)
+
+        assert batches == [2, 2, 1]
+        assert set(Player.objects.values_list("overall_rating", flat=True)) == {
+            Decimal("7.00")
+        }
@@ -0,0 +1,441 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from django.contrib.auth.models import User
+
+import pytest
+from rest_framework.test import APIClient
+
+from my_app import upl_service
+from my_app.models import (
+    UPL_SQUADS_VERSION,
+    CacheVersion,
+    UPLSquadCache,
+    UPLSquadRefresh,
+)
+from my_app.upl_service import UPL_TEAM_IDS, sync_squads
+
+
+class StubAPIHandler(BaseHTTPRequestHandler):
+    """
+    Заглушка API-Football: склади з server.squads, server.broken — помилки.
+
+    Команди з server.pages віддають порожній /players/squads, а гравців —
+    сторінками /players; server.broken_pages — сторінки з помилкою,
+    server.throttle — скільки перших запитів отримають 429.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        team_id = int(query["team"][0])
+        page = int(query.get("page", ["1"])[0])
+        with server.lock:
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+            server.connections.add(self.client_address)
+            server.calls.append((url.path, team_id))
+            throttled = server.throttle > 0
+            server.throttle -= throttled
+        time.sleep(0.05)
+        with server.lock:
+            server.active -= 1
+
+        if throttled:
+            status, body = 429, {}
+        elif team_id in server.broken:
+            status, body = (500, {}) if url.path.endswith("squads") else (200, {})
+        elif team_id in server.pages and url.path.endswith("squads"):
+            status, body = 200, {"response": [{"players": []}]}
+        elif team_id in server.pages:
+            pages = server.pages[team_id]
+            status = 500 if page in server.broken_pages else 200
+            body = {
+                "paging": {"current": page, "total": len(pages)},
+                "response": [
+                    {
+                        "player": {"id": player_id, "name": f"P{player_id}"},
+                        "statistics": [{"games": {"position": "Defender"}}],
+                    }
+                    for player_id in pages[page - 1]
+                ],
+            }
+        else:
+            players = [
+                {"name": name, "age": 25, "number": n, "position": "Midfielder"}
+                for n, name in enumerate(server.squads.get(team_id, []), start=1)
+            ]
+            status, body = 200, {"response": [{"players": players}]}
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("X-RateLimit-Limit", "6000")
+        self.send_header("X-RateLimit-Remaining", "5999")
+        if throttled:
+            self.send_header("Retry-After", "0")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def clear_squad_cache():
+    # Кеш у пам'яті живе весь процес, а база між тестами відкочується
+    upl_service.squad_cache.clear()
+    yield
+    upl_service.squad_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def rate_limiter(monkeypatch):
+    # Свіжий лічильник ліміту API на кожен тест
+    limiter = upl_service.RateLimiter(per_minute=6000)
+    monkeypatch.setattr(upl_service, "rate_limiter", limiter)
+    return limiter
+
+
+@pytest.fixture
+def stub_api(settings, monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubAPIHandler)
+    server.lock = threading.Lock()
+    server.active = server.peak = 0
+    server.connections, server.calls = set(), []
+    server.squads = {team_id: [f"P{team_id}"] for team_id in UPL_TEAM_IDS.values()}
+    server.broken = set()
+    server.pages, server.broken_pages, server.throttle = {}, set(), 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    settings.API_FOOTBALL_URL = f"http://127.0.0.1:{server.server_port}"
+    # Свіжий пул з'єднань, щоб рахувати з'єднання саме цього тесту
+    monkeypatch.setattr(upl_service, "_session", None)
+    yield server
+    upl_service.get_session().close()
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.django_db
+class TestSquadSync:
+    def test_concurrent_sync_upserts_and_keeps_stale_rows(self, stub_api):
+        old = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        for name in ("Динамо", "Шахтар"):
+            UPLSquadCache.objects.create(
+                team_name=name,
+                api_team_id=UPL_TEAM_IDS[name],
+                squad_json=[{"name": "Old"}],
+                fetched_at=old,
+            )
+        stub_api.broken = {UPL_TEAM_IDS["Шахтар"], UPL_TEAM_IDS["Зоря"]}
+
+        results = sync_squads(workers=4)
+
+        assert set(results) == set(UPL_TEAM_IDS)
+        assert results["Динамо"] == {"players": 1, "source": "api"}
+        assert results["Шахтар"] == {"players": 1, "source": "stale_cache"}
+        assert results["Зоря"] == {"players": 0, "source": "fallback"}
+
+        dynamo = UPLSquadCache.objects.get(team_name="Динамо")
+        assert [p["name"] for p in dynamo.squad_json] == ["P572"]
+        assert dynamo.fetched_at > old
+        shakhtar = UPLSquadCache.objects.get(team_name="Шахтар")
+        assert shakhtar.squad_json == [{"name": "Old"}]
+        assert shakhtar.fetched_at == old
+        assert not UPLSquadCache.objects.filter(team_name="Зоря").exists()
+        assert UPLSquadCache.objects.count() == len(UPL_TEAM_IDS) - 1
+
+        # Паралельно, але не більше workers запитів, по пулу з'єднань
+        assert 1 < stub_api.peak <= 4
+        assert len(stub_api.connections) <= 4
+        assert len(stub_api.calls) == len(UPL_TEAM_IDS) + 2
+
+    def test_sync_view_enqueues_job(self, stub_api):
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        admin = User.objects.create_user(username="admin", is_staff=True)
+        client = APIClient()
+        client.force_authenticate(admin)
+
+        response = client.post("/api/upl/sync/")
+        assert response.status_code == 202
+        assert response.data["kind"] == "upl_sync"
+        assert response.data["status"] == "queued"
+        # Поки синхронізація в черзі, повторний запит не додає нової
+        assert client.post("/api/upl/sync/").data["id"] == response.data["id"]
+        assert not stub_api.calls
+
+        call_command("run_worker", burst=True, processes=0, stdout=StringIO())
+        job = client.get(response.data["url"]).data
+        assert job["status"] == "succeeded"
+        synced = job["result"]["synced"]
+        assert {row["source"] for row in synced.values()} == {"api"}
+        requests = job["result"]["requests"]
+        assert requests["requests"] == len(UPL_TEAM_IDS)
+        assert requests["statuses"] == {"200": len(UPL_TEAM_IDS)}
+        assert requests["latency_ms"]["p50"] >= 50
+        assert UPLSquadCache.objects.count() == len(UPL_TEAM_IDS)
+
+        client.force_authenticate(User.objects.create_user(username="fan"))
+        assert client.post("/api/upl/sync/").status_code == 403
+
+    def test_get_squad_uses_pooled_session(self, stub_api):
+        for _ in range(3):
+            UPLSquadCache.objects.all().delete()
+            assert upl_service.get_squad("Верес")["source"] == "api"
+        assert len(stub_api.calls) == 3
+        assert len(stub_api.connections) == 1
+
+
+@pytest.mark.django_db
+class TestPagedFetch:
+    def test_fallback_follows_all_pages(self, stub_api):
+        team_id = UPL_TEAM_IDS["Динамо"]
+        # Гравець 3 є на двох сторінках (перейшов між сторінками під час запитів)
+        stub_api.pages = {team_id: [[1, 2, 3], [3, 4, 5], [6], [7]]}
+        stats = upl_service.RequestStats()
+
+        results = sync_squads(["Динамо"], stats=stats)
+
+        assert results["Динамо"] == {"players": 7, "source": "api"}
+        squad = UPLSquadCache.objects.get(team_name="Динамо").squad_json
+        assert [p["name"] for p in squad] == [f"P{n}" for n in range(1, 8)]
+        assert squad[0]["position"] == "Defender"
+        summary = stats.summary()
+        assert summary["endpoints"] == {"/players/squads": 1, "/players": 4}
+        # Сторінки 2–4 запитуються паралельно після першої
+        assert stub_api.peak == 3
+        assert summary["elapsed_s"] < 0.3
+
+    def test_failed_page_keeps_stale_squad(self, stub_api):
+        old = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        UPLSquadCache.objects.create(
+            team_name="Динамо",
+            api_team_id=UPL_TEAM_IDS["Динамо"],
+            squad_json=[{"name": "Old"}],
+            fetched_at=old,
+        )
+        stub_api.pages = {UPL_TEAM_IDS["Динамо"]: [[1], [2], [3]]}
+        stub_api.broken_pages = {2}
+
+        results = sync_squads(["Динамо"])
+
+        assert results["Динамо"] == {"players": 1, "source": "stale_cache"}
+        squad = UPLSquadCache.objects.get(team_name="Динамо").squad_json
+        assert squad == [{"name": "Old"}]
+
+    def test_429_pauses_and_retries(self, stub_api):
+        stub_api.throttle = 1
+        stats = upl_service.RequestStats()
+
+        results = sync_squads(["Верес"], stats=stats)
+
+        assert results["Верес"]["source"] == "api"
+        summary = stats.summary()
+        assert summary["statuses"] == {"429": 1, "200": 1}
+        assert summary["retries"] == 1
+
+    def test_exhausted_daily_quota_stops_requests(self, stub_api, rate_limiter):
+        rate_limiter.update({"x-ratelimit-requests-remaining": "0"})
+
+        assert sync_squads(["Верес"])["Верес"]["source"] == "fallback"
+        assert not stub_api.calls
+        with pytest.raises(upl_service.QuotaExceeded):
+            rate_limiter.acquire()
+
+
+class TestRateLimiter:
+    def test_headers_set_rate_and_remaining_tokens(self):
+        limiter = upl_service.RateLimiter()
+        limiter.update({"X-RateLimit-Limit": "600", "X-RateLimit-Remaining": "0"})
+
+        assert limiter.acquire() == pytest.approx(0.1, abs=0.05)
+        assert limiter.capacity == 600
+
+    def test_bucket_starts_full(self):
+        limiter = upl_service.RateLimiter(per_minute=3)
+        assert [limiter.acquire() for _ in range(3)] == [0, 0, 0]
+        assert limiter.tokens < 1
+
+
+@pytest.fixture
+def deferred(monkeypatch):
+    """Фонові оновлення не запускаються, а складаються в список для ручного запуску."""
+    calls = []
+    monkeypatch.setattr(
+        upl_service, "_in_background", lambda func, *args: calls.append((func, args))
+    )
+    return calls
+
+
+@pytest.mark.django_db
+class TestStaleWhileRevalidate:
+    def _stale(self, name, hours=25):
+        return UPLSquadCache.objects.create(
+            team_name=name,
+            api_team_id=UPL_TEAM_IDS[name],
+            squad_json=[{"name": "Old"}],
+            fetched_at=datetime.now(timezone.utc) - timedelta(hours=hours),
+        )
+
+    def test_stale_squad_is_served_and_refreshed_once(self, stub_api, deferred):
+        self._stale("Динамо")
+
+        first = upl_service.get_squad("Динамо")
+        assert first["source"] == "stale_cache" and first["refreshing"] is True
+        assert first["players"] == [{"name": "Old"}]
+        # Поки оновлення триває, інші запити не запускають ще одне
+        second = upl_service.get_squad("Динамо")
+        assert second["source"] == "stale_cache" and second["refreshing"] is False
+        assert len(deferred) == 1 and not stub_api.calls
+
+        func, args = deferred.pop()
+        func(*args)
+        assert len(stub_api.calls) == 1
+        fresh = upl_service.get_squad("Динамо")
+        assert fresh["source"] == "cache"
+        assert [p["name"] for p in fresh["players"]] == ["P572"]
+        assert not UPLSquadRefresh.objects.get(team_name="Динамо").locked_until
+
+    def test_failing_team_backs_off_exponentially(self, stub_api, deferred):
+        self._stale("Шахтар")
+        stub_api.broken = {UPL_TEAM_IDS["Шахтар"]}
+
+        def refresh():
+            assert upl_service.get_squad("Шахтар")["refreshing"] is True
+            func, args = deferred.pop()
+            func(*args)
+            return UPLSquadRefresh.objects.get(team_name="Шахтар")
+
+        state = refresh()
+        delay = state.retry_at - datetime.now(timezone.utc)
+        assert state.failures == 1 and not state.locked_until
+        assert timedelta(seconds=55) < delay <= upl_service.RETRY_BASE
+        # Під час паузи API не викликається, а кеш віддається як є
+        calls = len(stub_api.calls)
+        assert upl_service.get_squad("Шахтар")["refreshing"] is False
+        assert not deferred and len(stub_api.calls) == calls
+
+        UPLSquadRefresh.objects.update(retry_at=datetime.now(timezone.utc))
+        state = refresh()
+        assert state.failures == 2
+        assert state.retry_at - datetime.now(timezone.utc) > upl_service.RETRY_BASE
+
+        stub_api.broken = set()
+        UPLSquadRefresh.objects.update(retry_at=datetime.now(timezone.utc))
+        state = refresh()
+        assert (state.failures, state.retry_at) == (0, None)
+
+    def test_first_load_coalesces_and_respects_backoff(self, stub_api, monkeypatch):
+        monkeypatch.setattr(upl_service, "FIRST_LOAD_WAIT_SECONDS", 0.3)
+        monkeypatch.setattr(upl_service, "FIRST_LOAD_POLL_SECONDS", 0.05)
+        # Інший процес уже завантажує склад: чекаємо його, а не йдемо в API
+        assert UPLSquadRefresh.objects.acquire("Зоря", timedelta(minutes=1))
+        assert upl_service.get_squad("Зоря")["source"] == "fallback"
+        assert not stub_api.calls
+
+        assert UPLSquadRefresh.objects.acquire("Рух", timedelta(minutes=1))
+        UPLSquadRefresh.objects.fail("Рух", "down", timedelta(minutes=5), timedelta(1))
+        result = upl_service.get_squad("Рух")
+        assert result["source"] == "fallback" and result["retry_at"]
+        assert not stub_api.calls
+
+    def test_sync_clears_backoff(self, stub_api):
+        assert UPLSquadRefresh.objects.acquire("Колос", timedelta(minutes=1))
+        UPLSquadRefresh.objects.fail("Колос", "down", timedelta(hours=1), timedelta(1))
+        sync_squads(["Колос"])
+        state = UPLSquadRefresh.objects.get(team_name="Колос")
+        assert (state.failures, state.retry_at) == (0, None)
+
+    def test_sync_keeps_lock_of_running_refresh(self, stub_api):
+        assert UPLSquadRefresh.objects.acquire("Колос", timedelta(minutes=1))
+        sync_squads(["Колос"])
+        state = UPLSquadRefresh.objects.get(team_name="Колос")
+        assert state.locked(datetime.now(timezone.utc))
+        assert not UPLSquadRefresh.objects.acquire("Колос", timedelta(minutes=1))
+
+
+@pytest.mark.django_db
+class TestSquadMemoryCache:
+    def _squad(self, name, players, hours=1):
+        return UPLSquadCache.objects.update_or_create(
+            team_name=name,
+            defaults={
+                "api_team_id": UPL_TEAM_IDS[name],
+                "squad_json": [{"name": player} for player in players],
+                "fetched_at": datetime.now(timezone.utc) - timedelta(hours=hours),
+            },
+        )[0]
+
+    def test_hot_lookup_is_served_from_memory(self, django_assert_num_queries):
+        self._squad("Динамо", ["A", "B"])
+        client = APIClient()
+        first = client.get("/api/upl/squad/Динамо/")
+        assert first["Content-Type"] == "application/json"
+        assert json.loads(first.content) == upl_service.get_squad("Динамо")
+
+        with django_assert_num_queries(0):
+            payload = upl_service.get_squad_payload("Динамо")
+        assert payload is upl_service.get_squad_payload("Динамо")
+        assert client.get("/api/upl/squad/Динамо/").content == payload
+
+    def test_writes_from_other_processes_invalidate(self, monkeypatch):
+        monkeypatch.setattr(upl_service, "VERSION_CHECK_SECONDS", 0)
+        squad = self._squad("Динамо", ["A"])
+        assert b'"A"' in upl_service.get_squad_payload("Динамо")
+
+        # Інший процес: запис без сигналів, але зі зміною лічильника
+        UPLSquadCache.objects.filter(pk=squad.pk).update(squad_json=[{"name": "B"}])
+        assert b'"A"' in upl_service.get_squad_payload("Динамо")
+        CacheVersion.objects.bump(UPL_SQUADS_VERSION)
+        assert b'"B"' in upl_service.get_squad_payload("Динамо")
+
+        # Запис через ORM змінює лічильник сигналом
+        version = CacheVersion.objects.current(UPL_SQUADS_VERSION)
+        self._squad("Динамо", ["C"])
+        assert CacheVersion.objects.current(UPL_SQUADS_VERSION) == version + 1
+        assert b'"C"' in upl_service.get_squad_payload("Динамо")
+
+    def test_entry_expires_with_fetched_at(self, deferred):
+        self._squad("Зоря", ["A"], hours=23)
+        assert b'"cache"' in upl_service.get_squad_payload("Зоря")
+        UPLSquadCache.objects.filter(team_name="Зоря").update(
+            fetched_at=datetime.now(timezone.utc) - timedelta(hours=25)
+        )
+        assert b'"cache"' in upl_service.get_squad_payload("Зоря")
+
+        payload, version = upl_service.squad_cache.get("Зоря")
+        upl_service.squad_cache.put("Зоря", payload, time.time() - 1, version)
+        assert b'"stale_cache"' in upl_service.get_squad_payload("Зоря")
+        assert len(deferred) == 1
+
+    def test_lru_is_bounded(self):
+        cache = upl_service.SquadMemoryCache(maxsize=2)
+        _, version = cache.get("a")
+        expires = time.time() + 60
+        for name in ("a", "b"):
+            cache.put(name, name.encode(), expires, version)
+        cache.get("a")
+        cache.put("c", b"c", expires, version)
+        assert [cache.get(name)[0] for name in ("a", "b", "c")] == [b"a", None, b"c"]
+
+        # Прочитане під старою версією не потрапляє в кеш
+        cache.put("d", b"d", expires, version - 1)
+        assert cache.get("d")[0] is None
+
+    def test_sync_invalidates(self, stub_api):
+        self._squad("Динамо", ["Old"])
+        assert b'"Old"' in upl_service.get_squad_payload("Динамо")
+        sync_squads(["Динамо"])
+        assert b'"P572"' in upl_service.get_squad_payload("Динамо")
@@ -4,7 +4,7 @@ from django.urls import reverse
 import pytest
 from rest_framework.test import APIClient
 
-from my_app.models import Match, Player, Team, Tournament
+from my_app.models import LeaderboardEntry, Match, Player, Standing, Team, Tournament
 
 
 @pytest.fixture
@@ -135,6 +135,34 @@ class TestViews:
         response = api_client.get("/api/players/leaderboard/")
         assert response.status_code == 200
 
+    def test_leaderboard_keyset_pages_and_rank(self, api_client):
+        for i in range(5):
+            user = User.objects.create_user(username=f"lb{i}", password="pwd")
+            player = Player.objects.create(
+                user=user, position="FWD" if i % 2 else "MID"
+            )
+            Player.objects.filter(pk=player.pk).update(overall_rating=i)
+        LeaderboardEntry.objects.rebuild()
+
+        seen = []
+        url = "/api/players/leaderboard/?page_size=2"
+        while url:
+            response = api_client.get(url)
+            assert response.status_code == 200
+            seen += [row["username"] for row in response.data["results"]]
+            url = response.data["next"]
+        assert seen == ["lb4", "lb3", "lb2", "lb1", "lb0"]
+
+        response = api_client.get("/api/players/leaderboard/?position=FWD")
+        assert [row["position_rank"] for row in response.data["results"]] == [1, 2]
+
+        player = Player.objects.get(user__username="lb1")
+        response = api_client.get(f"/api/players/{player.pk}/rank/")
+        assert response.data["rank"] == 4
+        assert response.data["position_rank"] == 2
+        assert response.data["total"] == 5
+        assert response.data["position_total"] == 2
+
     def test_player_search(self, api_client):
         response = api_client.get("/api/players/search/?q=prof")
         assert response.status_code == 200
@@ -142,3 +170,576 @@ class TestViews:
     def test_upl_squad(self, api_client):
         response = api_client.get("/api/upl/squad/shakhtar/")
         assert response.status_code in [200, 404, 500]
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+    def _tournament(self):
+        return Tournament.objects.create(
+            name="Cache Cup",
+            start_date="2024-06-01",
+            end_date="2024-07-01",
+            format="Groups",
+            max_teams=8,
+            location="Kyiv",
+        )
+
+    def test_repeat_get_is_served_from_cache(
+        self, api_client, django_assert_num_queries
+    ):
+        tour = self._tournament()
+        url = f"/api/tournaments/{tour.id}/"
+        first = api_client.get(url)
+        assert first.status_code == 200
+
+        with django_assert_num_queries(0):
+            second = api_client.get(url)
+        assert second.data == first.data
+        assert second["ETag"] == first["ETag"]
+
+        with django_assert_num_queries(0):
+            response = api_client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        assert response.status_code == 304
+        response = api_client.get(url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        assert response.status_code == 304
+
+    def test_match_write_invalidates_tournament(self, api_client):
+        tour = self._tournament()
+        url = f"/api/tournaments/{tour.id}/"
+        etag = api_client.get(url)["ETag"]
+
+        Match.objects.create(
+            tournament=tour,
+            date="2024-06-15T20:00:00Z",
+            home_team="Dynamo",
+            away_team="Shakhtar",
+        )
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert len(response.data["matches"]) == 1
+        assert response["ETag"] != etag
+
+    def test_auth_scope_is_part_of_key(self, api_client):
+        tour = self._tournament()
+        anonymous = api_client.get(f"/api/tournaments/{tour.id}/")
+        user = User.objects.create_user(username="cached", password="pwd")
+        api_client.force_authenticate(user=user)
+        response = api_client.get(f"/api/tournaments/{tour.id}/")
+        assert response["ETag"] != anonymous["ETag"]
+        assert "private" in response["Cache-Control"]
+
+
+@pytest.mark.django_db
+class TestTournamentList:
+    def _tournament(self, teams):
+        tour = Tournament.objects.create(
+            name=f"Cup {teams}",
+            start_date="2024-06-01",
+            end_date="2024-07-01",
+            format="Groups",
+            max_teams=16,
+            location="Lviv",
+        )
+        for i in range(teams):
+            team = Team.objects.create(
+                tournament=tour,
+                name=f"Team {teams}-{i}",
+                captain="Captain",
+                email=f"t{teams}-{i}@example.com",
+                phone="111",
+            )
+            Standing.objects.create(tournament=tour, team=team)
+            Match.objects.create(
+                tournament=tour,
+                date="2024-06-15T20:00:00Z",
+                home_team=team.name,
+                away_team="Guests",
+            )
+        return tour
+
+    def test_list_is_summary_with_constant_queries(self, django_assert_num_queries):
+        self._tournament(1)
+        with django_assert_num_queries(3):
+            response = APIClient().get("/api/tournaments/?expand=standings")
+        assert response.status_code == 200
+
+        self._tournament(8)
+        self._tournament(3)
+        with django_assert_num_queries(3):
+            response = APIClient().get("/api/tournaments/?expand=standings")
+        assert response.status_code == 200
+
+        row = response.data["results"][1]
+        assert row["teams_count"] == 8
+        assert row["matches_count"] == 8
+        assert "teams" not in row and "matches" not in row
+        assert len(row["standings"]) == 8
+        assert row["standings"][0]["team_name"] == "Team 8-0"
+
+    def test_retrieve_keeps_nested_form(self):
+        tour = self._tournament(2)
+        response = APIClient().get(f"/api/tournaments/{tour.id}/")
+        assert len(response.data["teams"]) == 2
+        assert len(response.data["standings"]) == 2
+        assert len(response.data["matches"]) == 2
+
+    def test_matches_filter_by_team(self):
+        tour = self._tournament(3)
+        team = Team.objects.get(name="Team 3-1")
+        Match.objects.create(
+            tournament=tour,
+            date="2024-06-20T20:00:00Z",
+            home_team="Team 3-0",
+            away_team=team.name,
+        )
+        response = APIClient().get(f"/api/matches/?team={team.id}")
+        rows = response.data["results"]
+        assert [(row["home_team"], row["away_team"]) for row in rows] == [
+            ("Team 3-1", "Guests"),
+            ("Team 3-0", "Team 3-1"),
+        ]
+        assert rows[1]["away_team_ref"] == team.id
+
+
+@pytest.mark.django_db
+class TestCoachStats:
+    def _league(self, coach, matches):
+        tour = Tournament.objects.create(
+            name=f"League {matches}",
+            start_date="2024-06-01",
+            end_date="2024-07-01",
+            format="League",
+            max_teams=4,
+            location="Odesa",
+        )
+        ours = Team.objects.create(
+            tournament=tour,
+            coach=coach,
+            name=f"Ours {matches}",
+            captain="C",
+            email="o@example.com",
+            phone="1",
+        )
+        rival = Team.objects.create(
+            tournament=tour,
+            name=f"Rival {matches}",
+            captain="C",
+            email="r@example.com",
+            phone="2",
+        )
+        # Рахунки з боку команди тренера: перемога, нічия, поразка по черзі;
+        # у непарні дні вона грає в гостях
+        scores = [(2, 0), (1, 1), (0, 3)]
+        for day in range(matches):
+            scored, conceded = scores[day % 3]
+            at_home = day % 2 == 0
+            Match.objects.create(
+                tournament=tour,
+                date=f"2024-06-{day + 1:02d}T18:00:00Z",
+                home_team_ref=ours if at_home else rival,
+                away_team_ref=rival if at_home else ours,
+                home_score=scored if at_home else conceded,
+                away_score=conceded if at_home else scored,
+            )
+        return tour
+
+    def _get(self, client):
+        response = client.get("/api/auth/coach_stats/")
+        assert response.status_code == 200
+        return response.data
+
+    def test_aggregates_in_constant_queries(self, settings, django_assert_num_queries):
+        settings.API_CACHE_TIMEOUT = 0
+        coach = User.objects.create_user(username="coach", password="password")
+        client = APIClient()
+        client.force_authenticate(coach)
+
+        self._league(coach, 3)
+        with django_assert_num_queries(3):
+            self._get(client)
+        self._league(coach, 12)
+        with django_assert_num_queries(3):
+            data = self._get(client)
+
+        assert data["teams"] == 2 and data["tournaments"] == 2
+        assert data["played"] == 15
+        assert (data["wins"], data["draws"], data["losses"]) == (5, 5, 5)
+        assert (data["goals_for"], data["goals_against"]) == (15, 20)
+        assert data["form"] == ["L", "D", "W", "L", "D"]
+
+    def test_cached_per_coach_until_match_write(self, django_assert_num_queries):
+        coach = User.objects.create_user(username="coach", password="password")
+        client = APIClient()
+        client.force_authenticate(coach)
+        tour = self._league(coach, 1)
+        assert self._get(client)["wins"] == 1
+
+        with django_assert_num_queries(0):
+            self._get(client)
+
+        other = User.objects.create_user(username="other", password="password")
+        client.force_authenticate(other)
+        assert self._get(client)["teams"] == 0
+
+        client.force_authenticate(coach)
+        match = Match.objects.get(tournament=tour)
+        match.home_score = 0
+        match.save()
+        assert self._get(client)["draws"] == 1
+
+
+@pytest.mark.django_db
+class TestRoles:
+    def _login(self, username):
+        response = APIClient().post(
+            "/api/token/", {"username": username, "password": "password"}
+        )
+        assert response.status_code == 200
+        return response.data
+
+    def _delete(self, tokens):
+        """
+        DELETE неіснуючого турніру: 404 для тренера, 403 для інших. Запити —
+        лише користувач токена і (для тренера) турнір: ролі без запиту до груп.
+        """
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        return client.delete("/api/tournaments/999/").status_code
+
+    def test_roles_claim_and_cache_skip_group_queries(self, django_assert_num_queries):
+        from django.contrib.auth.models import Group
+        from django.core.cache import cache
+
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        coach = User.objects.create_user(username="coach", password="password")
+        coach.groups.add(Group.objects.create(name="Coach"))
+        tokens = self._login("coach")
+        assert AccessToken(tokens["access"])["roles"] == ["Coach"]
+
+        with django_assert_num_queries(2):
+            assert self._delete(tokens) == 404
+        # Без запису в кеші ролі беруться з claim'а токена
+        cache.clear()
+        with django_assert_num_queries(2):
+            assert self._delete(tokens) == 404
+
+    def test_group_change_overrides_stale_claim(self, django_assert_num_queries):
+        from django.contrib.auth.models import Group
+
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        coach = User.objects.create_user(username="coach", password="password")
+        group = Group.objects.create(name="Coach")
+        coach.groups.add(group)
+        tokens = self._login("coach")
+
+        group.user_set.clear()
+        with django_assert_num_queries(1):
+            assert self._delete(tokens) == 403
+        coach.groups.add(group)
+        with django_assert_num_queries(2):
+            assert self._delete(tokens) == 404
+
+        coach.groups.remove(group)
+        refreshed = APIClient().post(
+            "/api/token/refresh/", {"refresh": tokens["refresh"]}
+        )
+        assert AccessToken(refreshed.data["access"])["roles"] == []
+        with django_assert_num_queries(1):
+            assert self._delete(refreshed.data) == 403
+
+    def test_cached_roles_expire_with_access_token(
+        self, django_assert_num_queries, monkeypatch
+    ):
+        import time
+        from types import SimpleNamespace
+
+        from django.contrib.auth.models import Group
+        from django.core.cache.backends import locmem
+
+        from my_app import roles
+
+        coach = User.objects.create_user(username="coach", password="password")
+        coach.groups.add(Group.objects.create(name="Coach"))
+        tokens = self._login("coach")
+        # Роль відкликано в іншому процесі: тут кеш і claim ще кажуть "Coach"
+        Group.objects.get(name="Coach").user_set.through.objects.all().delete()
+        with django_assert_num_queries(2):
+            assert self._delete(tokens) == 404
+
+        later = time.time() + roles.cache_timeout() + 1
+        monkeypatch.setattr(locmem, "time", SimpleNamespace(time=lambda: later))
+        tokens = self._login("coach")
+        with django_assert_num_queries(1):
+            assert self._delete(tokens) == 403
+
+
+@pytest.mark.django_db
+class TestProfileList:
+    def _users(self, count):
+        from django.contrib.auth.models import Group
+
+        from my_app.models import UserProfile
+
+        users = User.objects.bulk_create(
+            User(username=f"user_{n}") for n in range(count)
+        )
+        UserProfile.objects.bulk_create(UserProfile(user=user) for user in users)
+        Player.objects.bulk_create(
+            Player(user=user, position="MID") for user in users[::2]
+        )
+        coaches, _ = Group.objects.get_or_create(name="Coach")
+        coaches.user_set.add(*users[1::3])
+
+    @pytest.mark.parametrize("total", [1, 100, 1000])
+    def test_constant_queries(self, settings, django_assert_num_queries, total):
+        settings.API_CACHE_TIMEOUT = 0
+        self._users(total)
+        # COUNT для пагінації і одна сторінка з профілем, гравцем і прапорцем
+        with django_assert_num_queries(2):
+            response = APIClient().get("/api/profiles/")
+        assert response.status_code == 200
+
+        rows = response.data["results"]
+        assert rows[0]["player"]["position"] == "MID"
+        if total > 1:
+            assert rows[1]["player"] is None
+            assert [row["is_coach"] for row in rows][:2] == [False, True]
+
+
+@pytest.mark.django_db
+class TestPlayerList:
+    def _players(self, count, stats):
+        from my_app.models import PlayerStats
+
+        players = []
+        for n in range(count):
+            user = User.objects.create_user(username=f"p{count}_{n}")
+            players.append(Player.objects.create(user=user, position="FWD"))
+        PlayerStats.objects.bulk_ingest(
+            [
+                PlayerStats(player=player, match_id=match_id, goals=match_id % 3)
+                for player in players
+                for match_id in range(stats)
+            ]
+        )
+        return players
+
+    def test_recent_stats_in_fixed_queries(self, settings, django_assert_num_queries):
+        settings.API_CACHE_TIMEOUT = 0
+        self._players(1, 2)
+        with django_assert_num_queries(3):
+            APIClient().get("/api/players/search/?page_size=100")
+
+        self._players(30, 12)
+        with django_assert_num_queries(3):
+            response = APIClient().get("/api/players/search/?page_size=100")
+
+        row = next(
+            row for row in response.data["results"] if row["username"] == "p30_0"
+        )
+        recent = row["recent_stats"]
+        assert [stat["match_id"] for stat in recent] == [11, 10, 9, 8, 7]
+
+        player_id = row["id"]
+        detail = APIClient().get(f"/api/players/{player_id}/").data
+        assert detail["recent_stats"] == recent
+        assert len(detail["all_stats"]) == 12
+
+    def test_detail_rating_series_is_bounded(self, settings, django_assert_num_queries):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from my_app.models import RATING_HISTORY_SERIES_POINTS, PlayerRatingHistory
+
+        settings.API_CACHE_TIMEOUT = 0
+        player = self._players(1, 0)[0]
+        with django_assert_num_queries(3):
+            APIClient().get(f"/api/players/{player.pk}/")
+
+        now = timezone.now()
+        PlayerRatingHistory.objects.bulk_create(
+            PlayerRatingHistory(
+                player=player, rating=n % 10, recorded_at=now - timedelta(hours=n)
+            )
+            for n in range(RATING_HISTORY_SERIES_POINTS + 20)
+        )
+        with django_assert_num_queries(3):
+            detail = APIClient().get(f"/api/players/{player.pk}/").data
+
+        series = detail["rating_history"]
+        assert len(series) == RATING_HISTORY_SERIES_POINTS
+        assert series[0]["recorded_at"] > series[-1]["recorded_at"]
+        assert series[0] == {
+            "rating": "0.00",
+            "rating_min": "0.00",
+            "rating_max": "0.00",
+            "samples": 1,
+            "resolution": "raw",
+            "recorded_at": series[0]["recorded_at"],
+        }
+
+
+@pytest.mark.django_db
+class TestPlayerSearch:
+    def _player(self, username, first_name, last_name):
+        user = User.objects.create_user(
+            username=username, first_name=first_name, last_name=last_name
+        )
+        return Player.objects.create(user=user, position="MID")
+
+    def _search(self, query, **params):
+        response = APIClient().get("/api/players/search/", {"q": query, **params})
+        assert response.status_code == 200
+        return response.data
+
+    def _usernames(self, query):
+        return [row["username"] for row in self._search(query)["results"]]
+
+    def test_prefix_case_and_transliteration(self):
+        self._player("oleksii", "Олексій", "Шевченко")
+        self._player("andriy", "Andriy", "Shevtsov")
+
+        assert self._usernames("Шевч") == ["oleksii"]
+        assert self._usernames("shevchenko ОЛЕКС") == ["oleksii"]
+        assert self._usernames("Oleksiy") == ["oleksii"]
+        assert self._usernames("Андрій") == ["andriy"]
+        assert sorted(self._usernames("shev")) == ["andriy", "oleksii"]
+        assert self._usernames("Петро") == []
+
+    def test_index_follows_user_and_roster_changes(self):
+        player = self._player("p1", "Василь", "Мороз")
+        tour = Tournament.objects.create(
+            name="Cup",
+            start_date="2024-06-01",
+            end_date="2024-07-01",
+            format="Groups",
+            max_teams=4,
+            location="Lviv",
+        )
+        team = Team.objects.create(
+            tournament=tour,
+            name="Блискавка",
+            captain="C",
+            email="c@example.com",
+            phone="1",
+            player_roster=["Мороз Василь"],
+        )
+        assert self._usernames("bliskavka") == ["p1"]
+
+        team.name = "Сталь"
+        team.save()
+        assert self._usernames("блиск") == []
+        assert self._usernames("stal") == ["p1"]
+
+        player.user.last_name = "Коваль"
+        player.user.save()
+        assert self._usernames("мороз") == []
+        assert self._usernames("коваль") == ["p1"]
+        # Ім'я більше не збігається із заявкою
+        assert self._usernames("stal") == []
+
+    def test_ranked_and_paginated(self):
+        for n in range(5):
+            self._player(f"forward{n}", "Іван", f"Бондар{n}")
+        self._player("bondarenko", "Бондаренко", "Бондаренко")
+
+        data = self._search("бонд", page_size=2)
+        assert data["count"] == 6
+        assert len(data["results"]) == 2 and data["next"]
+        # Коротший документ з тим самим збігом — вище за bm25
+        assert data["results"][0]["username"] == "bondarenko"
+
+        Player.objects.filter(user__username="forward3").update(position="GK")
+        data = self._search("бонд", position="GK")
+        assert [row["username"] for row in data["results"]] == ["forward3"]
+
+
+@pytest.mark.django_db
+class TestPagination:
+    def _players(self, ratings):
+        users = User.objects.bulk_create(
+            User(username=f"k{n}") for n in range(len(ratings))
+        )
+        return Player.objects.bulk_create(
+            Player(user=user, position="MID", overall_rating=rating)
+            for user, rating in zip(users, ratings)
+        )
+
+    def _walk(self, url):
+        rows = []
+        while url:
+            response = APIClient().get(url)
+            assert response.status_code == 200
+            assert "count" not in response.data
+            rows += response.data["results"]
+            url = response.data["next"]
+        return rows
+
+    def test_players_keyset_walks_ties_in_constant_queries(
+        self, settings, django_assert_num_queries
+    ):
+        settings.API_CACHE_TIMEOUT = 0
+        players = self._players([5, 7, 5, 5, 0, 7, 5])
+
+        rows, url = [], "/api/players/?page_size=2"
+        while url:
+            # Остання сторінка так само дешева, як перша: без COUNT і OFFSET
+            with django_assert_num_queries(2):
+                response = APIClient().get(url)
+            assert "count" not in response.data
+            rows += response.data["results"]
+            url = response.data["next"]
+        expected = sorted(players, key=lambda p: (-p.overall_rating, -p.pk))
+        assert [row["id"] for row in rows] == [p.pk for p in expected]
+
+        response = APIClient().get("/api/players/?page_size=2&count=true")
+        assert response.data["count"] == 7
+
+        response = APIClient().get("/api/players/?cursor=zzz")
+        assert response.status_code == 400
+
+    def test_page_size_is_capped(self, settings):
+        settings.API_CACHE_TIMEOUT = 0
+        self._players([1] * 105)
+        response = APIClient().get("/api/players/?page_size=1000")
+        assert len(response.data["results"]) == 100
+
+    def test_stats_cursor_keeps_microseconds(self):
+        from datetime import datetime, timezone
+
+        from my_app.models import PlayerStats
+
+        player = self._players([0])[0]
+        PlayerStats.objects.bulk_ingest(
+            [PlayerStats(player=player, match_id=n) for n in range(4)]
+        )
+        # Усі рядки в межах однієї мілісекунди
+        for n, stats in enumerate(PlayerStats.objects.order_by("pk")):
+            created = datetime(2024, 6, 1, 12, 0, 0, 100 + n, tzinfo=timezone.utc)
+            PlayerStats.objects.filter(pk=stats.pk).update(created_at=created)
+
+        rows = self._walk(f"/api/player-stats/?player_id={player.pk}&page_size=1")
+        assert [row["match_id"] for row in rows] == [3, 2, 1, 0]
+
+    def test_page_number_count_suppression(self):
+        for n in range(3):
+            Tournament.objects.create(
+                name=f"Cup {n}",
+                start_date="2024-06-01",
+                end_date="2024-07-01",
+                format="Groups",
+                max_teams=8,
+                location="Kyiv",
+            )
+        counted = APIClient().get("/api/tournaments/?page_size=2").data
+        assert counted["count"] == 3
+
+        data = APIClient().get("/api/tournaments/?page_size=2&count=false").data
+        assert "count" not in data
+        assert len(data["results"]) == 2 and data["previous"] is None
+        data = APIClient().get(data["next"]).data
+        assert [row["name"] for row in data["results"]] == ["Cup 2"]
+        assert data["next"] is None and data["previous"]
@@ -1,8 +1,16 @@
+import json
+import statistics
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 
 from django.conf import settings
+from django.db import connections
 
 import requests
+from requests.adapters import HTTPAdapter
 
 # ===== UPL Team ID mapping (api-football.com, league 333, verified IDs) =====
 UPL_TEAM_IDS = {
@@ -27,45 +35,267 @@ API_BASE = "https://v3.football.api-sports.io"
 SEASON = 2024
 CACHE_TTL_HOURS = 24
 
+# Max teams fetched at once during a sync, and pages at once per team
+SYNC_WORKERS = 5
+PAGE_WORKERS = 3
+# Request rate assumed until API-Football's X-RateLimit-* headers are seen
+DEFAULT_REQUESTS_PER_MINUTE = 10
+# Retries of a request answered 429 Too Many Requests
+RATE_LIMIT_RETRIES = 2
+# (connect, read) timeouts of a single API request, seconds
+REQUEST_TIMEOUT = (3.05, 10)
+
+# Refresh lock lease: if a process dies mid-refresh, another may take over
+REFRESH_LEASE = timedelta(seconds=60)
+# Negative cache: after the n-th failure in a row a team is not refetched
+# for RETRY_BASE * 2**(n-1), capped at RETRY_MAX
+RETRY_BASE = timedelta(minutes=1)
+RETRY_MAX = timedelta(hours=6)
+# How long a first load waits for another caller already fetching the team
+FIRST_LOAD_WAIT_SECONDS = 15
+FIRST_LOAD_POLL_SECONDS = 0.25
+# In-process tier in front of UPLSquadCache: max squads kept per process and
+# how often (seconds) the DB version counter is checked for other writers
+MEMORY_CACHE_SIZE = 64
+VERSION_CHECK_SECONDS = 1.0
+
+_session = None
+_session_lock = threading.Lock()
+_refresher = None
+
 
 def _get_headers():
     return {"x-apisports-key": settings.API_FOOTBALL_KEY}
 
 
-def _fetch_squad_from_api(team_id: int) -> list:
+def _api_base() -> str:
+    return getattr(settings, "API_FOOTBALL_URL", API_BASE).rstrip("/")
+
+
+def get_session() -> requests.Session:
+    """
+    Process-wide keep-alive session: API calls reuse pooled connections
+    instead of a new TCP/TLS handshake per request.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=1, pool_maxsize=SYNC_WORKERS * PAGE_WORKERS
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+    return _session
+
+
+class QuotaExceeded(Exception):
+    """The daily API-Football request quota is used up."""
+
+
+def _header_int(headers, name):
+    try:
+        return int(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """
+    Token bucket shared by all API calls of the process.
+
+    The bucket holds up to one minute's worth of requests and refills
+    continuously. API-Football reports its limits on every response:
+    X-RateLimit-Limit / X-RateLimit-Remaining (per minute) resize the
+    bucket and cap its tokens at what the server says is left, and
+    x-ratelimit-requests-remaining (per day) reaching 0 stops all requests
+    until the quota resets at 00:00 UTC. A 429 answer empties the bucket
+    for Retry-After seconds.
+    """
+
+    def __init__(self, per_minute=DEFAULT_REQUESTS_PER_MINUTE):
+        self._lock = threading.Lock()
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self.exhausted_until = None
+
+    @property
+    def rate(self):
+        return self.capacity / 60
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """Take a token, sleeping until one is available; returns seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                if self.exhausted_until and datetime.now(timezone.utc) < (
+                    self.exhausted_until
+                ):
+                    raise QuotaExceeded(f"quota resets at {self.exhausted_until}")
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = max(self._blocked_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(delay)
+            waited += delay
+
+    def update(self, headers):
+        """Adjust the bucket to the limits reported in response headers."""
+        limit = _header_int(headers, "X-RateLimit-Limit")
+        remaining = _header_int(headers, "X-RateLimit-Remaining")
+        daily = _header_int(headers, "x-ratelimit-requests-remaining")
+        with self._lock:
+            self._refill(time.monotonic())
+            if limit:
+                self.capacity = float(limit)
+            if remaining is not None:
+                self.tokens = min(self.tokens, float(remaining))
+            if daily is not None and daily <= 0:
+                tomorrow = datetime.now(timezone.utc).date() + timedelta(days=1)
+                self.exhausted_until = datetime(
+                    tomorrow.year, tomorrow.month, tomorrow.day, tzinfo=timezone.utc
+                )
+
+    def pause(self, seconds):
+        """Send no requests for `seconds` (after a 429)."""
+        with self._lock:
+            self.tokens = 0.0
+            self._updated = time.monotonic()
+            self._blocked_until = max(self._blocked_until, self._updated + seconds)
+
+
+rate_limiter = RateLimiter()
+
+
+class RequestStats:
+    """Request counts and latencies of one sync (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self.latencies = []
+        self.endpoints = Counter()
+        self.statuses = Counter()
+        self.retries = 0
+        self.throttled = 0.0
+
+    def record(self, path, status, latency, waited, retry=False):
+        with self._lock:
+            self.latencies.append(latency)
+            self.endpoints[path] += 1
+            self.statuses[str(status)] += 1
+            self.retries += retry
+            self.throttled += waited
+
+    def summary(self) -> dict:
+        with self._lock:
+            latencies = sorted(self.latencies)
+            summary = {
+                "requests": len(latencies),
+                "endpoints": dict(self.endpoints),
+                "statuses": dict(self.statuses),
+                "retries": self.retries,
+                "throttled_s": round(self.throttled, 3),
+                "elapsed_s": round(time.monotonic() - self._started, 3),
+            }
+        if latencies:
+            summary["latency_ms"] = {
+                "p50": round(statistics.median(latencies) * 1000, 1),
+                "p95": round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 1),
+                "max": round(latencies[-1] * 1000, 1),
+            }
+        return summary
+
+
+def _get(session, path: str, params: dict, stats=None) -> dict:
+    """
+    One rate-limited GET to API-Football; returns the decoded JSON body.
+    A 429 pauses all requests of the process and is retried.
+    """
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        waited = rate_limiter.acquire()
+        started = time.monotonic()
+        status = "error"
+        try:
+            resp = session.get(
+                f"{_api_base()}{path}",
+                headers=_get_headers(),
+                params=params,
+                timeout=REQUEST_TIMEOUT,
+            )
+            status = resp.status_code
+        finally:
+            if stats is not None:
+                latency = time.monotonic() - started
+                stats.record(path, status, latency, waited, retry=attempt > 0)
+        rate_limiter.update(resp.headers)
+        if resp.status_code == 429 and attempt < RATE_LIMIT_RETRIES:
+            retry_after = _header_int(resp.headers, "Retry-After")
+            rate_limiter.pause(retry_after or 60 / rate_limiter.capacity)
+            continue
+        resp.raise_for_status()
+        return resp.json()
+
+
+def _fetch_player_pages(session, team_id: int, stats=None) -> list:
+    """
+    All pages of /players?team&season: page 1 tells paging.total, the rest
+    are fetched concurrently. A failed page fails the whole fetch, so a
+    truncated squad never replaces a cached one.
+    """
+    params = {"team": team_id, "season": SEASON}
+    first = _get(session, "/players", params, stats)
+    total = (first.get("paging") or {}).get("total") or 1
+    pages = [first]
+    if total > 1:
+        workers = min(PAGE_WORKERS, total - 1)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pages += pool.map(
+                lambda page: _get(session, "/players", {**params, "page": page}, stats),
+                range(2, total + 1),
+            )
+
+    raw, seen = [], set()
+    for page in pages:
+        for p in page.get("response", []):
+            player_id = p["player"].get("id")
+            if player_id is None or player_id not in seen:
+                seen.add(player_id)
+                raw.append(p)
+    return raw
+
+
+def _fetch_squad_from_api(team_id: int, session=None, stats=None) -> list:
     """
     Try /players/squads first (current registered squad).
-    Fall back to /players?team&season (players who appeared in stats).
+    Fall back to /players?team&season (players who appeared in stats),
+    following all of its pages. Requests go through rate_limiter; pass a
+    RequestStats to record them.
     """
-    headers = _get_headers()
+    session = session or get_session()
 
     # --- Attempt 1: squad endpoint ---
     try:
-        resp = requests.get(
-            f"{API_BASE}/players/squads",
-            headers=headers,
-            params={"team": team_id},
-            timeout=10,
-        )
-        resp.raise_for_status()
-        data = resp.json()
+        data = _get(session, "/players/squads", {"team": team_id}, stats)
         players = data.get("response", [{}])[0].get("players", [])
         if players:
             return _normalise_squad(players)
     except Exception as exc:
         print(f"[UPL Service] /squads error for team {team_id}: {exc}")
 
-    # --- Attempt 2: players-by-team endpoint (paginated, page 1 only) ---
+    # --- Attempt 2: players-by-team endpoint (all pages) ---
     try:
-        resp = requests.get(
-            f"{API_BASE}/players",
-            headers=headers,
-            params={"team": team_id, "season": SEASON},
-            timeout=10,
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        raw = data.get("response", [])
+        raw = _fetch_player_pages(session, team_id, stats)
         if raw:
             return [
                 {
@@ -100,12 +330,291 @@ def _normalise_squad(players: list) -> list:
     ]
 
 
+def fetch_squads(
+    team_ids: dict, workers: int = SYNC_WORKERS, progress=None, stats=None
+) -> dict:
+    """
+    Fetch several squads concurrently over the shared session.
+
+    team_ids maps team name to API team id; at most `workers` (capped by
+    SYNC_WORKERS) teams are fetched at once. progress(done, total),
+    if given, is called from the calling thread as squads arrive; stats, a
+    RequestStats, records every API request. Returns {team_name: players},
+    with [] for teams the API gave nothing for.
+    """
+    if not team_ids:
+        return {}
+    session = get_session()
+    workers = max(1, min(workers, SYNC_WORKERS, len(team_ids)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        squads = pool.map(
+            lambda team_id: _fetch_squad_from_api(team_id, session, stats),
+            team_ids.values(),
+        )
+        results = {}
+        for done, (name, players) in enumerate(zip(team_ids, squads), start=1):
+            results[name] = players
+            if progress:
+                progress(done, len(team_ids))
+        return results
+
+
+def sync_squads(
+    team_names=None, workers: int = SYNC_WORKERS, progress=None, stats=None
+) -> dict:
+    """
+    Force-refresh squads from the API (all UPL teams by default).
+
+    Squads are fetched concurrently (fetch_squads) and written with a single
+    upsert. A team whose fetch failed keeps its cached row untouched, so
+    readers never see a missing squad while a sync is running.
+
+    Returns {team_name: {"players": count, "source": "api" | "stale_cache" |
+    "fallback"}}.
+    """
+    from .models import UPL_SQUADS_VERSION, CacheVersion, UPLSquadCache, UPLSquadRefresh
+
+    team_ids = {
+        name: UPL_TEAM_IDS[name]
+        for name in (team_names or UPL_TEAM_IDS)
+        if name in UPL_TEAM_IDS
+    }
+    squads = fetch_squads(team_ids, workers, progress, stats)
+    now = datetime.now(timezone.utc)
+
+    UPLSquadCache.objects.bulk_create(
+        [
+            UPLSquadCache(
+                team_name=name,
+                api_team_id=team_ids[name],
+                squad_json=players,
+                fetched_at=now,
+            )
+            for name, players in squads.items()
+            if players
+        ],
+        update_conflicts=True,
+        unique_fields=["team_name"],
+        update_fields=["api_team_id", "squad_json", "fetched_at"],
+    )
+    refreshed = [name for name, players in squads.items() if players]
+    # Background refreshes (get_squad) may hold some of these locks
+    UPLSquadRefresh.objects.succeed(refreshed, unlock=False)
+    if refreshed:
+        # bulk_create sends no post_save, so bump the version here
+        CacheVersion.objects.bump(UPL_SQUADS_VERSION)
+        squad_cache.expire_version()
+
+    failed = [name for name, players in squads.items() if not players]
+    stale = dict(
+        UPLSquadCache.objects.filter(team_name__in=failed).values_list(
+            "team_name", "squad_json"
+        )
+        if failed
+        else ()
+    )
+    results = {}
+    for name, players in squads.items():
+        if players:
+            results[name] = {"players": len(players), "source": "api"}
+        elif name in stale:
+            results[name] = {"players": len(stale[name]), "source": "stale_cache"}
+        else:
+            results[name] = {"players": 0, "source": "fallback"}
+    return results
+
+
+def encode(data) -> bytes:
+    """JSON bytes exactly as DRF's JSONRenderer writes them (compact, UTF-8)."""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class SquadMemoryCache:
+    """
+    Per-process LRU of encoded squad responses (JSON bytes) in front of
+    UPLSquadCache. An entry lives until its squad turns stale
+    (fetched_at + CACHE_TTL_HOURS); every write to UPLSquadCache, from any
+    process, bumps the UPL_SQUADS_VERSION counter in the DB, and a changed
+    counter drops all entries. The counter is read at most once per
+    VERSION_CHECK_SECONDS, so hot lookups never touch the DB and other
+    processes' writes show up within that interval.
+    """
+
+    def __init__(self, maxsize=MEMORY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked = float("-inf")
+
+    def _check_version(self):
+        from .models import UPL_SQUADS_VERSION, CacheVersion
+
+        if time.monotonic() - self._checked < VERSION_CHECK_SECONDS:
+            return self._version
+        version = CacheVersion.objects.current(UPL_SQUADS_VERSION)
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            self._checked = time.monotonic()
+        return version
+
+    def get(self, team_name: str):
+        """Cached bytes for the team, or None; also returns the version seen."""
+        version = self._check_version()
+        with self._lock:
+            entry = self._entries.get(team_name)
+            if entry is None:
+                return None, version
+            payload, expires_at = entry
+            if time.time() >= expires_at:
+                del self._entries[team_name]
+                return None, version
+            self._entries.move_to_end(team_name)
+            return payload, version
+
+    def put(self, team_name: str, payload: bytes, expires_at: float, version):
+        """Store bytes read under `version`, unless the version moved on since."""
+        with self._lock:
+            if version != self._version:
+                return
+            self._entries[team_name] = (payload, expires_at)
+            self._entries.move_to_end(team_name)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def expire_version(self):
+        """Re-read the version counter on the next lookup (after a local write)."""
+        self._checked = float("-inf")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+            self._checked = float("-inf")
+
+
+squad_cache = SquadMemoryCache()
+
+
+def get_squad_payload(team_name: str) -> bytes:
+    """
+    get_squad() response as encoded JSON bytes. Fresh squads are served
+    from the in-process tier (squad_cache) without a DB query or JSON
+    encoding; stale, fallback and unknown-team responses always go
+    through get_squad().
+    """
+    payload, version = squad_cache.get(team_name)
+    if payload is not None:
+        return payload
+
+    result = get_squad(team_name)
+    if result["source"] not in ("cache", "api"):
+        return encode(result)
+
+    fetched_at = datetime.fromisoformat(result["fetched_at"])
+    cached = encode(
+        {
+            "players": result["players"],
+            "source": "cache",
+            "fetched_at": result["fetched_at"],
+        }
+    )
+    expires_at = (fetched_at + timedelta(hours=CACHE_TTL_HOURS)).timestamp()
+    squad_cache.put(team_name, cached, expires_at, version)
+    return cached if result["source"] == "cache" else encode(result)
+
+
+def _in_background(func, *args):
+    """Run func(*args) on the shared refresh thread pool."""
+    global _refresher
+
+    def run():
+        try:
+            func(*args)
+        except Exception as exc:
+            print(f"[UPL Service] background refresh error {args}: {exc}")
+        finally:
+            # Pool threads open their own DB connections; don't leak them
+            connections.close_all()
+
+    with _session_lock:
+        if _refresher is None:
+            _refresher = ThreadPoolExecutor(
+                max_workers=SYNC_WORKERS, thread_name_prefix="upl-refresh"
+            )
+    return _refresher.submit(run)
+
+
+def _refresh_locked(team_name: str, team_id: int) -> list:
+    """
+    Fetch a squad and store it. The caller must hold the team's refresh
+    lock (UPLSquadRefresh.acquire); it is released here, and a failure
+    puts the team into exponential backoff.
+    """
+    from .models import UPLSquadCache, UPLSquadRefresh
+
+    players = []
+    try:
+        players = _fetch_squad_from_api(team_id)
+        if players:
+            UPLSquadCache.objects.update_or_create(
+                team_name=team_name,
+                defaults={
+                    "api_team_id": team_id,
+                    "squad_json": players,
+                    "fetched_at": datetime.now(timezone.utc),
+                },
+            )
+            squad_cache.expire_version()
+    finally:
+        if players:
+            UPLSquadRefresh.objects.succeed([team_name])
+        else:
+            UPLSquadRefresh.objects.fail(
+                team_name, "No data from API", RETRY_BASE, RETRY_MAX
+            )
+    return players
+
+
+def _cached(cache_obj, source: str) -> dict:
+    return {
+        "players": cache_obj.squad_json,
+        "source": source,
+        "fetched_at": cache_obj.fetched_at.isoformat(),
+    }
+
+
+def _wait_for_first_load(team_name: str):
+    """Poll for the squad another caller is fetching; the cache row or None."""
+    from .models import UPLSquadCache, UPLSquadRefresh
+
+    deadline = time.monotonic() + FIRST_LOAD_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(FIRST_LOAD_POLL_SECONDS)
+        cache_obj = UPLSquadCache.objects.filter(team_name=team_name).first()
+        if cache_obj:
+            return cache_obj
+        state = UPLSquadRefresh.objects.filter(team_name=team_name).first()
+        if state is None or not state.locked(datetime.now(timezone.utc)):
+            return None
+    return None
+
+
 def get_squad(team_name: str) -> dict:
     """
     Return squad data for the given team name.
-    Uses SQLite cache; refreshes if older than CACHE_TTL_HOURS.
+
+    Stale-while-revalidate: a cached squad is returned at once; if it is
+    older than CACHE_TTL_HOURS it is served as "stale_cache" and refreshed
+    on a background thread, so only the very first load of a team waits
+    for the API. At most one refresh per team runs at a time across
+    threads and processes (UPLSquadRefresh lock row); concurrent first
+    loads wait for that one fetch. A team whose fetch failed is not
+    refetched until its backoff expires.
     """
-    from .models import UPLSquadCache
+    from .models import UPLSquadCache, UPLSquadRefresh
 
     team_id = UPL_TEAM_IDS.get(team_name)
     if not team_id:
@@ -119,29 +628,32 @@ def get_squad(team_name: str) -> dict:
     cache_obj = UPLSquadCache.objects.filter(team_name=team_name).first()
     now = datetime.now(timezone.utc)
 
-    if cache_obj and (now - cache_obj.fetched_at) < timedelta(hours=CACHE_TTL_HOURS):
-        return {
-            "players": cache_obj.squad_json,
-            "source": "cache",
-            "fetched_at": cache_obj.fetched_at.isoformat(),
-        }
-
-    # Fetch from API
-    players = _fetch_squad_from_api(team_id)
-
-    if players:
-        UPLSquadCache.objects.update_or_create(
-            team_name=team_name,
-            defaults={"api_team_id": team_id, "squad_json": players, "fetched_at": now},
-        )
-        return {"players": players, "source": "api", "fetched_at": now.isoformat()}
-
-    # Return stale cache or empty
     if cache_obj:
-        return {
-            "players": cache_obj.squad_json,
-            "source": "stale_cache",
-            "fetched_at": cache_obj.fetched_at.isoformat(),
-        }
+        if (now - cache_obj.fetched_at) < timedelta(hours=CACHE_TTL_HOURS):
+            return _cached(cache_obj, "cache")
+        result = _cached(cache_obj, "stale_cache")
+        result["refreshing"] = UPLSquadRefresh.objects.acquire(team_name, REFRESH_LEASE)
+        if result["refreshing"]:
+            _in_background(_refresh_locked, team_name, team_id)
+        return result
+
+    # First load: nothing to serve, so fetch (or wait for whoever is fetching)
+    if UPLSquadRefresh.objects.acquire(team_name, REFRESH_LEASE):
+        players = _refresh_locked(team_name, team_id)
+        if players:
+            return {"players": players, "source": "api", "fetched_at": now.isoformat()}
+    else:
+        state = UPLSquadRefresh.objects.get(team_name=team_name)
+        if state.locked(now):
+            cache_obj = _wait_for_first_load(team_name)
+            if cache_obj:
+                return _cached(cache_obj, "cache")
+        elif state.retry_at:
+            return {
+                "players": [],
+                "source": "fallback",
+                "error": "No data available",
+                "retry_at": state.retry_at.isoformat(),
+            }
 
     return {"players": [], "source": "fallback", "error": "No data available"}
@@ -5,6 +5,7 @@ from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 from .views import (
     AuthViewSet,
+    JobViewSet,
     MatchViewSet,
     PlayerStatsViewSet,
     PlayerViewSet,
@@ -25,6 +26,7 @@ router.register(r"tournaments", TournamentViewSet, basename="tournament")
 router.register(r"teams", TeamViewSet, basename="team")
 router.register(r"standings", StandingViewSet, basename="standing")
 router.register(r"matches", MatchViewSet, basename="match")
+router.register(r"jobs", JobViewSet, basename="job")
 
 
 urlpatterns = [
@@ -2,16 +2,28 @@ from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.core.mail import send_mail
-from django.db.models import Q
+from django.db.models import (
+    Count,
+    F,
+    IntegerField,
+    OuterRef,
+    Prefetch,
+    Q,
+    Subquery,
+    Sum,
+)
+from django.db.models.functions import Coalesce
+from django.http import HttpResponse
 from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 
-from rest_framework import status, viewsets
+from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.permissions import (
     AllowAny,
     BasePermission,
+    IsAdminUser,
     IsAuthenticated,
     IsAuthenticatedOrReadOnly,
 )
@@ -19,8 +31,25 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from .models import Match, Player, PlayerStats, Standing, Team, Tournament, UserProfile
+from .api_cache import cache_response
+from .jobs import enqueue
+from .models import (
+    COUNTED_MATCH_STATUS,
+    Job,
+    LeaderboardEntry,
+    Match,
+    Player,
+    PlayerStats,
+    Standing,
+    Team,
+    Tournament,
+    UserProfile,
+)
+from .pagination import KeysetPagination, StandardPagination
+from .roles import RoleRefreshToken, is_coach, with_coach_flag
 from .serializers import (
+    JobSerializer,
+    LeaderboardEntrySerializer,
     MatchSerializer,
     PlayerDetailSerializer,
     PlayerRatingHistorySerializer,
@@ -28,6 +57,7 @@ from .serializers import (
     PlayerStatsSerializer,
     StandingSerializer,
     TeamSerializer,
+    TournamentListSerializer,
     TournamentSerializer,
     UserProfileSerializer,
     UserRegisterSerializer,
@@ -35,6 +65,9 @@ from .serializers import (
 )
 from .services import PlayerRatingService
 
+# Розмір сторінки таблиці лідерів за замовчуванням (межа — MAX_PAGE_SIZE)
+LEADERBOARD_PAGE_SIZE = 50
+
 
 class IsCoach(BasePermission):
     """Дозвіл тільки для членів групи Coach"""
@@ -42,11 +75,7 @@ class IsCoach(BasePermission):
     message = "Доступно тільки для тренерів."
 
     def has_permission(self, request, view):
-        return (
-            request.user
-            and request.user.is_authenticated
-            and request.user.groups.filter(name="Coach").exists()
-        )
+        return is_coach(request.user)
 
 
 class IsAdminOrCoach(BasePermission):
@@ -57,24 +86,94 @@ class IsAdminOrCoach(BasePermission):
             return False
         if request.user.is_staff:
             return True
-        return request.user.groups.filter(name="Coach").exists()
+        return is_coach(request.user)
+
+
+def _count_related(model):
+    """Підзапит COUNT(*) рядків model, що належать турніру (без JOIN і GROUP BY)."""
+    counts = (
+        model.objects.filter(tournament=OuterRef("pk"))
+        .order_by()
+        .values("tournament")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
 
 
 class TournamentViewSet(viewsets.ModelViewSet):
-    queryset = Tournament.objects.prefetch_related("teams", "standings", "matches")
+    queryset = Tournament.objects.order_by("id")
     serializer_class = TournamentSerializer
 
+    def get_expand(self):
+        """Колекції з ?expand=teams,standings,matches (невідомі імена ігноруються)."""
+        requested = self.request.query_params.get("expand", "")
+        return [
+            name
+            for name in TournamentListSerializer.EXPANDABLE
+            if name in requested.split(",")
+        ]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # prefetch для кожної вкладеної колекції TournamentSerializer
+        prefetches = {
+            "teams": Prefetch("teams"),
+            "standings": Prefetch(
+                "standings", queryset=Standing.objects.select_related("team")
+            ),
+            "matches": Prefetch("matches"),
+        }
+        if self.action == "list":
+            expand = self.get_expand()
+            queryset = queryset.annotate(
+                teams_count=_count_related(Team),
+                matches_count=_count_related(Match),
+            )
+        else:
+            expand = prefetches
+        return queryset.prefetch_related(*(prefetches[name] for name in expand))
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return TournamentListSerializer
+        return TournamentSerializer
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action == "list":
+            context["expand"] = self.get_expand()
+        return context
+
     def get_permissions(self):
         if self.action in ["list", "retrieve"]:
             return [AllowAny()]
         # Створення/редагування/видалення турніру — тільки адмін або тренер
         return [IsAdminOrCoach()]
 
+    @cache_response("tournaments", "teams", "standings", "matches")
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response("tournaments", "teams", "standings", "matches")
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
 
 class TeamViewSet(viewsets.ModelViewSet):
-    queryset = Team.objects.all()
+    queryset = Team.objects.order_by("pk")
     serializer_class = TeamSerializer
 
+    def get_queryset(self):
+        """Фільтри: ?tournament=<id>, ?status=pending|approved|rejected"""
+        queryset = super().get_queryset()
+        params = self.request.query_params
+        if params.get("tournament", "").isdigit():
+            queryset = queryset.filter(tournament=params["tournament"])
+        if params.get("status"):
+            queryset = queryset.filter(status=params["status"])
+        return queryset
+
     def get_permissions(self):
         if self.action in ["list", "retrieve"]:
             return [AllowAny()]
@@ -85,16 +184,61 @@ class TeamViewSet(viewsets.ModelViewSet):
         serializer.save(coach=self.request.user)
 
 
-class StandingViewSet(viewsets.ModelViewSet):
-    queryset = Standing.objects.all()
+class StandingViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Турнірні таблиці (лише читання): рядки рахуються з результатів матчів
+    і віддаються вже впорядкованими за місцем. ?tournament=<id> — один турнір.
+    """
+
+    queryset = Standing.objects.select_related("team")
     serializer_class = StandingSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        tournament_id = self.request.query_params.get("tournament")
+        if tournament_id:
+            queryset = queryset.filter(tournament_id=tournament_id)
+        return queryset
+
+    @cache_response("standings", "teams")
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response("standings", "teams")
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
 
 class MatchViewSet(viewsets.ModelViewSet):
     queryset = Match.objects.all()
     serializer_class = MatchSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetPagination
+    ordering = ("date", "pk")
+
+    def get_queryset(self):
+        """
+        Фільтри: ?tournament=<id>, ?team=<id> (вдома або в гостях),
+        ?home_team_ref=<id>, ?away_team_ref=<id>
+        """
+        queryset = super().get_queryset()
+        params = self.request.query_params
+        for field in ("tournament", "home_team_ref", "away_team_ref"):
+            if params.get(field, "").isdigit():
+                queryset = queryset.filter(**{field: params[field]})
+        team = params.get("team", "")
+        if team.isdigit():
+            queryset = queryset.filter(Q(home_team_ref=team) | Q(away_team_ref=team))
+        return queryset
+
+    @cache_response("matches")
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response("matches")
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
 
 class AuthViewSet(viewsets.ViewSet):
@@ -109,7 +253,7 @@ class AuthViewSet(viewsets.ViewSet):
             user = serializer.save()
 
             # Створити JWT токени
-            refresh = RefreshToken.for_user(user)
+            refresh = RoleRefreshToken.for_user(user)
 
             return Response(
                 {
@@ -332,60 +476,117 @@ class AuthViewSet(viewsets.ViewSet):
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated])
+    @cache_response("matches", "teams", "tournaments")
     def coach_stats(self, request):
-        """Статистика тренера — команди, турніри, матчі, перемоги"""
+        """
+        Статистика тренера — команди, турніри, матчі, результати і форма.
+
+        Три запити незалежно від кількості матчів: команди разом з турнірами,
+        умовні агрегати по матчах і останні матчі для форми. Агрегати
+        групуються за парою "тренер господарів, тренер гостей": сторону
+        тренера дає ключ групи, тож умови агрегатів — прості порівняння
+        колонок (умова "команда тренера вдома або в гостях" у кожному
+        агрегаті робила компіляцію запиту дорожчою за сам запит). Відповідь
+        кешується для кожного тренера окремо і скидається записом матчів,
+        команд або турнірів.
+        """
         user = request.user
-        # Команди цього тренера
-        teams = Team.objects.filter(coach=user)
-        team_count = teams.count()
-        # Унікальні турніри, в яких беруть участь команди тренера
-        tournament_ids = teams.values_list("tournament_id", flat=True).distinct()
-        tournament_count = len(set(tournament_ids))
-        # Матчі в цих турнірах
-        team_names = list(teams.values_list("name", flat=True))
-        from django.db.models import Q
-
-        matches_qs = Match.objects.filter(tournament_id__in=tournament_ids)
-        match_count = matches_qs.count()
-        # Перемоги (матчі де команда тренера перемогла)
-        wins = 0
-        for m in matches_qs:
-            if m.home_team in team_names and m.home_score > m.away_score:
-                wins += 1
-            elif m.away_team in team_names and m.away_score > m.home_score:
-                wins += 1
-        # Останні турніри
-        from .serializers import TournamentSerializer as TS
-
-        recent_tournaments = Tournament.objects.filter(id__in=tournament_ids).order_by(
-            "-start_date"
+        teams = list(
+            Team.objects.filter(coach=user).select_related("tournament").order_by("pk")
+        )
+        tournaments = {team.tournament_id: team.tournament for team in teams}
+        own_teams = {team.pk for team in teams}
+
+        counted = Q(status=COUNTED_MATCH_STATUS)
+        groups = (
+            Match.objects.filter(tournament_id__in=tournaments)
+            .values("home_team_ref__coach", "away_team_ref__coach")
+            .annotate(
+                matches=Count("pk"),
+                played=Count("pk", filter=counted),
+                home_wins=Count(
+                    "pk", filter=counted & Q(home_score__gt=F("away_score"))
+                ),
+                away_wins=Count(
+                    "pk", filter=counted & Q(away_score__gt=F("home_score"))
+                ),
+                draws=Count("pk", filter=counted & Q(home_score=F("away_score"))),
+                home_goals=Sum("home_score", filter=counted),
+                away_goals=Sum("away_score", filter=counted),
+            )
+            .order_by()
+        )
+        totals = dict.fromkeys(
+            ("matches", "played", "wins", "draws", "goals_for", "goals_against"), 0
+        )
+        for row in groups:
+            totals["matches"] += row["matches"]
+            # Матч двох команд одного тренера рахується з боку господарів
+            if row["home_team_ref__coach"] == user.pk:
+                ours, theirs = "home", "away"
+            elif row["away_team_ref__coach"] == user.pk:
+                ours, theirs = "away", "home"
+            else:
+                continue
+            totals["played"] += row["played"]
+            totals["wins"] += row[f"{ours}_wins"]
+            totals["draws"] += row["draws"]
+            totals["goals_for"] += row[f"{ours}_goals"] or 0
+            totals["goals_against"] += row[f"{theirs}_goals"] or 0
+        totals["losses"] = totals["played"] - totals["wins"] - totals["draws"]
+
+        coach_teams = Team.objects.filter(coach=user).values("pk")
+        recent = Match.objects.filter(
+            counted
+            & (Q(home_team_ref__in=coach_teams) | Q(away_team_ref__in=coach_teams))
+        ).order_by("-date", "-pk")[:5]
+        form = []
+        for home_id, home_score, away_score in recent.values_list(
+            "home_team_ref_id", "home_score", "away_score"
+        ):
+            if home_id not in own_teams:
+                home_score, away_score = away_score, home_score
+            form.append(
+                "W"
+                if home_score > away_score
+                else "D" if home_score == away_score else "L"
+            )
+
+        recent_tournaments = sorted(
+            tournaments.values(), key=lambda t: (t.start_date, t.pk), reverse=True
         )[:5]
-        recent_data = [
-            {
-                "id": t.id,
-                "name": t.name,
-                "status": t.status,
-                "format": t.format,
-                "start_date": str(t.start_date),
-            }
-            for t in recent_tournaments
-        ]
         return Response(
             {
-                "teams": team_count,
-                "team_names": team_names,
-                "tournaments": tournament_count,
-                "matches": match_count,
-                "wins": wins,
-                "recent_tournaments": recent_data,
+                "teams": len(teams),
+                "team_names": [team.name for team in teams],
+                "tournaments": len(tournaments),
+                **totals,
+                "form": form,
+                "recent_tournaments": [
+                    {
+                        "id": t.id,
+                        "name": t.name,
+                        "status": t.status,
+                        "format": t.format,
+                        "start_date": str(t.start_date),
+                    }
+                    for t in recent_tournaments
+                ],
             }
         )
 
 
 class ProfileViewSet(viewsets.ReadOnlyModelViewSet):
-    """ViewSet для публічних профілів"""
+    """
+    ViewSet для публічних профілів.
+
+    Профіль, гравець і прапорець тренера приходять одним запитом на
+    сторінку — кількість запитів не залежить від кількості користувачів.
+    """
 
-    queryset = User.objects.all()
+    queryset = with_coach_flag(
+        User.objects.select_related("player", "profile").order_by("pk")
+    )
     serializer_class = UserProfileSerializer
     permission_classes = [AllowAny]
 
@@ -414,25 +615,46 @@ class ProfileViewSet(viewsets.ReadOnlyModelViewSet):
 
 
 class PlayerViewSet(viewsets.ModelViewSet):
-    """ViewSet для управління гравцями"""
+    """
+    ViewSet для управління гравцями.
 
-    queryset = Player.objects.select_related("user").prefetch_related(
-        "stats", "rating_history"
-    )
+    Список — за рейтингом з keyset-пагінацією (?cursor=, ?page_size=).
+    """
+
+    queryset = Player.objects.select_related("user").with_recent_stats()
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetPagination
+    ordering = ("-overall_rating", "-pk")
+
+    def get_queryset(self):
+        if self.action == "retrieve":
+            # Детальному serializer'у потрібна вся статистика (all_stats), тож
+            # recent_stats — зріз уже завантаженого prefetch без окремого запиту;
+            # історія рейтингу — лише останні RATING_HISTORY_SERIES_POINTS записів
+            return (
+                Player.objects.select_related("user")
+                .prefetch_related("stats")
+                .with_rating_series()
+            )
+        return super().get_queryset()
 
     def get_serializer_class(self):
         if self.action == "retrieve":
             return PlayerDetailSerializer
         return PlayerSerializer
 
+    @cache_response("players")
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     @action(detail=True, methods=["get"])
     def rating_history(self, request, pk=None):
-        """Отримати історію рейтингу гравця"""
+        """Отримати історію рейтингу гравця (новіші першими, сторінками)"""
         player = self.get_object()
-        history = player.rating_history.all()[:20]
-        serializer = PlayerRatingHistorySerializer(history, many=True)
-        return Response(serializer.data)
+        paginator = KeysetPagination(ordering=("-recorded_at", "-pk"))
+        page = paginator.paginate_queryset(player.rating_history.all(), request)
+        serializer = PlayerRatingHistorySerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated])
     def update_stats(self, request, pk=None):
@@ -457,35 +679,66 @@ class PlayerViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=False, methods=["get"])
+    @cache_response("players")
     def leaderboard(self, request):
-        """Топ гравців за рейтингом"""
-        position = request.query_params.get("position")
-        limit = int(request.query_params.get("limit", 50))
-
-        queryset = self.queryset
+        """
+        Топ гравців за рейтингом з матеріалізованої таблиці лідерів.
 
+        Keyset-пагінація за місцем (my_app.pagination.KeysetPagination):
+        ?cursor= з посилання "next", ?page_size= (50 за замовчуванням).
+        """
+        position = request.query_params.get("position")
+        queryset = LeaderboardEntry.objects.select_related("player__user")
+        rank_field = "rank"
         if position:
             queryset = queryset.filter(position=position)
+            rank_field = "position_rank"
 
-        top_players = queryset.order_by("-overall_rating")[:limit]
-        serializer = self.get_serializer(top_players, many=True)
-        return Response(serializer.data)
+        paginator = KeysetPagination(
+            ordering=(rank_field, "player_id"), page_size=LEADERBOARD_PAGE_SIZE
+        )
+        entries = paginator.paginate_queryset(queryset, request)
+        serializer = LeaderboardEntrySerializer(entries, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=["get"])
+    @cache_response("players")
+    def rank(self, request, pk=None):
+        """Місце гравця в загальній таблиці лідерів і серед гравців його амплуа"""
+        entry = (
+            LeaderboardEntry.objects.select_related("player__user")
+            .filter(player_id=pk)
+            .first()
+        )
+        if entry is None:
+            return Response(
+                {"error": "Гравця не знайдено"}, status=status.HTTP_404_NOT_FOUND
+            )
+        totals = LeaderboardEntry.objects.aggregate(
+            total=Count("pk"),
+            position_total=Count("pk", filter=Q(position=entry.position)),
+        )
+        data = LeaderboardEntrySerializer(entry).data
+        data.update(totals)
+        return Response(data)
 
     @action(detail=False, methods=["get"])
+    @cache_response("players")
     def search(self, request):
-        """Пошук гравців"""
-        query = request.query_params.get("q", "")
+        """
+        Пошук гравців за логіном, іменем, прізвищем і командами з заявок.
+
+        Кожне слово ?q= — префікс (регістр, транслітерація і діакритика
+        не важливі), результати впорядковані за релевантністю, без ?q= —
+        за рейтингом. Фільтри ?position=, ?min_rating=; сторінки за номером
+        (?page=, ?page_size=, ?count=false) — релевантність не є полем, за
+        яким можна будувати keyset.
+        """
+        query = request.query_params.get("q", "").strip()
         position = request.query_params.get("position")
         min_rating = request.query_params.get("min_rating")
 
-        queryset = self.queryset
-
-        if query:
-            queryset = queryset.filter(
-                Q(user__username__icontains=query)
-                | Q(user__first_name__icontains=query)
-                | Q(user__last_name__icontains=query)
-            )
+        queryset = self.get_queryset()
 
         if position:
             queryset = queryset.filter(position=position)
@@ -493,16 +746,25 @@ class PlayerViewSet(viewsets.ModelViewSet):
         if min_rating:
             queryset = queryset.filter(overall_rating__gte=float(min_rating))
 
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        if query:
+            queryset = queryset.search(query)
+        else:
+            queryset = queryset.order_by("-overall_rating", "pk")
+
+        paginator = StandardPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
 
 class PlayerStatsViewSet(viewsets.ModelViewSet):
-    """ViewSet для статистики гравців"""
+    """ViewSet для статистики гравців (новіші першими, keyset-пагінація)"""
 
     queryset = PlayerStats.objects.select_related("player__user")
     serializer_class = PlayerStatsSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetPagination
+    ordering = ("-created_at", "-pk")
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -521,7 +783,7 @@ class PlayerStatsViewSet(viewsets.ModelViewSet):
 from rest_framework.decorators import api_view, permission_classes
 
 # ===== UPL Squad Views =====
-from .upl_service import UPL_TEAM_IDS, get_squad
+from .upl_service import get_squad, get_squad_payload
 
 
 @api_view(["GET"])
@@ -530,10 +792,14 @@ def upl_squad_view(request, team_name):
     """
     GET /api/upl/squad/<team_name>/
     Returns squad data for the given UPL team name.
-    Uses 24-hour SQLite cache to minimise API calls.
+    Uses 24-hour SQLite cache to minimise API calls; JSON responses come
+    pre-encoded from the in-process tier in front of it.
     """
-    result = get_squad(team_name)
-    return Response(result)
+    if request.accepted_renderer.format == "json":
+        return HttpResponse(
+            get_squad_payload(team_name), content_type="application/json"
+        )
+    return Response(get_squad(team_name))
 
 
 @api_view(["POST"])
@@ -542,21 +808,51 @@ def upl_sync_view(request):
     """
     POST /api/upl/sync/
     Force-refresh all UPL team squads from API (admin only).
+    Runs as a background job (run_worker); responds 202 with the job,
+    whose result at /api/jobs/<id>/ is {"synced": {...}} per team.
+    An already queued sync is reused instead of queueing another one.
     """
     if not request.user.is_staff:
         return Response(
             {"detail": "Тільки адміністратори."}, status=status.HTTP_403_FORBIDDEN
         )
 
-    results = {}
-    for team_name in UPL_TEAM_IDS:
-        from .models import UPLSquadCache
+    job = Job.objects.filter(kind="upl_sync", status=Job.QUEUED).first()
+    if job is None:
+        job = enqueue("upl_sync", user=request.user)
+    serializer = JobSerializer(job, context={"request": request})
+    return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
 
-        UPLSquadCache.objects.filter(team_name=team_name).delete()
-        data = get_squad(team_name)
-        results[team_name] = {
-            "players": len(data.get("players", [])),
-            "source": data.get("source"),
-        }
 
-    return Response({"synced": results})
+class JobViewSet(
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
+):
+    """
+    Фонові завдання (лише адміністратори). POST ставить завдання в чергу
+    ({"kind": ..., "params": {...}}) і відповідає 202 з його id; виконує
+    їх команда run_worker. Фільтри списку: ?status=, ?kind=.
+    """
+
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    permission_classes = [IsAdminUser]
+    pagination_class = KeysetPagination
+    ordering = ("-pk",)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        for param in ("status", "kind"):
+            if self.request.query_params.get(param):
+                queryset = queryset.filter(**{param: self.request.query_params[param]})
+        return queryset
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return response
+
+    def perform_create(self, serializer):
+        serializer.save(created_by=self.request.user)
@@ -73,7 +73,8 @@ WSGI_APPLICATION = "my_project.wsgi.application"
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        # SQLITE_PATH — окрема база, напр. для навантажувального тесту
+        "NAME": os.environ.get("SQLITE_PATH", BASE_DIR / "db.sqlite3"),
     }
 }
 
@@ -113,15 +114,41 @@ CORS_ALLOWED_ORIGINS = [
 # REST Framework settings
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "my_app.roles.RoleJWTAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ],
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
-    "PAGE_SIZE": 3,
+    # Списки, упорядковані за полями моделі, перевизначають її на
+    # my_app.pagination.KeysetPagination (див. my_app/pagination.py)
+    "DEFAULT_PAGINATION_CLASS": "my_app.pagination.StandardPagination",
+    "PAGE_SIZE": 20,
 }
 
+# Кеш відповідей API (my_app.api_cache): API_CACHE_BACKEND=locmem|file.
+# locmem живе в межах одного процесу, і версії груп даних, змінені одним
+# воркером, інші не побачили б — тому з кількома воркерами gunicorn
+# (WEB_CONCURRENCY > 1) типово використовується спільний file.
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", 1))
+API_CACHE_BACKEND = os.environ.get(
+    "API_CACHE_BACKEND", "file" if WEB_CONCURRENCY > 1 else "locmem"
+)
+_CACHE_BACKENDS = {
+    "locmem": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "zvit-api",
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    },
+    "file": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.environ.get("API_CACHE_DIR", BASE_DIR / ".cache" / "api"),
+        "OPTIONS": {"MAX_ENTRIES": 20000},
+    },
+}
+CACHES = {"default": _CACHE_BACKENDS[API_CACHE_BACKEND]}
+API_CACHE_ALIAS = "default"
+API_CACHE_TIMEOUT = int(os.environ.get("API_CACHE_TIMEOUT", 300))
+
 # Simple JWT settings
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=5),
@@ -131,6 +158,9 @@ SIMPLE_JWT = {
     "ALGORITHM": "HS256",
     "SIGNING_KEY": SECRET_KEY,
     "AUTH_HEADER_TYPES": ("Bearer",),
+    # Claim "roles" з групами користувача (my_app.roles)
+    "TOKEN_OBTAIN_SERIALIZER": "my_app.serializers.RoleTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "my_app.serializers.RoleTokenRefreshSerializer",
 }
 
 # Media settings
@@ -149,6 +179,7 @@ def _read_env(path):
 
 _read_env(BASE_DIR / ".env")
 API_FOOTBALL_KEY = os.environ.get("API_FOOTBALL_KEY", "")
+API_FOOTBALL_URL = os.environ.get("API_FOOTBALL_URL", "https://v3.football.api-sports.io")
 
 # Email settings
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend" # За замовчуванням консоль для безпеки
\ No newline at end of file
@@ -3,7 +3,7 @@
 1. Доповнює всі команди до 11 гравців (якщо менше)
 2. Видаляє старих ботів з бази
 3. Створює User + Player для кожного гравця зі списків команд
-4. Генерує статистику → рейтинг автоматично рахується моделлю
+4. Генерує статистику → рейтинг рахується одним PlayerStats.objects.bulk_ingest
 """
 
 import os
@@ -89,6 +89,7 @@ TEAM_POSITIONS = [
 print("\n=== Генерація гравців ===")
 seen_names = {}  # name -> player (щоб не дублювати)
 created = 0
+stat_rows = []  # вставляються одним bulk_ingest після циклу
 
 for team in Team.objects.all():
     roster = team.player_roster or []
@@ -125,45 +126,53 @@ for team in Team.objects.all():
             is_mid = position == "MID"
             is_def = position in ("DEF", "MID")
             is_gk = position == "GK"
-            PlayerStats.objects.create(
-                player=player,
-                match_id=random.randint(1000, 9999),
-                goals=(
-                    random.randint(0, 2)
-                    if is_fwd
-                    else (random.randint(0, 1) if is_mid else 0)
-                ),
-                assists=(
-                    random.randint(0, 2) if (is_fwd or is_mid) else random.randint(0, 1)
-                ),
-                minutes_played=random.randint(60, 90),
-                shots=(
-                    random.randint(1, 6)
-                    if is_fwd
-                    else (random.randint(0, 2) if is_mid else 0)
-                ),
-                shots_on_target=(
-                    random.randint(0, 3)
-                    if is_fwd
-                    else (random.randint(0, 1) if is_mid else 0)
-                ),
-                key_passes=(
-                    random.randint(0, 3) if (is_fwd or is_mid) else random.randint(0, 1)
-                ),
-                tackles=random.randint(2, 7) if is_def else 0,
-                interceptions=random.randint(1, 5) if is_def else 0,
-                saves=random.randint(2, 8) if is_gk else 0,
-                yellow_cards=1 if random.random() < 0.1 else 0,
-                red_cards=0,
+            stat_rows.append(
+                PlayerStats(
+                    player=player,
+                    match_id=random.randint(1000, 9999),
+                    goals=(
+                        random.randint(0, 2)
+                        if is_fwd
+                        else (random.randint(0, 1) if is_mid else 0)
+                    ),
+                    assists=(
+                        random.randint(0, 2)
+                        if (is_fwd or is_mid)
+                        else random.randint(0, 1)
+                    ),
+                    minutes_played=random.randint(60, 90),
+                    shots=(
+                        random.randint(1, 6)
+                        if is_fwd
+                        else (random.randint(0, 2) if is_mid else 0)
+                    ),
+                    shots_on_target=(
+                        random.randint(0, 3)
+                        if is_fwd
+                        else (random.randint(0, 1) if is_mid else 0)
+                    ),
+                    key_passes=(
+                        random.randint(0, 3)
+                        if (is_fwd or is_mid)
+                        else random.randint(0, 1)
+                    ),
+                    tackles=random.randint(2, 7) if is_def else 0,
+                    interceptions=random.randint(1, 5) if is_def else 0,
+                    saves=random.randint(2, 8) if is_gk else 0,
+                    yellow_cards=1 if random.random() < 0.1 else 0,
+                    red_cards=0,
+                )
             )
 
 print(f"  Створено {created} нових гравців.")
 
 # ─── 5. Оновити загальний рейтинг ────────────────────────────────────────────
+# bulk_ingest сам рахує рейтинги матчів і оновлює гравців, яких зачепив імпорт;
+# refresh_ratings добиває решту (наприклад, гравців без нової статистики).
 print("\n=== Перерахунок рейтингу ===")
-for player in Player.objects.all():
-    player.update_rating()
-print("  Готово!")
+PlayerStats.objects.bulk_ingest(stat_rows)
+Player.objects.all().refresh_ratings()
+print(f"  Готово! Імпортовано {len(stat_rows)} рядків статистики.")
 
 # ─── Підсумок ─────────────────────────────────────────────────────────────────
 total = Player.objects.count()
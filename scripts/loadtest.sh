@@ -0,0 +1,47 @@
+#!/usr/bin/env bash
+# ----------------------------------------------------------------
+# Навантажувальний тест API (locustfile.py) без UI.
+# Піднімає gunicorn з WEB_CONCURRENCY воркерами на окремій SQLite-базі
+# (наповнює її seed_league при першому запуску), запускає Locust і
+# зберігає звіт: reports/loadtest_stats.csv, reports/loadtest.html.
+#
+#   USERS=500 DURATION=5m scripts/loadtest.sh
+# ----------------------------------------------------------------
+set -o errexit
+
+USERS=${USERS:-200}
+SPAWN_RATE=${SPAWN_RATE:-20}
+DURATION=${DURATION:-2m}
+WEB_CONCURRENCY=${WEB_CONCURRENCY:-4}
+PORT=${PORT:-8765}
+REPORT_DIR=${REPORT_DIR:-reports}
+SEED_PLAYERS=${SEED_PLAYERS:-2000}
+export SQLITE_PATH=${SQLITE_PATH:-/tmp/zvit_loadtest.sqlite3}
+export LOCUST_SEED_PLAYERS=$SEED_PLAYERS
+
+cd "$(dirname "$0")/.."
+
+if [ ! -f "$SQLITE_PATH" ]; then
+    echo ">>> Створення бази $SQLITE_PATH і генерація ліги..."
+    python manage.py migrate --no-input
+    python manage.py seed_league --tournaments 20 --teams 16 --matches 60 \
+        --players "$SEED_PLAYERS" --stats 20
+fi
+
+echo ">>> gunicorn: $WEB_CONCURRENCY воркерів на порту $PORT"
+gunicorn my_project.wsgi:application --workers "$WEB_CONCURRENCY" \
+    --bind "127.0.0.1:$PORT" --log-level warning &
+GUNICORN_PID=$!
+trap 'kill $GUNICORN_PID' EXIT
+
+for _ in $(seq 1 30); do
+    if python -c "import urllib.request; urllib.request.urlopen('http://127.0.0.1:$PORT/api/')" 2>/dev/null; then
+        break
+    fi
+    sleep 1
+done
+
+mkdir -p "$REPORT_DIR"
+locust --headless --only-summary -u "$USERS" -r "$SPAWN_RATE" -t "$DURATION" \
+    --host "http://127.0.0.1:$PORT" \
+    --csv "$REPORT_DIR/loadtest" --html "$REPORT_DIR/loadtest.html"
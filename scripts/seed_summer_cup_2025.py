@@ -296,76 +296,17 @@ print(f"  Створено {len(match_results)} матч(ів).")
 # ─── 4. Розрахунок турнірної таблиці ─────────────────────────────────────────
 print("\nОновлення турнірної таблиці...")
 
-# Видаляємо старі рядки таблиці
-Standing.objects.filter(tournament=tournament).delete()
-
-# Ініціалізуємо статистику для кожної команди
-stats = {
-    t.name: {
-        "team_obj": t,
-        "played": 0,
-        "won": 0,
-        "drawn": 0,
-        "lost": 0,
-        "gf": 0,
-        "ga": 0,
-        "pts": 0,
-    }
-    for t in all_teams
-}
-
-for home, away, hs, as_ in match_results:
-    if home not in stats or away not in stats:
-        print(f"  УВАГА: команда '{home}' або '{away}' не знайдена у словнику!")
-        continue
-
-    # home
-    stats[home]["played"] += 1
-    stats[home]["gf"] += hs
-    stats[home]["ga"] += as_
-    # away
-    stats[away]["played"] += 1
-    stats[away]["gf"] += as_
-    stats[away]["ga"] += hs
-
-    if hs > as_:
-        stats[home]["won"] += 1
-        stats[home]["pts"] += 3
-        stats[away]["lost"] += 1
-    elif hs < as_:
-        stats[away]["won"] += 1
-        stats[away]["pts"] += 3
-        stats[home]["lost"] += 1
-    else:
-        stats[home]["drawn"] += 1
-        stats[home]["pts"] += 1
-        stats[away]["drawn"] += 1
-        stats[away]["pts"] += 1
-
-for name, s in stats.items():
-    Standing.objects.create(
-        tournament=tournament,
-        team=s["team_obj"],
-        played=s["played"],
-        won=s["won"],
-        drawn=s["drawn"],
-        lost=s["lost"],
-        goals_for=s["gf"],
-        goals_against=s["ga"],
-        points=s["pts"],
-    )
+# Таблиця оновлюється з матчів автоматично; rebuild — повна звірка
+rows = Standing.objects.rebuild(tournament.pk)
 
 print("\n  Турнірна таблиця:")
 print(
     f"  {'#':<3} {'Команда':<14} {'М':<4} {'В':<4} {'Н':<4} {'П':<4} {'ГЗ':<4} {'ГП':<4} {'РГ':<5} {'О'}"
 )
-sorted_standings = sorted(
-    stats.values(), key=lambda x: (-x["pts"], -(x["gf"] - x["ga"]), -x["gf"])
-)
-for pos, s in enumerate(sorted_standings, 1):
-    gd = s["gf"] - s["ga"]
+for s in rows:
+    gd = s.goals_for - s.goals_against
     print(
-        f"  {pos:<3} {s['team_obj'].name:<14} {s['played']:<4} {s['won']:<4} {s['drawn']:<4} {s['lost']:<4} {s['gf']:<4} {s['ga']:<4} {gd:+d}    {s['pts']}"
+        f"  {s.rank:<3} {s.team.name:<14} {s.played:<4} {s.won:<4} {s.drawn:<4} {s.lost:<4} {s.goals_for:<4} {s.goals_against:<4} {gd:+d}    {s.points}"
     )
 
 print("\nГотово! База даних оновлена.")